@@ -62,7 +62,7 @@ class FileManager3:
         # 剪切后清空剪贴板路径（复制保留以便重复粘贴）
         if self.clipboard["action"] == "cut":
             self.clipboard["paths"] = []
-        self.main_window.update_filelist()  # 刷新文件列表
+        self.main_window.refresh_changes()  # 增量刷新文件列表
 
     def rename_item(self, item):
         """重命名单个文件/文件夹（修正版，直接接收item参数）"""
@@ -88,7 +88,6 @@ class FileManager3:
 
         try:
             os.rename(src_path, dest_path)
-            item.setText(0, new_name)  # 直接更新列表显示
-            self.main_window.update_filelist()  # 刷新文件列表
+            self.main_window.refresh_changes()  # 增量刷新文件列表
         except Exception as e:
             QMessageBox.critical(self.main_window, "错误", f"重命名失败: {str(e)}")        
\ No newline at end of file
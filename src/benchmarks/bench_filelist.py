@@ -0,0 +1,340 @@
+"""
+文件列表热路径基准测试：os.scandir 扫描 -> 排序 -> 写入模型 -> 绘制可见行
+
+用法（在 src 目录下运行）：
+    python -m benchmarks.bench_filelist --cases flat_1k flat_100k --output bench.json
+    python -m benchmarks.bench_filelist --cases flat_100k --baseline old.json
+
+每个用例默认在独立子进程中运行，峰值内存（peak RSS）互不影响；结果写为 JSON 便于对比。
+"""
+import os
+import sys
+import json
+import time
+import argparse
+import platform
+import statistics
+import subprocess
+import tempfile
+
+os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+
+from benchmarks.synthetic_tree import TREE_SPECS, ensure_tree, deep_levels
+
+DEFAULT_CASES = ["flat_1k", "flat_100k", "deep", "hidden_mix"]  # flat_1m 需显式指定（生成较慢）
+DEFAULT_ROOT = os.path.join(tempfile.gettempdir(), "pyfilemanager_bench")
+TIMEOUT = 600  # 单次加载的最长等待秒数
+
+
+def peak_rss_kb():
+    """当前进程的峰值内存（KB），无法获取时返回 None"""
+    try:
+        import resource
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        return peak // 1024 if sys.platform == "darwin" else peak  # macOS 单位为字节
+    except ImportError:
+        pass
+    try:
+        import psutil  # Windows：可选依赖
+        info = psutil.Process().memory_info()
+        return getattr(info, "peak_wset", info.rss) // 1024
+    except ImportError:
+        return None
+
+
+def _ms(seconds: float) -> float:
+    return round(seconds * 1000, 2)
+
+
+# ---------- 子进程：实际计时 ----------
+def _create_window():
+    """创建与主窗口接口一致的最小宿主（FileListUpdater 依赖的属性）"""
+    from PySide6.QtWidgets import QApplication, QMainWindow, QStatusBar
+    from utils.config_manager import ConfigManager
+    from utils.listing_cache import ListingCache
+    from utils.navigation_history import NavigationHistory
+    from widgets.custom_tree_widget import FileListWidget
+
+    app = QApplication.instance() or QApplication([])
+
+    class BenchWindow(QMainWindow):
+        def __init__(self):
+            super().__init__()
+            self.config_manager = ConfigManager(os.path.join(tempfile.gettempdir(), "pyfilemanager_bench_config.json"))
+            self.config_manager.config = {"show_mtime": True, "prefetch_max_concurrent": 0}  # 关闭预取，避免干扰计时
+            self.current_path = ""
+            self.show_hidden = False
+            self.show_all_sizes = False
+            self.icons = {}
+            self.db = None
+            self.folder_size_manager = None
+            self.listing_cache = ListingCache()
+            self.navigation_history = NavigationHistory()
+            self.status_bar = QStatusBar()
+            self.file_list = FileListWidget()
+            self.setCentralWidget(self.file_list)
+            self.resize(1000, 800)
+
+    window = BenchWindow()
+    window.show()
+    return app, window
+
+
+def _wait(app, predicate):
+    deadline = time.perf_counter() + TIMEOUT
+    while not predicate():
+        if time.perf_counter() > deadline:
+            raise TimeoutError("等待加载完成超时")
+        app.processEvents()
+        time.sleep(0.0005)
+
+
+def bench_scan(app, path: str, show_hidden: bool) -> tuple:
+    """扫描线程：首批结果到达时间与完整扫描时间"""
+    from threads.file_list_loader import FileListLoaderManager
+    manager = FileListLoaderManager()
+    first_chunk, result = [], []
+    manager.chunk_loaded.connect(lambda chunk: first_chunk.append(time.perf_counter()) if not first_chunk else None)
+    manager.list_loaded.connect(lambda file_list: result.append((time.perf_counter(), file_list)))
+    start = time.perf_counter()
+    manager.start_load(path, show_hidden)
+    _wait(app, lambda: result)
+    end, records = result[0]
+    manager.shutdown()
+    metrics = {
+        "first_chunk_ms": _ms(first_chunk[0] - start) if first_chunk else None,
+        "total_ms": _ms(end - start),
+    }
+    return metrics, records
+
+
+def bench_sort(records: list) -> dict:
+    """sort_file_list：三种排序键各计时一次"""
+    from utils.sort_utils import sort_file_list
+    metrics = {}
+    for key in ("name", "size", "mtime"):
+        start = time.perf_counter()
+        sort_file_list(records, key)
+        metrics[f"{key}_ms"] = _ms(time.perf_counter() - start)
+    return metrics
+
+
+def bench_record_memory(records: list) -> dict:
+    """每条扫描记录的估算内存（与 RECORD_MEMORY_BUDGET 对照，超出时 ListingCache 的条目上限低估了内存）"""
+    from utils.file_record import record_memory_bytes, RECORD_MEMORY_BUDGET
+    sizes = [record_memory_bytes(record) for record in records]
+    return {
+        "mean_bytes": round(statistics.mean(sizes), 1) if sizes else 0,
+        "max_bytes": max(sizes, default=0),
+        "over_budget": sum(size > RECORD_MEMORY_BUDGET for size in sizes),
+    }
+
+
+def bench_populate(window, updater, path: str, records: list) -> dict:
+    """_update_filelist_from_thread：按扫描批次大小写入已扫描的记录（不含扫描耗时）"""
+    from threads.file_list_loader import CHUNK_SIZE
+    window.current_path = path
+    updater.model.clear()
+    updater.model.base_path = path
+    updater._reset_stream_state()
+    start = time.perf_counter()
+    first_chunk = None
+    for offset in range(0, len(records), CHUNK_SIZE):
+        updater._update_filelist_from_thread(records[offset:offset + CHUNK_SIZE])
+        if first_chunk is None:
+            first_chunk = time.perf_counter()
+    streamed = time.perf_counter()
+    updater._finish_filelist_from_thread(records)
+    end = time.perf_counter()
+    return {
+        "first_chunk_ms": _ms(first_chunk - start) if first_chunk else None,
+        "append_ms": _ms(streamed - start),
+        "finish_ms": _ms(end - streamed),
+        "total_ms": _ms(end - start),
+    }
+
+
+def bench_end_to_end(app, window, updater, path: str) -> dict:
+    """完整导航：update_filelist 到首行出现、加载完成与可见行绘制"""
+    window.listing_cache.clear()
+    window.current_path = path
+    first_row, done = [], []
+    model = updater.model
+    on_rows = lambda *args: first_row.append(time.perf_counter()) if not first_row else None
+    on_done = lambda file_list: done.append(time.perf_counter())
+    model.rowsInserted.connect(on_rows)
+    updater.file_list_loader.list_loaded.connect(on_done)  # 在更新器的槽之后调用
+    try:
+        start = time.perf_counter()
+        updater.update_filelist()
+        _wait(app, lambda: done)
+        paint_start = time.perf_counter()
+        window.file_list.viewport().grab()  # 同步绘制一屏可见行
+        paint_end = time.perf_counter()
+    finally:
+        model.rowsInserted.disconnect(on_rows)
+        updater.file_list_loader.list_loaded.disconnect(on_done)
+    return {
+        "first_row_ms": _ms(first_row[0] - start) if first_row else None,
+        "total_ms": _ms(done[0] - start),
+        "paint_ms": _ms(paint_end - paint_start),
+        "rows": model.rowCount(),
+    }
+
+
+def _median(runs: list) -> dict:
+    """多次运行取各指标中位数"""
+    merged = {}
+    for key, value in runs[0].items():
+        if isinstance(value, dict):
+            merged[key] = _median([run[key] for run in runs])
+        elif isinstance(value, (int, float)) and not isinstance(value, bool):
+            merged[key] = statistics.median(run[key] for run in runs)
+        else:
+            merged[key] = value
+    return merged
+
+
+def run_case(name: str, root: str, repeat: int) -> dict:
+    """在当前进程中运行单个用例"""
+    from widgets.file_list_updater import FileListUpdater
+    path = ensure_tree(root, name)
+    app, window = _create_window()
+    updater = FileListUpdater(window)
+    spec = TREE_SPECS[name]
+    variants = [False, True] if spec["kind"] == "hidden" else [False]
+    results = []
+    for show_hidden in variants:
+        window.show_hidden = show_hidden
+        runs = []
+        for _ in range(repeat):
+            if spec["kind"] == "deep":
+                runs.append(_run_deep(app, window, updater, path, show_hidden))
+            else:
+                runs.append(_run_flat(app, window, updater, path, show_hidden))
+        result = _median(runs)
+        result["show_hidden"] = show_hidden
+        results.append(result)
+    updater.file_list_loader.shutdown()
+    updater.dir_watcher.stop()
+    return {"case": name, "spec": spec, "runs": results, "peak_rss_kb": peak_rss_kb()}
+
+
+def _run_flat(app, window, updater, path: str, show_hidden: bool) -> dict:
+    scan, records = bench_scan(app, path, show_hidden)
+    return {
+        "entries": len(records),
+        "scan": scan,
+        "sort": bench_sort(records),
+        "record_memory": bench_record_memory(records),
+        "populate": bench_populate(window, updater, path, records),
+        "end_to_end": bench_end_to_end(app, window, updater, path),
+    }
+
+
+def _run_deep(app, window, updater, path: str, show_hidden: bool) -> dict:
+    """逐层进入 deep 目录树：首行时间取平均，总时间累加"""
+    levels = deep_levels(path)
+    first_rows, totals, entries = [], [], 0
+    for level in levels:
+        metrics = bench_end_to_end(app, window, updater, level)
+        first_rows.append(metrics["first_row_ms"] or 0.0)
+        totals.append(metrics["total_ms"])
+        entries += metrics["rows"]
+    return {
+        "entries": entries,
+        "levels": len(levels),
+        "end_to_end": {
+            "first_row_ms": round(statistics.mean(first_rows), 2),
+            "total_ms": round(sum(totals), 2),
+            "max_level_ms": max(totals),
+        },
+    }
+
+
+# ---------- 主进程：生成目录树并汇总 ----------
+def run_isolated(name: str, root: str, repeat: int) -> dict:
+    """在独立子进程中运行用例（峰值内存只反映该用例）"""
+    src_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    cmd = [sys.executable, "-m", "benchmarks.bench_filelist", "--worker", name,
+           "--root", root, "--repeat", str(repeat)]
+    proc = subprocess.run(cmd, cwd=src_dir, capture_output=True, text=True, encoding="utf-8")
+    lines = [line for line in proc.stdout.splitlines() if line.startswith("{")]
+    if proc.returncode != 0 and not lines:
+        raise RuntimeError(f"用例 {name} 运行失败:\n{proc.stderr}")
+    return json.loads(lines[-1])
+
+
+def compare(results: dict, baseline_path: str):
+    """与基线结果对比，打印各耗时指标的比值（<1 表示变快）"""
+    with open(baseline_path, "r", encoding="utf-8") as f:
+        baseline = {case["case"]: case for case in json.load(f)["results"]}
+    for case in results["results"]:
+        old = baseline.get(case["case"])
+        if old is None:
+            continue
+        for new_run, old_run in zip(case["runs"], old["runs"]):
+            print(f"[{case['case']}] show_hidden={new_run['show_hidden']}")
+            for stage in ("scan", "sort", "populate", "end_to_end"):
+                for metric, value in new_run.get(stage, {}).items():
+                    old_value = old_run.get(stage, {}).get(metric)
+                    if metric.endswith("_ms") and value and old_value:
+                        print(f"  {stage + '.' + metric:<28} {old_value:>10.2f} -> {value:>10.2f} ms  x{value / old_value:.2f}")
+        if case["peak_rss_kb"] and old["peak_rss_kb"]:
+            print(f"  {'peak_rss_kb':<28} {old['peak_rss_kb']:>10} -> {case['peak_rss_kb']:>10} KB")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="文件列表扫描与加载基准测试")
+    parser.add_argument("--cases", nargs="+", default=DEFAULT_CASES, choices=sorted(TREE_SPECS),
+                        help=f"要运行的用例（默认：{' '.join(DEFAULT_CASES)}）")
+    parser.add_argument("--root", default=DEFAULT_ROOT, help=f"合成目录树存放位置（默认：{DEFAULT_ROOT}）")
+    parser.add_argument("--repeat", type=int, default=3, help="每个用例重复次数（取中位数，默认 3）")
+    parser.add_argument("--output", help="结果 JSON 文件路径（默认只打印）")
+    parser.add_argument("--baseline", help="与之前保存的结果 JSON 对比")
+    parser.add_argument("--no-isolate", action="store_true", help="所有用例在同一进程中运行")
+    parser.add_argument("--worker", help=argparse.SUPPRESS)  # 子进程内部使用
+    args = parser.parse_args()
+
+    if args.worker:
+        print(json.dumps(run_case(args.worker, args.root, args.repeat), ensure_ascii=False))
+        return
+
+    from PySide6 import __version__ as pyside_version
+    results = {
+        "meta": {
+            "timestamp": time.strftime("%Y-%m-%d %H:%M:%S"),
+            "python": platform.python_version(),
+            "pyside": pyside_version,
+            "platform": platform.platform(),
+            "cpu_count": os.cpu_count(),
+            "repeat": args.repeat,
+        },
+        "results": [],
+    }
+    for name in args.cases:
+        ensure_tree(args.root, name)  # 在主进程中生成，生成开销不计入子进程内存
+        if args.no_isolate:
+            case = run_case(name, args.root, args.repeat)
+        else:
+            case = run_isolated(name, args.root, args.repeat)
+        results["results"].append(case)
+        print(f"{name}: " + json.dumps(case["runs"], ensure_ascii=False))
+        for run in case["runs"]:
+            memory = run.get("record_memory")
+            if memory and memory["over_budget"]:
+                print(f"警告：{name} 中 {memory['over_budget']:,} 条记录超出 RECORD_MEMORY_BUDGET"
+                      f"（最大 {memory['max_bytes']} 字节），应调大预算或调低 listing_cache_max_entries")
+    text = json.dumps(results, ensure_ascii=False, indent=2)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            f.write(text)
+        print(f"结果已写入: {args.output}")
+    else:
+        print(text)
+    if args.baseline:
+        compare(results, args.baseline)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,79 @@
+"""
+文件夹大小计算基准测试：旧实现（os.walk + os.path.getsize）与并行 scandir 遍历（ParallelSizeWalker）对比
+
+用法（在 src 目录下运行）：
+    python -m benchmarks.bench_folder_size --cases tree_200k
+    python -m benchmarks.bench_folder_size --path D:\\Projects --workers 8 16
+
+计时在目录元数据已被系统缓存后进行（先预热一次），结果反映遍历本身的开销。
+"""
+import os
+import time
+import argparse
+import statistics
+
+os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+
+from benchmarks.synthetic_tree import TREE_SPECS, ensure_tree
+from benchmarks.bench_filelist import DEFAULT_ROOT
+
+
+def legacy_size(path: str) -> int:
+    """旧实现：os.walk 遍历，每个文件再调用一次 os.path.getsize"""
+    total = 0
+    for root, _dirs, files in os.walk(path, followlinks=False):
+        for name in files:
+            try:
+                total += max(os.path.getsize(os.path.join(root, name)), 0)
+            except OSError:
+                pass
+    return total
+
+
+def walker_size(app, path: str, workers: int):
+    """ParallelSizeWalker：返回 SizeStats"""
+    from threads.size_walker import ParallelSizeWalker
+    walker = ParallelSizeWalker(max_workers=workers)
+    results = []
+    walker.size_calculated.connect(results.append)
+    walker.start(path)
+    while not results:
+        app.processEvents()
+        time.sleep(0.0005)
+    walker.shutdown()
+    return results[0]
+
+
+def timed(func, repeat: int):
+    runs, value = [], None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        value = func()
+        runs.append(time.perf_counter() - start)
+    return statistics.median(runs), value
+
+
+def main():
+    parser = argparse.ArgumentParser(description="文件夹大小计算基准测试")
+    parser.add_argument("--cases", nargs="+", default=["tree_200k"], choices=sorted(TREE_SPECS))
+    parser.add_argument("--path", help="直接测量该文件夹（不生成合成目录树）")
+    parser.add_argument("--root", default=DEFAULT_ROOT, help=f"合成目录树存放位置（默认：{DEFAULT_ROOT}）")
+    parser.add_argument("--workers", nargs="+", type=int, default=[1, 4, 16], help="并行遍历的线程数（可多个）")
+    parser.add_argument("--repeat", type=int, default=3, help="重复次数（取中位数，默认 3）")
+    args = parser.parse_args()
+
+    from PySide6.QtCore import QCoreApplication
+    app = QCoreApplication.instance() or QCoreApplication([])
+    paths = [args.path] if args.path else [ensure_tree(args.root, name) for name in args.cases]
+    for path in paths:
+        legacy_size(path)  # 预热：目录元数据读入系统缓存
+        legacy_time, legacy_total = timed(lambda: legacy_size(path), args.repeat)
+        print(f"{path}\n  {'os.walk + getsize':<24} {legacy_time * 1000:>10.1f} ms  {legacy_total:,} B")
+        for workers in args.workers:
+            walk_time, stats = timed(lambda: walker_size(app, path, workers), args.repeat)
+            print(f"  {f'scandir x{workers}':<24} {walk_time * 1000:>10.1f} ms  {stats.bytes:,} B  "
+                  f"{stats.files:,} 个文件 {stats.dirs:,} 个目录  x{legacy_time / walk_time:.1f}")
+
+
+if __name__ == "__main__":
+    main()
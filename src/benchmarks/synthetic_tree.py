@@ -0,0 +1,89 @@
+import os
+import json
+import random
+
+# 合成目录树规格：{名称: 参数}
+# - flat：单层目录，entries 个条目（其中 dir_ratio 为子文件夹）
+# - deep：depth 层嵌套目录，每层 entries 个文件 + 1 个下级目录
+# - hidden：单层目录，hidden_ratio 的条目以 . 开头
+# - tree：depth 层、每层 fanout 个子目录的满树，每个目录 entries 个文件（文件夹大小计算）
+TREE_SPECS = {
+    "flat_1k": {"kind": "flat", "entries": 1_000, "dir_ratio": 0.05},
+    "flat_100k": {"kind": "flat", "entries": 100_000, "dir_ratio": 0.01},
+    "flat_1m": {"kind": "flat", "entries": 1_000_000, "dir_ratio": 0.001},
+    "deep": {"kind": "deep", "depth": 200, "entries": 20},
+    "hidden_mix": {"kind": "hidden", "entries": 20_000, "hidden_ratio": 0.3},
+    "tree_200k": {"kind": "tree", "depth": 3, "fanout": 12, "entries": 100},
+}
+
+_EXTENSIONS = [".txt", ".py", ".jpg", ".png", ".mp4", ".mp3", ".pdf", ".zip", ".exe", ".docx", ".xlsx", ""]
+_BASE_MTIME = 1_700_000_000  # 修改时间分布起点（约 2023-11）
+
+
+def ensure_tree(root: str, name: str) -> str:
+    """生成（或复用）指定规格的合成目录树，返回其根目录"""
+    spec = TREE_SPECS[name]
+    path = os.path.join(root, name)
+    marker = path + ".spec.json"  # 记录生成规格（放在树外，不计入扫描结果），规格一致时复用
+    try:
+        with open(marker, "r", encoding="utf-8") as f:
+            if json.load(f) == spec:
+                return path
+    except (OSError, ValueError):
+        pass
+    print(f"生成合成目录树: {name} -> {path}")
+    os.makedirs(path, exist_ok=True)
+    rng = random.Random(name)  # 固定种子：同名规格每次生成相同内容
+    if spec["kind"] == "deep":
+        level = path
+        for depth in range(spec["depth"]):
+            _fill_directory(level, spec["entries"], rng, prefix=f"d{depth}_")
+            level = os.path.join(level, f"level{depth}")
+            os.makedirs(level, exist_ok=True)
+    elif spec["kind"] == "tree":
+        level = [path]
+        for depth in range(spec["depth"] + 1):
+            children = []
+            for folder in level:
+                _fill_directory(folder, spec["entries"], rng)
+                if depth < spec["depth"]:
+                    for i in range(spec["fanout"]):
+                        children.append(os.path.join(folder, f"sub{i:02d}"))
+                        os.makedirs(children[-1], exist_ok=True)
+            level = children
+    else:
+        _fill_directory(path, spec["entries"], rng, dir_ratio=spec.get("dir_ratio", 0.0),
+                        hidden_ratio=spec.get("hidden_ratio", 0.0))
+    with open(marker, "w", encoding="utf-8") as f:
+        json.dump(spec, f)
+    return path
+
+
+def deep_levels(path: str) -> list:
+    """返回 deep 目录树从根到最深层的目录列表"""
+    levels = [path]
+    depth = 0
+    while True:
+        child = os.path.join(levels[-1], f"level{depth}")
+        if not os.path.isdir(child):
+            return levels
+        levels.append(child)
+        depth += 1
+
+
+def _fill_directory(path: str, count: int, rng: random.Random, prefix: str = "",
+                    dir_ratio: float = 0.0, hidden_ratio: float = 0.0):
+    """写入 count 个条目：文件为稀疏文件（大小随机、不占磁盘），修改时间分布在一年内"""
+    for i in range(count):
+        name = f"{prefix}item{i:07d}"
+        if rng.random() < hidden_ratio:
+            name = "." + name
+        entry = os.path.join(path, name)
+        if rng.random() < dir_ratio:
+            os.makedirs(entry, exist_ok=True)
+            continue
+        entry += rng.choice(_EXTENSIONS)
+        with open(entry, "wb") as f:
+            f.truncate(min(int(rng.paretovariate(1.2) * 1024), 1 << 34))  # 长尾大小分布（上限 16GB）
+        mtime = _BASE_MTIME + rng.randrange(365 * 24 * 3600)
+        os.utime(entry, (mtime, mtime))
@@ -1,11 +1,12 @@
-import sqlite3
 import argparse
 from datetime import datetime, timedelta
+from dbload_manager.database_manager import DatabaseManager
+from utils.file_utils import format_size
 
 def connect_db(db_path):
-    """连接到数据库（处理异常）"""
+    """连接到数据库（处理异常；旧版本的数据库自动迁移）"""
     try:
-        return sqlite3.connect(db_path)
+        return DatabaseManager(db_path)
     except Exception as e:
         print(f"连接数据库失败: {str(e)}")
         return None
@@ -17,23 +18,22 @@ def list_db_contents(db_path):
         return
     
     try:
-        cursor = conn.cursor()
-        cursor.execute("SELECT path, size, last_modified, updated_at FROM folder_sizes")
-        records = cursor.fetchall()
+        records = conn.list_folder_sizes()
         
         if not records:
             print("数据库中无缓存记录。")
             return
         
         # 打印表头
-        print(f"{'路径':<60} | {'大小':<20} | {'最后修改时间':<20} | {'更新时间':<20}")
-        print("-" * 120)
+        print(f"{'路径':<60} | {'大小':<20} | {'文件数':>10} | {'最后修改时间':<20} | {'更新时间':<20}")
+        print("-" * 133)
         
         # 格式化每条记录
-        for path, size, last_modified, updated_at in records:
+        for path, size, files, _subdirs, last_modified, updated_at in records:
             last_modified_str = datetime.fromtimestamp(last_modified).strftime("%Y-%m-%d %H:%M:%S")
-            updated_at_str = datetime.fromisoformat(updated_at).strftime("%Y-%m-%d %H:%M:%S")
-            print(f"{path[:57]+'...' if len(path)>60 else path:<60} | {size:<20} | {last_modified_str:<20} | {updated_at_str:<20}")
+            updated_at_str = datetime.fromtimestamp(updated_at).strftime("%Y-%m-%d %H:%M:%S")
+            files_str = "" if files is None else f"{files:,}"
+            print(f"{path[:57]+'...' if len(path)>60 else path:<60} | {format_size(size):<20} | {files_str:>10} | {last_modified_str:<20} | {updated_at_str:<20}")
     except Exception as e:
         print(f"查询失败: {str(e)}")
     finally:
@@ -46,19 +46,16 @@ def clean_db(db_path, days=None):
         return
     
     try:
-        cursor = conn.cursor()
         if days is None:
             # 清理所有记录
-            cursor.execute("DELETE FROM folder_sizes")
+            deleted_count = conn.clean()
             msg = "所有"
         else:
             # 清理指定天数前的记录
             cutoff = datetime.now() - timedelta(days=days)
-            cursor.execute("DELETE FROM folder_sizes WHERE updated_at < ?", (cutoff.isoformat(),))
+            deleted_count = conn.clean(cutoff.timestamp())
             msg = f"超过{days}天未更新的"
         
-        deleted_count = cursor.rowcount
-        conn.commit()
         print(f"成功清理{msg}缓存记录，共删除{deleted_count}条。")
     except Exception as e:
         print(f"清理失败: {str(e)}")
@@ -1,11 +1,12 @@
-import sqlite3
 import argparse
 from datetime import datetime, timedelta
+from dbload_manager.database_manager import DatabaseManager
+from utils.file_utils import format_size
 
 def connect_db(db_path):
-    """连接到数据库（处理异常）"""
+    """连接到数据库（处理异常；旧版本的数据库自动迁移）"""
     try:
-        return sqlite3.connect(db_path)
+        return DatabaseManager(db_path)
     except Exception as e:
         print(f"连接数据库失败: {str(e)}")
         return None
@@ -18,9 +19,7 @@ def list_db_contents(db_path, return_records=False):
     
     records = []
     try:
-        cursor = conn.cursor()
-        cursor.execute("SELECT path, size, last_modified, updated_at FROM folder_sizes")
-        raw_records = cursor.fetchall()
+        raw_records = conn.list_folder_sizes()
         
         if not raw_records:
             print("数据库中无缓存记录。")
@@ -31,9 +30,10 @@ def list_db_contents(db_path, return_records=False):
         print("-" * 130)
         
         # 格式化每条记录并打印（添加序号）
-        for idx, (path, size, last_modified, updated_at) in enumerate(raw_records, 1):
+        for idx, (path, size_bytes, _files, _subdirs, last_modified, updated_at) in enumerate(raw_records, 1):
+            size = format_size(size_bytes)
             last_modified_str = datetime.fromtimestamp(last_modified).strftime("%Y-%m-%d %H:%M:%S")
-            updated_at_str = datetime.fromisoformat(updated_at).strftime("%Y-%m-%d %H:%M:%S")
+            updated_at_str = datetime.fromtimestamp(updated_at).strftime("%Y-%m-%d %H:%M:%S")
             print(f"{idx:<5} | {path[:57]+'...' if len(path)>60 else path:<60} | {size:<20} | {last_modified_str:<20} | {updated_at_str:<20}")
             records.append((path, size, last_modified, updated_at))
         
@@ -51,11 +51,7 @@ def delete_single_record(db_path, target_path):
     if not conn:
         return False
     try:
-        cursor = conn.cursor()
-        cursor.execute("DELETE FROM folder_sizes WHERE path = ?", (target_path,))
-        deleted_count = cursor.rowcount
-        conn.commit()
-        return deleted_count > 0
+        return conn.clear_folder_size(target_path)
     except Exception as e:
         print(f"删除失败: {str(e)}")
         return False
@@ -0,0 +1,151 @@
+import os
+import sqlite3
+from utils.logging_config import get_logger
+
+logger = get_logger(__name__)
+
+CONTENT_INDEX_PATH = os.path.join("userdata", "db", "content_index.db")
+MIN_TRIGRAM_CHARS = 3  # 最短查询长度（更短的查询无法使用 trigram 索引，只能逐个文件扫描全文，不予执行）
+SNIPPET_CONTEXT = 30  # 片段中命中位置前后保留的字符数
+
+
+def _path_range(root: str) -> tuple:
+    """root 下所有路径的字符串区间 [下限, 上限)（按前缀范围查询，可使用 path 唯一索引）"""
+    prefix = root if root.endswith(os.sep) else root + os.sep
+    return prefix, prefix + "\U0010ffff"
+
+
+class ContentIndex:
+    """
+    文件内容全文索引（SQLite FTS5 trigram，任意语言的子串查询，按 bm25 排序并返回命中片段）
+    - roots：用户选择加入索引的文件夹（默认不索引任何内容）
+    - docs(id, path, size, mtime)：已索引文件，(size, mtime) 未变化的文件更新时不再读取
+    - content：以 docs.id 为 rowid 的全文表（保存文本，用于生成片段）
+    - WAL 模式：后台更新索引期间仍可查询
+    """
+    def __init__(self, db_path: str = CONTENT_INDEX_PATH):
+        self.db_path = db_path
+        self.conn = None
+
+    def open(self) -> bool:
+        if self.conn is not None:
+            return True
+        try:
+            os.makedirs(os.path.dirname(self.db_path) or ".", exist_ok=True)
+            self.conn = sqlite3.connect(self.db_path)
+            self.conn.execute("PRAGMA journal_mode=WAL")
+            self.conn.execute("PRAGMA synchronous=NORMAL")
+            self.conn.executescript("""
+                CREATE TABLE IF NOT EXISTS roots (path TEXT PRIMARY KEY);
+                CREATE TABLE IF NOT EXISTS docs (
+                    id INTEGER PRIMARY KEY,
+                    path TEXT NOT NULL UNIQUE,
+                    size INTEGER NOT NULL,
+                    mtime REAL NOT NULL
+                );
+                CREATE VIRTUAL TABLE IF NOT EXISTS content USING fts5(body, tokenize='trigram');
+            """)
+        except sqlite3.Error as e:
+            logger.error(f"无法打开内容索引 {self.db_path}：{str(e)}")
+            self.close()
+            return False
+        return True
+
+    def close(self):
+        if self.conn is not None:
+            self.conn.close()
+            self.conn = None
+
+    # ---------- 索引范围 ----------
+    def roots(self) -> list:
+        if not self.open():
+            return []
+        return [path for path, in self.conn.execute("SELECT path FROM roots ORDER BY path")]
+
+    def add_root(self, root: str) -> bool:
+        """加入索引范围（数据库不可写时返回 False）"""
+        if not self.open():
+            return False
+        try:
+            self.conn.execute("INSERT OR IGNORE INTO roots VALUES (?)", (os.path.normpath(root),))
+            self.conn.commit()
+        except sqlite3.Error as e:
+            self.conn.rollback()
+            logger.error(f"无法加入索引范围 {root}：{str(e)}")
+            return False
+        return True
+
+    def remove_root(self, root: str) -> bool:
+        """移出索引范围并删除其下已索引的内容（数据库不可写时返回 False）"""
+        if not self.open():
+            return False
+        try:
+            self.conn.execute("DELETE FROM roots WHERE path = ?", (root,))
+            self.delete_docs([doc_id for doc_id, _size, _mtime in self.docs_under(root).values()])
+            self.conn.commit()
+        except sqlite3.Error as e:
+            self.conn.rollback()
+            logger.error(f"无法移出索引范围 {root}：{str(e)}")
+            return False
+        return True
+
+    def stats(self) -> tuple:
+        """(已索引文件数, 已索引文件总大小)"""
+        if not self.open():
+            return 0, 0
+        return self.conn.execute("SELECT count(*), coalesce(sum(size), 0) FROM docs").fetchone()
+
+    # ---------- 增量更新（由 ContentIndexThread 调用） ----------
+    def docs_under(self, root: str) -> dict:
+        """root 下已索引的文件 {路径: (id, 大小, 修改时间)}"""
+        low, high = _path_range(root)
+        rows = self.conn.execute("SELECT path, id, size, mtime FROM docs WHERE path >= ? AND path < ?", (low, high))
+        return {path: (doc_id, size, mtime) for path, doc_id, size, mtime in rows}
+
+    def upsert_doc(self, path: str, size: int, mtime: float, body: str, doc_id: int = None):
+        """写入（或替换）一个文件的文本（调用方负责提交事务）"""
+        if doc_id is None:
+            doc_id = self.conn.execute("INSERT INTO docs (path, size, mtime) VALUES (?, ?, ?)",
+                                       (path, size, mtime)).lastrowid
+        else:
+            self.conn.execute("UPDATE docs SET size = ?, mtime = ? WHERE id = ?", (size, mtime, doc_id))
+            self.conn.execute("DELETE FROM content WHERE rowid = ?", (doc_id,))
+        self.conn.execute("INSERT INTO content (rowid, body) VALUES (?, ?)", (doc_id, body))
+
+    def delete_docs(self, doc_ids: list):
+        self.conn.executemany("DELETE FROM docs WHERE id = ?", [(doc_id,) for doc_id in doc_ids])
+        self.conn.executemany("DELETE FROM content WHERE rowid = ?", [(doc_id,) for doc_id in doc_ids])
+
+    def commit(self):
+        self.conn.commit()
+
+    # ---------- 查询 ----------
+    def search(self, text: str, limit: int = 200) -> list:
+        """
+        全文查询（不区分大小写的子串匹配，按相关度排序）
+        :param text: 查询文本（至少 MIN_TRIGRAM_CHARS 个字符，更短时返回空列表）
+        :return: [(完整路径, 命中片段)]，片段中命中部分以【】标出
+        """
+        if len(text) < MIN_TRIGRAM_CHARS or not self.open():
+            return []
+        # trigram 分词下 snippet() 只能标出第一个三元组，片段改为按命中位置截取正文
+        window = ("substr(c.body, max(1, instr(lower(c.body), lower(:text)) - :before), :length)")
+        sql = (f"SELECT d.path, {window} FROM content c JOIN docs d ON d.id = c.rowid "
+               "WHERE content MATCH :phrase ORDER BY rank LIMIT :limit")
+        params = {"text": text, "phrase": '"' + text.replace('"', '""') + '"', "limit": limit,
+                  "before": SNIPPET_CONTEXT, "length": 2 * SNIPPET_CONTEXT + len(text)}
+        try:
+            rows = self.conn.execute(sql, params).fetchall()
+        except sqlite3.Error as e:
+            logger.error(f"内容索引查询失败：{str(e)}")
+            return []
+        return [(path, _mark(" ".join(snippet.split()), text)) for path, snippet in rows]
+
+
+def _mark(snippet: str, text: str) -> str:
+    """用【】标出片段中第一处命中（不区分大小写）"""
+    position = snippet.casefold().find(text.casefold())
+    if position < 0 or len(snippet.casefold()) != len(snippet):
+        return snippet
+    end = position + len(text)
+    return f"{snippet[:position]}【{snippet[position:end]}】{snippet[end:]}"
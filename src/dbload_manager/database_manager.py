@@ -1,42 +1,353 @@
 import sqlite3
 import os
+import time
+from datetime import datetime, timezone
+
+SCHEMA_VERSION = 2  # 1：folder_sizes 以完整路径 + 格式化文本（如 "12.34GB"）存储；2：dirs 表（见 create_table）
+ID_CACHE_LIMIT = 100000  # 路径 -> 目录 id 的内存缓存上限（超过时清空重建）
+_removals = {}  # {数据库文件: 删除目录行的次数}（同一进程中其他连接缓存的 id 可能已失效，据此清空）
+
+# 某个目录子树的全部 id（沿 parent_id 递归，使用 (parent_id, name) 索引）
+SUBTREE_SQL = """
+    WITH RECURSIVE subtree(id) AS (
+        SELECT ? UNION ALL SELECT dirs.id FROM dirs JOIN subtree ON dirs.parent_id = subtree.id
+    )
+"""
+
+
+def split_path(path):
+    """规范化路径并拆分为 [根, 各级目录名]（如 "/a/b" -> ["/", "a", "b"]，"C:\\a" -> ["C:\\", "a"]）"""
+    path = os.path.normpath(path)
+    parts = []
+    while True:
+        head, tail = os.path.split(path)
+        if not tail:
+            parts.append(head)
+            break
+        parts.append(tail)
+        path = head
+    parts.reverse()
+    return parts
+
+
+def lookup_dir_id(conn, path):
+    """按路径逐级查找目录 id（不存在时返回 None）"""
+    dir_id = 0
+    for name in split_path(path):
+        row = conn.execute("SELECT id FROM dirs WHERE parent_id = ? AND name = ?", (dir_id, name)).fetchone()
+        if row is None:
+            return None
+        dir_id = row[0]
+    return dir_id
+
+
+def build_paths(nodes, root_id=0, root_path=None):
+    """
+    {id: (parent_id, name)} -> {id: 路径}（与行的顺序无关）
+    :param root_id/root_path: 子树根目录的 id 与路径（为 0 时从各根目录开始拼接）
+    """
+    paths = {root_id: root_path}
+    for dir_id in nodes:
+        chain = []
+        while dir_id not in paths:
+            chain.append(dir_id)
+            dir_id = nodes[dir_id][0]
+        for child in reversed(chain):
+            parent_path, name = paths[nodes[child][0]], nodes[child][1]
+            paths[child] = name if parent_path is None else os.path.join(parent_path, name)
+    return paths
+
+
+def _parse_size_text(text):
+    """版本 1 的大小文本 -> 字节数（如 "1.50MB" -> 1572864），无法解析（如“无读取权限”）时返回 -1"""
+    for power, unit in enumerate(['KB', 'MB', 'GB', 'TB'], 1):
+        if text.endswith(unit):
+            number, scale = text[:-2], 1024 ** power
+            break
+    else:
+        number, scale = text[:-1] if text.endswith('B') else text, 1
+    try:
+        return int(float(number) * scale)
+    except ValueError:
+        return -1
+
+
+def _parse_timestamp(text):
+    """版本 1 的 updated_at（SQLite CURRENT_TIMESTAMP，UTC 文本）-> Unix 时间（秒）"""
+    try:
+        return int(datetime.fromisoformat(text).replace(tzinfo=timezone.utc).timestamp())
+    except (TypeError, ValueError):
+        return int(time.time())
+
 
 class DatabaseManager:
     def __init__(self, db_path="userdata\\db\\folder_size.db"):
         if not os.path.exists(db_path):
             os.makedirs(os.path.dirname(db_path), exist_ok=True)
+        self.db_path = db_path
         self.conn = sqlite3.connect(db_path)
+        # WAL：后台写入线程提交时不阻塞 GUI 线程的读取；NORMAL 在 WAL 下只在检查点时同步到磁盘
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("PRAGMA synchronous=NORMAL")
+        self._ids = {}  # {规范化路径: 目录 id}
+        self._removals = _removals.get(db_path, 0)
         self.create_table()
 
     def create_table(self):
-        """创建文件夹大小存储表"""
+        """
+        创建文件夹大小存储表（旧版本的数据库自动迁移）
+        dirs：每个目录一行，路径拆分为 (parent_id, name)（根目录的 parent_id 为 0），子树可沿 parent_id 递归查询
+        - mtime/own_*/scanned_at：分层大小缓存，只统计直接包含的文件（mtime 为 -1 表示已失效，需要重新扫描），
+          scanned_at 为该目录最近一次实际扫描的时间（超过最长有效期的记录重新扫描）
+        - size/files/subdirs/last_modified：计算完成的文件夹总大小（字节数）、文件数、目录数及当时的修改时间
+        未缓存的字段为 NULL；只作为上级目录存在的行两类字段都为 NULL
+        """
         cursor = self.conn.cursor()
+        cursor.execute("CREATE TABLE IF NOT EXISTS schema_version (version INTEGER NOT NULL)")
+        row = cursor.execute("SELECT version FROM schema_version").fetchone()
         cursor.execute("""
-            CREATE TABLE IF NOT EXISTS folder_sizes (
-                path TEXT PRIMARY KEY,
-                size TEXT NOT NULL,
-                last_modified REAL NOT NULL,
-                updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+            CREATE TABLE IF NOT EXISTS dirs (
+                id INTEGER PRIMARY KEY,
+                parent_id INTEGER NOT NULL,
+                name TEXT NOT NULL,
+                mtime REAL,
+                own_bytes INTEGER,
+                own_files INTEGER,
+                own_dirs INTEGER,
+                size INTEGER,
+                files INTEGER,
+                subdirs INTEGER,
+                last_modified REAL,
+                updated_at INTEGER NOT NULL,
+                scanned_at INTEGER
             )
         """)
+        cursor.execute("CREATE UNIQUE INDEX IF NOT EXISTS dirs_parent_name ON dirs(parent_id, name)")
+        if row is None:
+            self._migrate()
+            cursor.execute("INSERT INTO schema_version (version) VALUES (?)", (SCHEMA_VERSION,))
+        self.conn.commit()
+
+    def _migrate(self):
+        """从版本 1 迁移：folder_sizes（路径 + 大小文本）转存到 dirs 后删除旧表"""
+        tables = {name for name, in self.conn.execute("SELECT name FROM sqlite_master WHERE type = 'table'")}
+        if "folder_sizes" not in tables:
+            return
+        cursor = self.conn.cursor()
+        for path, size, last_modified, updated_at in cursor.execute(
+                "SELECT path, size, last_modified, updated_at FROM folder_sizes").fetchall():
+            size_bytes = _parse_size_text(size)
+            if size_bytes >= 0:  # 旧版本文本只保留两位小数：字节数为近似值，下次校验时更新
+                cursor.execute("UPDATE dirs SET size = ?, last_modified = ?, updated_at = ? WHERE id = ?",
+                               (size_bytes, last_modified, _parse_timestamp(updated_at), self._dir_id(path)))
+        cursor.execute("DROP TABLE folder_sizes")
         self.conn.commit()
+        self.conn.execute("VACUUM")  # 释放旧表占用的空间
+
+    def _dir_id(self, path, create=True):
+        """路径 -> 目录 id（create 为 True 时逐级创建不存在的行，否则返回 None）"""
+        removals = _removals.get(self.db_path, 0)
+        if removals != self._removals:  # 其他连接删除过目录行（删除提交后才计数）
+            self._ids.clear()
+            self._removals = removals
+        dir_id = self._ids.get(path)
+        if dir_id is not None:
+            return dir_id
+        parts = split_path(path)
+        dir_id, current = 0, None
+        for name in parts:
+            current = name if current is None else os.path.join(current, name)
+            cached = self._ids.get(current)
+            if cached is not None:
+                dir_id = cached
+                continue
+            row = self.conn.execute("SELECT id FROM dirs WHERE parent_id = ? AND name = ?", (dir_id, name)).fetchone()
+            if row is not None:
+                dir_id = row[0]
+            elif create:
+                dir_id = self.conn.execute("INSERT INTO dirs (parent_id, name, updated_at) VALUES (?, ?, ?)",
+                                           (dir_id, name, int(time.time()))).lastrowid
+            else:
+                return None
+            if len(self._ids) >= ID_CACHE_LIMIT:
+                self._ids.clear()
+            self._ids[current] = dir_id
+        self._ids[path] = dir_id
+        return dir_id
 
     def get_cached_size(self, folder_path):
-        """获取缓存的文件夹大小"""
+        """获取缓存的文件夹大小：(字节数, 计算时的修改时间)，未缓存时返回 None"""
+        dir_id = self._dir_id(folder_path, create=False)
+        if dir_id is None:
+            return None
+        row = self.conn.execute("SELECT size, last_modified FROM dirs WHERE id = ?", (dir_id,)).fetchone()
+        return row if row is not None and row[0] is not None else None
+
+    def get_cached_children(self, folder_path):
+        """
+        一次查询获取 folder_path 下所有已缓存的子文件夹大小（使用 (parent_id, name) 索引）
+        :return: {子文件夹名称: (字节数, 计算时的修改时间)}
+        """
+        dir_id = self._dir_id(folder_path, create=False)
+        if dir_id is None:
+            return {}
+        rows = self.conn.execute("SELECT name, size, last_modified FROM dirs WHERE parent_id = ? AND size IS NOT NULL",
+                                 (dir_id,))
+        return {name: (size, last_modified) for name, size, last_modified in rows}
+
+    def update_cache(self, folder_path, size_bytes, last_modified, files=None, subdirs=None):
+        """更新缓存（不存在的目录行逐级创建）"""
+        self.write_batch([(folder_path, size_bytes, last_modified, files, subdirs)], [], [])
+
+    def invalidate_paths(self, folder_paths):
+        """使这些目录及其所有上级目录的缓存失效（子目录内容变化后上级目录的总大小也已过期），一次提交"""
+        stale = set()
+        for path in folder_paths:
+            while path not in stale:
+                stale.add(path)
+                parent = os.path.dirname(path)
+                if parent == path:
+                    break
+                path = parent
+        ids = [(dir_id,) for dir_id in (self._dir_id(path, create=False) for path in stale) if dir_id is not None]
         cursor = self.conn.cursor()
-        cursor.execute("SELECT size, last_modified FROM folder_sizes WHERE path = ?", (folder_path,))
-        return cursor.fetchone()
+        cursor.executemany("UPDATE dirs SET size = NULL, files = NULL, subdirs = NULL, last_modified = NULL "
+                           "WHERE id = ?", ids)
+        # 分层缓存中只需标记变化的目录本身（下次计算时只重新扫描这些目录，可发现文件内容的原地修改）
+        changed = [(dir_id,) for dir_id in (self._dir_id(path, create=False) for path in folder_paths)
+                   if dir_id is not None]
+        cursor.executemany("UPDATE dirs SET mtime = -1 WHERE id = ? AND mtime IS NOT NULL", changed)
+        self.conn.commit()
+
+    def update_dir_tree(self, records, removed):
+        """
+        写入分层缓存（一次提交）
+        :param records: 重新扫描的目录 [(路径, 修改时间, 文件总字节数, 文件数, 子目录数)]
+        :param removed: 已不存在的目录（连同其子树的记录一起删除）
+        """
+        self.write_batch([], records, removed)
 
-    def update_cache(self, folder_path, size, last_modified):
-        """更新缓存（插入或替换）"""
+    def write_batch(self, caches, records, removed):
+        """
+        在一个事务中写入多条缓存（先删除已不存在的目录，再写入分层缓存与文件夹总大小）
+        :param caches: 文件夹总大小 [(路径, 字节数, 修改时间, 文件数, 目录数)]
+        :param records/removed: 同 update_dir_tree
+        """
         cursor = self.conn.cursor()
-        cursor.execute("""
-            INSERT OR REPLACE INTO folder_sizes (path, size, last_modified) 
-            VALUES (?, ?, ?)
-        """, (folder_path, size, last_modified))
+        try:
+            for path in removed:
+                dir_id = self._dir_id(path, create=False)
+                if dir_id is not None:
+                    cursor.execute(SUBTREE_SQL + "DELETE FROM dirs WHERE id IN subtree", (dir_id,))
+            if removed:
+                self._ids.clear()  # 已删除的 id 不再有效
+            now = int(time.time())
+            cursor.executemany("UPDATE dirs SET mtime = ?, own_bytes = ?, own_files = ?, own_dirs = ?, "
+                               "updated_at = ?, scanned_at = ? WHERE id = ?",
+                               [(mtime, size, files, dirs, now, now, self._dir_id(path))
+                                for path, mtime, size, files, dirs in records])
+            cursor.executemany("UPDATE dirs SET size = ?, files = ?, subdirs = ?, last_modified = ?, updated_at = ? "
+                               "WHERE id = ?", [(size, files, subdirs, last_modified, now, self._dir_id(path))
+                                                for path, size, last_modified, files, subdirs in caches])
+            self.conn.commit()
+        except sqlite3.Error:
+            self.conn.rollback()
+            self._ids.clear()  # 回滚后新建的 id 不存在
+            raise
+        if removed:
+            self._rows_removed()
+
+    def _rows_removed(self):
+        """（提交删除后调用）通知同一进程中的其他连接清空路径 -> id 缓存"""
+        self._ids.clear()
+        _removals[self.db_path] = self._removals = _removals.get(self.db_path, 0) + 1
+
+    def list_folder_sizes(self):
+        """所有已缓存的文件夹总大小：[(路径, 字节数, 文件数, 目录数, 修改时间, 更新时间)]，按路径排序"""
+        rows = self.conn.execute("SELECT id, parent_id, name, size, files, subdirs, last_modified, updated_at "
+                                 "FROM dirs").fetchall()
+        paths = build_paths({row[0]: (row[1], row[2]) for row in rows})
+        return sorted((paths[row[0]],) + tuple(row[3:]) for row in rows if row[3] is not None)
+
+    def clear_folder_size(self, folder_path):
+        """删除一个文件夹的总大小缓存，返回是否存在该记录"""
+        dir_id = self._dir_id(folder_path, create=False)
+        if dir_id is None:
+            return False
+        cursor = self.conn.execute("UPDATE dirs SET size = NULL, files = NULL, subdirs = NULL, last_modified = NULL "
+                                   "WHERE id = ? AND size IS NOT NULL", (dir_id,))
+        deleted = cursor.rowcount > 0
+        self._prune()
+        self.conn.commit()
+        self._rows_removed()
+        return deleted
+
+    def clean(self, before=None):
+        """
+        清理缓存：before 为 None 时清空，否则清除 before（Unix 时间）之前更新的记录
+        :return: 清除的文件夹总大小记录数
+        """
+        cursor = self.conn.cursor()
+        if before is None:
+            count = cursor.execute("SELECT COUNT(*) FROM dirs WHERE size IS NOT NULL").fetchone()[0]
+            cursor.execute("DELETE FROM dirs")
+        else:
+            count = cursor.execute("UPDATE dirs SET size = NULL, files = NULL, subdirs = NULL, last_modified = NULL "
+                                   "WHERE updated_at < ? AND size IS NOT NULL", (before,)).rowcount
+            cursor.execute("UPDATE dirs SET mtime = NULL, own_bytes = NULL, own_files = NULL, own_dirs = NULL "
+                           "WHERE updated_at < ?", (before,))
+            self._prune()
         self.conn.commit()
+        self._rows_removed()
+        self.conn.execute("VACUUM")
+        return count
+
+    def _prune(self):
+        """删除既没有缓存数据、也没有下级目录的行（逐层向上，直到没有可删除的行）"""
+        while self.conn.execute(
+                "DELETE FROM dirs WHERE size IS NULL AND mtime IS NULL "
+                "AND NOT EXISTS (SELECT 1 FROM dirs AS child WHERE child.parent_id = dirs.id)").rowcount:
+            pass
 
     def close(self):
         """关闭数据库连接"""
         if self.conn:
             self.conn.close()
+
+
+def read_dir_tree(db_path, root):
+    """
+    读取 root 子树的分层缓存（在计算线程中使用独立连接读取）
+    :return: {目录: (修改时间, 文件总字节数, 文件数, 子目录数, 扫描时间)}, {目录: [已缓存的子目录]},
+             root 已缓存的总大小 (字节数, 计算时的修改时间)（未缓存时为 None）
+    """
+    records, children, total = {}, {}, None
+    try:
+        conn = sqlite3.connect(db_path)
+    except sqlite3.Error:
+        return records, children, total
+    try:
+        root_id = lookup_dir_id(conn, root)
+        if root_id is None:
+            return records, children, total
+        rows = conn.execute(SUBTREE_SQL + "SELECT dirs.id, parent_id, name, mtime, own_bytes, own_files, own_dirs, "
+                            "scanned_at FROM subtree JOIN dirs ON dirs.id = subtree.id WHERE dirs.id != ?",
+                            (root_id, root_id)).fetchall()
+        root_row = conn.execute("SELECT mtime, own_bytes, own_files, own_dirs, scanned_at, size, last_modified "
+                                "FROM dirs WHERE id = ?", (root_id,)).fetchone()
+        paths = build_paths({row[0]: (row[1], row[2]) for row in rows}, root_id, root)  # 与调用方的路径写法一致
+        if root_row[0] is not None:
+            records[root] = root_row[:4] + (root_row[4] or 0,)
+        if root_row[5] is not None:
+            total = root_row[5:7]
+        for dir_id, parent_id, _name, mtime, own_bytes, own_files, own_dirs, scanned_at in rows:
+            if mtime is None:
+                continue  # 只作为上级目录存在的行
+            path = paths[dir_id]
+            records[path] = (mtime, own_bytes, own_files, own_dirs, scanned_at or 0)
+            children.setdefault(paths[parent_id], []).append(path)
+    except sqlite3.Error:
+        pass  # 表尚未创建等：按无缓存处理
+    finally:
+        conn.close()
+    return records, children, total
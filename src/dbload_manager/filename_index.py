@@ -0,0 +1,254 @@
+import os
+import re
+import sqlite3
+from utils.logging_config import get_logger
+
+logger = get_logger(__name__)
+
+INDEX_DIR = os.path.join("userdata", "db", "index")  # 文件名索引目录（每个卷一个数据库文件）
+MIN_TRIGRAM_CHARS = 3  # trigram 索引可用的最短查询长度（更短的查询退化为顺序扫描，匹配项通常很多，很快即可凑满上限）
+QUERY_PROGRESS_STEPS = 10000  # 查询每执行该数量的虚拟机指令检查一次是否已取消
+
+
+def index_path_for(root: str) -> str:
+    """卷根目录 -> 索引数据库路径（如 "C:\\" -> userdata/db/index/C.db，"/" -> root.db）"""
+    name = re.sub(r'[^0-9A-Za-z]+', '_', root).strip('_') or "root"
+    return os.path.join(INDEX_DIR, name + ".db")
+
+
+class FilenameIndex:
+    """
+    单个卷的文件名索引（SQLite FTS5 trigram，持久化保存，跨平台）
+    - dirs(id, path)：目录路径只存一次；files(id, dir_id, name, is_dir, size, mtime) 每个条目一行
+    - names：以 files.name 为外部内容的 FTS5 trigram 表，任意子串/前缀查询都走索引
+    - 索引由 IndexBuildThread 在后台写入临时文件，完成后整体替换（重建期间旧索引仍可查询）
+    - 之后由 TreeWatcher 按目录增量同步（sync_dir），监视范围内的变化无需重建
+    """
+    def __init__(self, root: str, db_path: str = None):
+        self.root = root
+        self.db_path = db_path or index_path_for(root)
+        self.conn = None
+
+    @staticmethod
+    def create_schema(conn: sqlite3.Connection):
+        """在新数据库中创建索引表（由构建线程调用）"""
+        conn.executescript("""
+            CREATE TABLE meta (key TEXT PRIMARY KEY, value TEXT);
+            CREATE TABLE dirs (id INTEGER PRIMARY KEY, path TEXT NOT NULL);
+            CREATE TABLE files (
+                id INTEGER PRIMARY KEY,
+                dir_id INTEGER NOT NULL,
+                name TEXT NOT NULL,
+                is_dir INTEGER NOT NULL,
+                size INTEGER NOT NULL,
+                mtime REAL NOT NULL
+            );
+            CREATE VIRTUAL TABLE names USING fts5(name, content='files', content_rowid='id',
+                                        tokenize='trigram', columnsize=0);
+        """)
+
+    def exists(self) -> bool:
+        return os.path.exists(self.db_path)
+
+    def open(self) -> bool:
+        """打开已有索引（不存在或无法读取时返回 False）"""
+        if self.conn is not None:
+            return True
+        if not self.exists():
+            return False
+        try:
+            self.conn = sqlite3.connect(self.db_path)
+            self.conn.execute("SELECT 1 FROM meta LIMIT 1")
+        except sqlite3.Error as e:
+            logger.error(f"无法打开文件名索引 {self.db_path}：{str(e)}")
+            self.close()
+            return False
+        return True
+
+    def close(self):
+        if self.conn is not None:
+            self.conn.close()
+            self.conn = None
+
+    def info(self) -> dict:
+        """索引信息（根目录、条目数、构建时间等），索引不可用时返回空字典"""
+        if not self.open():
+            return {}
+        return dict(self.conn.execute("SELECT key, value FROM meta"))
+
+    def search(self, text: str, limit: int = 1000, prefix: bool = False) -> list:
+        """
+        按文件名查询（不区分大小写）
+        :param text: 查询文本（子串；prefix 为 True 时匹配名称开头）
+        :param limit: 最多返回的结果数
+        :return: [(完整路径, 是否文件夹, 大小, 修改时间)]
+        """
+        if not text or not self.open():
+            return []
+        select = "SELECT d.path, f.name, f.is_dir, f.size, f.mtime FROM "
+        like = _escape_like(text) + "%" if prefix else "%" + _escape_like(text) + "%"
+        if len(text) >= MIN_TRIGRAM_CHARS:
+            # trigram 短语查询即子串查询（由索引筛选候选行）；前缀查询再按名称开头过滤候选
+            # （不直接对 FTS 表使用 LIKE：部分 SQLite 版本的 trigram LIKE 对非 ASCII 字符结果不正确）
+            sql = select + "names JOIN files f ON f.id = names.rowid JOIN dirs d ON d.id = f.dir_id WHERE names MATCH ?"
+            params = ['"' + text.replace('"', '""') + '"']
+            if prefix:
+                sql += " AND f.name LIKE ? ESCAPE '\\'"
+                params.append(like)
+        else:
+            sql = select + "files f JOIN dirs d ON d.id = f.dir_id WHERE f.name LIKE ? ESCAPE '\\'"
+            params = [like]
+        sql += " LIMIT ?"
+        params.append(limit)
+        try:
+            rows = self.conn.execute(sql, params).fetchall()
+        except sqlite3.Error as e:
+            logger.error(f"文件名索引查询失败：{str(e)}")
+            return []
+        return [(os.path.join(folder, name), bool(is_dir), size, mtime) for folder, name, is_dir, size, mtime in rows]
+
+    def search_query(self, query, limit: int = 1000, is_active=None) -> list:
+        """
+        按编译后的查询（utils.search_query.SearchQuery）查询
+        - 最长的字面子串交给 trigram 索引筛选候选；类型/大小/修改时间条件下推到 SQL
+        - 通配符、正则、扩展名等名称条件在 Python 中逐行检查，凑满 limit 即停止读取
+        :param is_active: 返回 False 时中断查询（由 SQLite 进度回调检查，顺序扫描大表时也能及时退出）
+        :return: [(完整路径, 是否文件夹, 大小, 修改时间)]
+        """
+        if not self.open():
+            return []
+        if is_active is not None:
+            self.conn.set_progress_handler(lambda: not is_active(), QUERY_PROGRESS_STEPS)
+        literal = max(query.literals, key=len, default="")
+        clauses, params = query.sql_filters("f")
+        select = "SELECT d.path, f.name, f.is_dir, f.size, f.mtime FROM "
+        if len(literal) >= MIN_TRIGRAM_CHARS:
+            sql = select + "names JOIN files f ON f.id = names.rowid JOIN dirs d ON d.id = f.dir_id"
+            clauses.insert(0, "names MATCH ?")
+            params.insert(0, '"' + literal.replace('"', '""') + '"')
+        else:
+            sql = select + "files f JOIN dirs d ON d.id = f.dir_id"
+        if clauses:
+            sql += " WHERE " + " AND ".join(clauses)
+        results = []
+        try:
+            for folder, name, is_dir, size, mtime in self.conn.execute(sql, params):
+                if query.matches_name(name):
+                    results.append((os.path.join(folder, name), bool(is_dir), size, mtime))
+                    if len(results) >= limit:
+                        break
+        except sqlite3.Error as e:
+            if is_active is None or is_active():  # 被取消时的中断不是错误
+                logger.error(f"文件名索引查询失败：{str(e)}")
+        finally:
+            if is_active is not None:
+                self.conn.set_progress_handler(None, 0)
+        return results
+
+    # ---------- 增量更新（由 TreeWatcher 的后台线程调用，调用方负责提交） ----------
+    def prepare_updates(self) -> bool:
+        """打开索引用于增量更新（首次更新时按目录路径与所属目录建立查找索引）"""
+        if not self.open():
+            return False
+        self.conn.executescript("""
+            CREATE INDEX IF NOT EXISTS dirs_path ON dirs(path);
+            CREATE INDEX IF NOT EXISTS files_dir ON files(dir_id);
+        """)
+        return True
+
+    def indexed_dir_mtime(self, path: str):
+        """索引中记录的目录修改时间（目录未被索引时返回 None）"""
+        parent, name = os.path.split(path)
+        row = self.conn.execute("SELECT f.mtime FROM dirs d JOIN files f ON f.dir_id = d.id "
+                                "WHERE d.path = ? AND f.name = ?", (parent, name)).fetchone()
+        return row[0] if row else None
+
+    def sync_dir(self, path: str, entries, mtime: float = None) -> list:
+        """
+        用目录的最新扫描结果更新索引
+        :param entries: [(名称, 是否文件夹, 大小, 修改时间)]，目录已不存在时为 None
+        :param mtime: 目录自身的修改时间（同步更新上级目录中该目录条目）
+        :return: 新增的子文件夹路径（由调用方继续扫描并同步）
+        """
+        if entries is None:
+            self.remove_tree(path)
+            return []
+        row = self.conn.execute("SELECT id FROM dirs WHERE path = ?", (path,)).fetchone()
+        if row is None:
+            dir_id, old = self.conn.execute("INSERT INTO dirs (path) VALUES (?)", (path,)).lastrowid, {}
+        else:
+            dir_id = row[0]
+            old = {name: (file_id, bool(is_dir), size, file_mtime) for file_id, name, is_dir, size, file_mtime in
+                   self.conn.execute("SELECT id, name, is_dir, size, mtime FROM files WHERE dir_id = ?", (dir_id,))}
+        added_dirs = []
+        delta = 0
+        for name, is_dir, size, file_mtime in entries:
+            previous = old.pop(name, None)
+            if previous is None:
+                file_id = self.conn.execute("INSERT INTO files (dir_id, name, is_dir, size, mtime) VALUES (?, ?, ?, ?, ?)",
+                                            (dir_id, name, is_dir, size, file_mtime)).lastrowid
+                self.conn.execute("INSERT INTO names (rowid, name) VALUES (?, ?)", (file_id, name))
+                delta += 1
+                if is_dir:
+                    added_dirs.append(os.path.join(path, name))
+            elif previous[1:] != (is_dir, size, file_mtime):
+                self.conn.execute("UPDATE files SET is_dir = ?, size = ?, mtime = ? WHERE id = ?",
+                                  (is_dir, size, file_mtime, previous[0]))
+                if previous[1] != is_dir:  # 同名的文件与文件夹互相替换
+                    if previous[1]:
+                        self.remove_tree(os.path.join(path, name))
+                    else:
+                        added_dirs.append(os.path.join(path, name))
+        for name, (file_id, was_dir, _size, _mtime) in old.items():
+            self._delete_files([(file_id, name)])
+            delta -= 1
+            if was_dir:
+                self.remove_tree(os.path.join(path, name))
+        if mtime is not None:
+            parent, name = os.path.split(path)
+            self.conn.execute("UPDATE files SET mtime = ? WHERE name = ? AND dir_id = (SELECT id FROM dirs WHERE path = ?)",
+                              (mtime, name, parent))
+        self._adjust_entries(delta)
+        return added_dirs
+
+    def remove_tree(self, path: str):
+        """删除目录 path 下（含自身）的所有目录记录及其中的条目（path 自身在上级目录中的条目不变）"""
+        prefix = path if path.endswith(os.sep) else path + os.sep
+        dir_ids = [dir_id for dir_id, in self.conn.execute(
+            "SELECT id FROM dirs WHERE path = ? OR (path >= ? AND path < ?)", (path, prefix, prefix + "\U0010ffff"))]
+        removed = 0
+        for dir_id in dir_ids:
+            rows = self.conn.execute("SELECT id, name FROM files WHERE dir_id = ?", (dir_id,)).fetchall()
+            self._delete_files(rows)
+            removed += len(rows)
+        self.conn.executemany("DELETE FROM dirs WHERE id = ?", [(dir_id,) for dir_id in dir_ids])
+        self._adjust_entries(-removed)
+
+    def _delete_files(self, rows: list):
+        """删除条目 [(id, 名称)]（外部内容 FTS 表须以原名称写入 delete 命令）"""
+        self.conn.executemany("INSERT INTO names (names, rowid, name) VALUES ('delete', ?, ?)", rows)
+        self.conn.executemany("DELETE FROM files WHERE id = ?", [(file_id,) for file_id, _name in rows])
+
+    def _adjust_entries(self, delta: int):
+        if delta:
+            self.conn.execute("UPDATE meta SET value = CAST(value AS INTEGER) + ? WHERE key = 'entries'", (delta,))
+
+    def commit(self):
+        self.conn.commit()
+
+    def replace_with(self, new_db_path: str) -> bool:
+        """
+        用构建完成的索引文件替换当前索引（先关闭连接，Windows 下其他连接仍打开的文件无法替换）
+        :return: 替换失败时返回 False（新索引文件保留，由调用方重试或删除）
+        """
+        self.close()
+        try:
+            os.replace(new_db_path, self.db_path)
+        except OSError as e:
+            logger.warning(f"无法替换文件名索引 {self.db_path}：{str(e)}")
+            return False
+        return True
+
+
+def _escape_like(text: str) -> str:
+    return text.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
@@ -1,11 +1,11 @@
-import os
 import time
-from PySide6.QtCore import QMimeData, Qt, QUrl, QPoint, QEvent, QObject
+from PySide6.QtCore import Qt, QPoint, QEvent, QObject
 from PySide6.QtGui import QDrag
-from PySide6.QtWidgets import QTreeWidget, QApplication
+from PySide6.QtWidgets import QAbstractItemView, QApplication
+from widgets.custom_tree_widget import FileListWidget
 
 class DragDropHandler(QObject):
-    def __init__(self, file_list: QTreeWidget, main_window):
+    def __init__(self, file_list: FileListWidget, main_window):
         super().__init__()  # 调用 QObject 父类构造函数
         self.file_list = file_list
         self.main_window = main_window
@@ -17,7 +17,7 @@ class DragDropHandler(QObject):
     def _init_drag(self):
         """初始化拖放配置（同时绑定鼠标和触摸事件）"""
         self.file_list.setDragEnabled(True)
-        self.file_list.setDragDropMode(QTreeWidget.DragOnly)
+        self.file_list.setDragDropMode(QAbstractItemView.DragOnly)
         # 安装事件过滤器（替代直接重写touchEvent）
         self.file_list.installEventFilter(self)
         # 重写鼠标事件
@@ -137,24 +137,15 @@ class DragDropHandler(QObject):
             self._trigger_drag()
 
     def _trigger_drag(self):
-        """统一拖放触发逻辑（复用原有代码）"""
+        """统一拖放触发逻辑（拖放数据由文件列表模型生成）"""
         selected_items = self.file_list.selectedItems()
         if not selected_items:
             return
 
-        file_paths = []
-        for item in selected_items:
-            file_name = item.text(0)
-            file_path = os.path.join(self.main_window.current_path, file_name)
-            if os.path.exists(file_path):
-                file_paths.append(file_path)
-
-        if not file_paths:
+        mime_data = self.file_list.model().mimeData(self.file_list.selectionModel().selectedRows())
+        if not mime_data.urls():
             return
 
-        mime_data = QMimeData()
-        mime_data.setUrls([QUrl.fromLocalFile(path) for path in file_paths])
-
         drag = QDrag(self.file_list)
         drag.setMimeData(mime_data)
         first_item = selected_items[0]
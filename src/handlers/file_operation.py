@@ -1,12 +1,12 @@
-from PySide6.QtWidgets import QTreeWidgetItem
 import os
+from widgets.file_table_model import FileListItem
 
 class FileOperationHandler:
     """独立处理打开操作的模块（解耦UI与业务逻辑）"""
     def __init__(self, main_window):
         self.main_window = main_window  # 主窗口引用（仅用于更新UI）
 
-    def open_selected_item(self, item: QTreeWidgetItem = None):
+    def open_selected_item(self, item: FileListItem = None):
         """统一处理文件/文件夹打开逻辑（支持传入指定列表项）"""
         # 若未传入item，取当前选中项
         if not item:
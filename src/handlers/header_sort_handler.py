@@ -1,6 +1,5 @@
 from PySide6.QtWidgets import QDialog, QVBoxLayout, QRadioButton, QPushButton, QHBoxLayout
 from PySide6.QtCore import Qt
-from utils.sort_utils import sort_file_list  # 新增：导入排序工具
 class HeaderSortHandler:
     def __init__(self, file_list_updater):
         self.fm = file_list_updater  # 关联文件列表更新器
@@ -93,21 +92,17 @@ class HeaderSortHandler:
         
 
     def _update_sorted_list(self):
-        """调用排序逻辑并刷新文件列表（增加数据校验）"""
+        """调用排序逻辑并在模型上重排文件列表（增加数据校验）"""
         try:
-            current_file_list = self.fm.file_list_data
-            # 校验数据是否存在（避免空列表或字段缺失）
-            if not current_file_list or self.current_sort_key not in current_file_list[0]:
+            model = self.fm.model
+            # 校验排序键与数据是否有效
+            if self.current_sort_key not in self.column_to_key.values() or model.rowCount() == 0:
                 raise ValueError(f"无效排序键：{self.current_sort_key} 或文件列表数据为空")
-            
-            sorted_list = sort_file_list(
-                current_file_list,
+            # 直接重排现有行（不重建列表项）
+            model.sort_rows(
                 sort_key=self.current_sort_key,
                 reverse=self.current_reverse
             )
-            # print(self.current_reverse)
-            self.fm._update_filelist_from_sorted(sorted_list)
-            # self.fm._update_filelist_from_thread(sorted_list)
         except Exception as e:
             # 错误提示（与工程现有错误处理风格一致）
             from handlers.m_event_handlers import show_error
@@ -128,4 +123,4 @@ class HeaderSortHandler:
         else:
             original_title = "未知列"  # 兜底处理越界情况
         # 仅使用原始标题 + 当前方向符号
-        self.fm.file_list.headerItem().setText(self.current_sort_column, f"{original_title}{direction}")
\ No newline at end of file
+        self.fm.model.setHeaderData(self.current_sort_column, Qt.Horizontal, f"{original_title}{direction}")
\ No newline at end of file
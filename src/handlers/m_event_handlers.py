@@ -81,7 +81,7 @@ def handle_new_folder(main_window):
     main_window.file_manager.create_new_folder(
         parent_widget=main_window,
         current_path=main_window.current_path,
-        update_callback=main_window.update_filelist,
+        update_callback=main_window.refresh_changes,
         error_callback=lambda title, msg: show_error(main_window, title, msg)
     )
 
@@ -152,7 +152,7 @@ def handle_delete_file(main_window):
         parent_widget=main_window,
         current_path=main_window.current_path,
         selected_items=main_window.file_list.selectedItems(),
-        update_callback=main_window.update_filelist,
+        update_callback=main_window.refresh_changes,
         error_callback=lambda title, msg: show_error(main_window, title, msg)
     )
 
@@ -1,11 +1,9 @@
-from PySide6.QtWidgets import QLineEdit, QHBoxLayout, QWidget, QPushButton, QDialog # 导入
-import os
-from time import sleep
-
-from ctypes import windll
-from PySide6.QtCore import QProcess, QTimer
-from PySide6.QtWidgets import QVBoxLayout, QWidget
-from PySide6.QtGui import QWindow
+from PySide6.QtWidgets import QLineEdit, QHBoxLayout, QWidget, QPushButton, QCompleter # 导入
+from PySide6.QtCore import QTimer, QStringListModel
+from widgets.search_dialog import IndexSearchDialog
+from widgets.content_index_dialog import ContentIndexDialog
+from utils.search_query import QueryError
+from utils.fuzzy_match import FuzzyMatcher, FuzzyIndex
 
 class SearchHandler:
     def __init__(self, main_window, file_list_updater):
@@ -14,17 +12,20 @@ class SearchHandler:
         self.search_input = None
         self.enter_pressed = False  # 标记是否通过回车触发搜索
         self.is_visible = False  # ：记录当前是否可见
+        self.search_dialog = None  # 高级搜索对话框（首次打开时创建，关闭后保留以便后台继续建立索引）
+        self.content_index_dialog = None  # 全文搜索对话框（同上，关闭后索引更新在后台继续）
+        # 输入即过滤：停止输入一段时间后才过滤，连续输入只触发一次
+        self.filter_timer = QTimer(main_window)
+        self.filter_timer.setSingleShot(True)
+        self.filter_timer.setInterval(main_window.config_manager.get("filter_debounce_ms", 150))
+        self.filter_timer.timeout.connect(self._apply_filter)
         self._init_ui()
 
     def _show_search_input(self):
         """切换显示/隐藏搜索输入框和工具栏"""
         if self.is_visible:
             # 再次按下时隐藏并清除过滤
-            self._hide_toolbar()
-            self.search_input.setVisible(False)
-            self.file_list_updater.clear_filter()  # ：清除文件过滤
-            self.is_visible = False
-            self.enter_pressed = False  # 重置标记
+            self._close_search()
             self.main_window.update_filelist()  # ：更新文件列表
         else:
             # 首次按下时显示
@@ -34,6 +35,16 @@ class SearchHandler:
             self.is_visible = True
             self.main_window.statusBar().showMessage("简单搜索模式:")
 
+    def _close_search(self):
+        """隐藏搜索框并清除过滤"""
+        self._hide_toolbar()
+        self.search_input.setVisible(False)
+        self.filter_timer.stop()  # 丢弃尚未执行的输入过滤
+        self.history_completer.popup().hide()
+        self.file_list_updater.clear_filter()  # ：清除文件过滤
+        self.is_visible = False
+        self.enter_pressed = False  # 重置标记
+
     def _hide_toolbar(self):
         """隐藏工具栏（搜索完成或失去焦点时触发）"""
         self.main_window.toolbar.setVisible(False)  # 隐藏工具栏
@@ -47,100 +58,105 @@ class SearchHandler:
         
         # 搜索输入框
         self.search_input = QLineEdit()
-        self.search_input.setPlaceholderText("搜索文件...")
+        self.search_input.setPlaceholderText("搜索文件...（支持 ext:log size:>100MB modified:<7d type:video）")
         self.search_input.returnPressed.connect(self._on_search)
+        self.search_input.textChanged.connect(lambda _text: self.filter_timer.start())  # 重新计时
         layout.addWidget(self.search_input)
+
+        # 模糊匹配开关：按子序列匹配并按得分排序，同时在下拉列表中匹配历史目录
+        self.fuzzy_btn = QPushButton("模糊")
+        self.fuzzy_btn.setCheckable(True)
+        self.fuzzy_btn.setChecked(self.main_window.config_manager.get("fuzzy_search", False))
+        self.fuzzy_btn.setToolTip("按子序列模糊匹配（如 qrfv3 匹配 quarterly_report_final_v3.xlsx），结果按匹配程度排序")
+        self.fuzzy_btn.toggled.connect(self._on_fuzzy_toggled)
+        layout.addWidget(self.fuzzy_btn)
+        # 历史目录下拉列表（不设为输入框的补全器，选中项不会改写输入框内容）
+        self.history_model = QStringListModel(search_container)
+        self.history_completer = QCompleter(self.history_model, search_container)
+        self.history_completer.setWidget(self.search_input)
+        self.history_completer.setCompletionMode(QCompleter.UnfilteredPopupCompletion)  # 已按得分排序，不再过滤
+        self.history_completer.activated[str].connect(self._open_history_path)
         
         # ：高级搜索按钮
         self.advanced_btn = QPushButton("高级搜索")
         self.advanced_btn.clicked.connect(self._open_advanced_search)  # 绑定点击事件
         layout.addWidget(self.advanced_btn)  # 添加到工具栏
+
+        # 全文搜索按钮：查询持久化内容索引（需先添加要索引的文件夹）
+        self.content_index_btn = QPushButton("全文搜索")
+        self.content_index_btn.clicked.connect(self._open_content_index)
+        layout.addWidget(self.content_index_btn)
         
         self.main_window.toolbar.addWidget(search_container)
         self.main_window.toolbar.setVisible(False)  # 初始化隐藏
 
     def _on_search(self):
-        """执行搜索逻辑（调用文件列表更新器过滤）"""
+        """执行搜索逻辑（回车立即过滤，不等待输入计时）"""
         self.enter_pressed = True  # 标记为通过回车触发
+        self._apply_filter()
+
+    def _apply_filter(self):
+        """按输入框内容过滤当前文件列表（调用文件列表更新器过滤）"""
+        self.filter_timer.stop()
         keyword = self.search_input.text().strip()
-        match_count = self.file_list_updater.filter_files(keyword)  # 获取匹配数量
+        fuzzy = self.fuzzy_btn.isChecked()
+        try:
+            match_count = self.file_list_updater.filter_files(keyword, fuzzy=fuzzy)  # 获取匹配数量
+        except QueryError as e:  # 条件尚未输入完整或有误：保留当前过滤结果
+            self.main_window.statusBar().showMessage(str(e), 3000)
+            return
+        self._update_history_matches(keyword if fuzzy else "")
         
         # ：无结果时显示提示
         if match_count == 0:
             self.main_window.statusBar().showMessage("未找到匹配文件", 3000)  # 状态栏显示3秒
+        elif fuzzy and keyword:
+            shown = self.main_window.file_list.model().rowCount()
+            self.main_window.statusBar().showMessage(f"模糊匹配：共 {match_count} 个，按匹配程度显示前 {shown} 个")
+
+    def _on_fuzzy_toggled(self, _checked: bool):
+        if self.search_input.text().strip():
+            self._apply_filter()
+
+    def _update_history_matches(self, keyword: str):
+        """模糊匹配历史目录，得分最高的几个显示在输入框下方的下拉列表中"""
+        paths = self.main_window.navigation_history.visited_paths() if keyword else []
+        matcher = FuzzyMatcher(keyword)
+        top, _matches = FuzzyIndex(paths).top_k(matcher, self.main_window.config_manager.get("fuzzy_history_limit", 8))
+        self.history_model.setStringList([paths[index] for _score, index in top])
+        if top and self.search_input.hasFocus():
+            self.history_completer.complete()
+        else:
+            self.history_completer.popup().hide()
 
-    def _open_advanced_search(self):
-        """打开高级搜索界面"""
-        dialog = AdvancedSearchDialog(self.main_window)
-        dialog.exec()
-
-# ：高级搜索对话框类
-class AdvancedSearchDialog(QDialog):
-    def __init__(self, parent=None):
-        super().__init__(parent)
-        self.setWindowTitle("Everything 搜索")
-        # 移除固定尺寸设置（改为动态调整）
-        # self.setFixedSize(800, 600)  # 原固定尺寸，需删除
-        self.everything_process = None
-        self.everything_window = None
-        self.everything_exe_path = os.path.join(
-            os.path.dirname(os.path.abspath(__file__)),
-            "../toolbox/Everythingsearch/Everything.exe"
-        )
-        self._init_ui()
-        self._start_everything()
-
-    def _embed_everything_window(self):
-        """获取 Everything 窗口句柄并嵌入到对话框（修改后）"""
-        hwnd = windll.user32.FindWindowW(None, "Everything")
-        if not hwnd:
-            sleep(2)
-            hwnd = windll.user32.FindWindowW(None, "Everything")
-
-        if not hwnd:
-            print(self, "错误", "未找到 Everything 窗口，请确认已安装！")
-            return
-         # 获取原窗口样式（避免覆盖工具栏相关样式）
-        original_style = windll.user32.GetWindowLongPtrW(hwnd, -16)  # GWL_STYLE = -16
-        # 设置父窗口为当前对话框的窗口句柄（确保嵌入到 Qt 界面中）
-        windll.user32.SetParent(hwnd, int(self.winId()))
-        # 恢复原窗口样式（保留工具栏等原生元素）
-        windll.user32.SetWindowLongPtrW(hwnd, -16, original_style)
-
-        window = QWindow.fromWinId(hwnd)
-        if not window:
-            print(self, "错误", "无法嵌入 Everything 窗口！")
-            return
-
-        # 获取 Everything 窗口的实际尺寸
-        everything_size = window.size()
-        # 调整对话框大小为 Everything 窗口尺寸（+ 可能的边框补偿，根据实际情况调整）
-        self.resize(everything_size.width()+20, everything_size.height()+40)
-
-        container = QWidget.createWindowContainer(window, self)
-        self.layout.addWidget(container)
-        self.everything_window = window
-
-    def _init_ui(self):
-        self.layout = QVBoxLayout(self)
+    def _open_history_path(self, path: str):
+        """打开下拉列表中选中的历史目录（关闭搜索框）"""
+        self._close_search()
+        self.main_window.current_path = path
+        self.main_window.address_bar.setText(path)
+        self.main_window.right_stack.setCurrentWidget(self.main_window.file_list)
+        self.main_window.update_filelist()
 
-    def _start_everything(self):
-        """启动 Everything 并嵌入其窗口（修改后）"""
-        # 校验路径是否存在
-        if not os.path.exists(self.everything_exe_path):
-            print(self.everything_exe_path)
-            print(self, "错误", "项目内未找到 Everything.exe，请检查 toolbox/Everythingsearch 目录！")
-            return
-        i=0
-        self.everything_process = QProcess(self)
-        self.everything_process.start(self.everything_exe_path)  # 使用项目内的绝对路径启动
-        QTimer.singleShot(1000, self._embed_everything_window)
-
-    def closeEvent(self, event):
-        """关闭对话框时终止 Everything 进程（修复后）"""
-        if self.everything_process and self.everything_process.state() == QProcess.Running:
-            self.everything_process.terminate()  # 发送终止信号
-            # 等待最多2秒，确保进程完全退出
-            if not self.everything_process.waitForFinished(2000):
-                self.everything_process.kill()  # 强制终止（如果等待超时）
-        super().closeEvent(event)
\ No newline at end of file
+    def _open_advanced_search(self):
+        """打开高级搜索界面（非模态，可同时浏览主窗口）"""
+        if self.search_dialog is None:
+            self.search_dialog = IndexSearchDialog(self.main_window)
+        self.search_dialog.show()
+        self.search_dialog.raise_()
+        self.search_dialog.activateWindow()
+
+    def _open_content_index(self):
+        """打开全文搜索界面（非模态），以搜索框中的内容作为查询"""
+        if self.content_index_dialog is None:
+            self.content_index_dialog = ContentIndexDialog(self.main_window)
+        self.content_index_dialog.set_query(self.search_input.text().strip())
+        self.content_index_dialog.show()
+        self.content_index_dialog.raise_()
+        self.content_index_dialog.activateWindow()
+
+    def shutdown(self):
+        """程序退出时停止后台索引构建与内容索引更新"""
+        if self.search_dialog is not None:
+            self.search_dialog.shutdown()
+        if self.content_index_dialog is not None:
+            self.content_index_dialog.shutdown()
@@ -1,13 +1,15 @@
 import sys
-from PySide6.QtWidgets import QApplication
-from main_window2 import FileManager
-from utils.config_manager import ConfigManager  # 导入
 
 if __name__ == "__main__":
+    # 导入与初始化都放在此处：内容搜索的 spawn 工作进程会以 __mp_main__ 重新执行本文件，不应加载 Qt 与主窗口
+    from PySide6.QtWidgets import QApplication
+    from main_window2 import FileManager
+    from utils.config_manager import ConfigManager  # 导入
+
     # 初始化配置管理器（自动加载配置）
     config_manager = ConfigManager("userdata/config/setting1.json")  # 创建 ConfigManager 实例
     app = QApplication(sys.argv)
     # 传递 ConfigManager 实例给 FileManager
     window = FileManager("media/background.png", config_manager)
     window.show()
-    sys.exit(app.exec())
\ No newline at end of file
+    sys.exit(app.exec())
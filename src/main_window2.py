@@ -1,10 +1,11 @@
 import sys
 import os
 from PySide6.QtCore import Qt
-from PySide6.QtWidgets import QApplication, QMainWindow, QTreeWidgetItem
+from PySide6.QtWidgets import QApplication, QMainWindow
 if True:
     #导入
     from threads.folder_size import FolderSizeManager
+    from threads.db_writer import DatabaseWriter
     from utils.keyboard_registry2 import register_app_shortcuts,default_shortcuts
     from widgets.file_list_updater import FileListUpdater
     from widgets.ui_setup import setup_ui 
@@ -21,6 +22,10 @@ if True:
     from handlers.help_dialog_handler import HelpDialogHandler
     from handlers.file_operation import FileOperationHandler
     from handlers.search_handler import SearchHandler
+    from utils.listing_cache import ListingCache, DEFAULT_MAX_ENTRIES
+    from utils.navigation_history import NavigationHistory
+    from utils.sort_utils import configure_name_sort
+    from threads.tree_watcher import TreeWatcher
     # 配置读取逻辑为：
     config_manager = ConfigManager("userdata/config/setting1.json")
     config = config_manager.config
@@ -45,6 +50,24 @@ class FileManager(QMainWindow):
         # ：初始化 SQLite 数据库
         db_path = "userdata\\db\\folder_size.db"  # 数据库文件路径（可从 config 配置）
         self.db=DatabaseManager(db_path)
+        # 缓存写入由后台线程按批提交（GUI 线程不等待磁盘同步）
+        self.db_writer = DatabaseWriter(
+            db_path,
+            batch_rows=self.config_manager.get("db_write_batch_rows", 500),
+            flush_ms=self.config_manager.get("db_write_flush_ms", 1000)
+        )
+        self.db_writer.start()
+        # 名称排序：自然排序（file2 < file10）+ 区域排序规则（默认系统区域，中文按拼音等），须在首次扫描前设置
+        configure_name_sort(
+            natural=self.config_manager.get("natural_sort", True),
+            collation_locale=self.config_manager.get("name_collation_locale", "")
+        )
+        # 目录扫描缓存与后退/前进历史
+        self.listing_cache = ListingCache(
+            max_dirs=self.config_manager.get("listing_cache_size", 64),
+            max_entries=self.config_manager.get("listing_cache_max_entries", DEFAULT_MAX_ENTRIES)
+        )
+        self.navigation_history = NavigationHistory()
         
         # 初始化键盘处理器
         self.keyboard_handler = KeyboardHandler(self)
@@ -55,8 +78,23 @@ class FileManager(QMainWindow):
         self.update_filelist()  # 初始加载文件列表
         self.bg_manager = BackgroundManager(self.bg_label, self.image_path)
         self.bg_manager.load_background()
-        self.folder_size_manager = FolderSizeManager(self)
+        self.folder_size_manager = FolderSizeManager(
+            self,
+            max_workers=self.config_manager.get("folder_size_workers"),
+            cache_path=self.db.db_path,
+            revalidate_s=self.config_manager.get("folder_size_revalidate_s", 10),
+            cache_max_age_s=self.config_manager.get("folder_size_cache_max_age_s", 3600)
+        )
         self.folder_size_manager.size_updated.connect(self.update_folder_size)
+        # 目录树监视：配置的根目录下有变化时增量更新文件名索引，并使受影响的文件夹大小缓存失效
+        self.tree_watcher = TreeWatcher(
+            self,
+            max_watches=self.config_manager.get("watch_max_dirs", 0),  # 0：按内核上限自动确定
+            batch_ms=self.config_manager.get("watch_batch_ms", 1000),
+            poll_interval_s=self.config_manager.get("watch_poll_interval_s", 30)
+        )
+        self.tree_watcher.dirs_changed.connect(self.on_tree_changed)
+        self.tree_watcher.start(self.config_manager.get("watch_roots", []))
         # 初始化文件管理器
         self.file_manager = FileManager2()
         self.file_manager3 = FileManager3(self)
@@ -110,10 +148,15 @@ class FileManager(QMainWindow):
     def closeEvent(self, event):
         """窗口关闭时清理所有未完成的线程"""
         self.folder_size_manager.stop_all_threads()
+        self.tree_watcher.stop()
+        self.db_writer.stop()  # 写入尚未提交的缓存
         self.db.close()
-        # 新增：终止文件列表加载线程
+        # 新增：取消文件列表加载与预取任务，等待扫描线程池空闲
+        self.file_list_updater.prefetcher.cancel()
         if hasattr(self.file_list_updater, 'file_list_loader'):
-            self.file_list_updater.file_list_loader.stop_all()
+            self.file_list_updater.file_list_loader.shutdown()
+        self.file_list_updater.dir_watcher.stop()
+        self.search_handler.shutdown()  # 停止后台索引构建
         super().closeEvent(event)
 
     def update_filelist(self):
@@ -121,11 +164,39 @@ class FileManager(QMainWindow):
         if self.current_path == '此电脑':
             return
         self.file_list_updater.update_filelist()
+    def refresh_changes(self):
+        """文件操作后的增量刷新：立即对比当前目录并只更新变化的行"""
+        if self.current_path == '此电脑':
+            return
+        self.file_list_updater.dir_watcher.schedule_refresh(0)
+
+    def refresh_filelist(self):
+        """强制刷新：丢弃当前目录的缓存后重新扫描（F5）"""
+        if self.current_path == '此电脑':
+            return
+        self.listing_cache.invalidate(self.current_path)
+        self.file_list_updater.update_filelist(rescan_sizes=True)  # 文件夹大小也完整重新扫描（不使用分层缓存）
+
     # ：处理文件夹大小更新的槽函数
-    def update_folder_size(self, item: QTreeWidgetItem, size: str):
-        """更新文件列表项的大小显示"""
-        if item is not None:
-            item.setText(1, size)  # 第2列（索引1）显示大小
+    def update_folder_size(self, path: str, size: str, size_bytes: int):
+        """更新文件列表中对应文件夹的大小（已离开该目录时忽略；按大小排序时该行移动到排序位置）"""
+        self.file_list.model().set_folder_size(path, size, size_bytes)
+
+    def on_tree_changed(self, changed_dirs: list):
+        """监视的目录树有变化：使这些目录及上级目录的大小缓存与目录缓存失效，并刷新当前列表中受影响的文件夹大小"""
+        self.folder_size_manager.invalidate(changed_dirs)
+        self.db_writer.invalidate_paths(changed_dirs)  # 与缓存写入同一队列，按顺序提交
+        for path in changed_dirs:
+            self.listing_cache.invalidate(path)
+        self.file_list_updater.refresh_folder_sizes(changed_dirs)
+
+    def reveal_path(self, path: str):
+        """打开 path 所在目录并选中该条目（搜索结果跳转）"""
+        folder, name = os.path.split(os.path.normpath(path))
+        self.current_path = folder
+        self.address_bar.setText(folder)
+        self.right_stack.setCurrentWidget(self.file_list)
+        self.file_list_updater.update_filelist(reveal_name=name)
 
     def navigate_parent_dir(self):
         """返回上级目录（原按键处理逻辑）"""
@@ -137,6 +208,26 @@ class FileManager(QMainWindow):
             self.address_bar.setText(self.current_path)
             self.update_filelist()
         
+    def navigate_back(self):
+        """后退到上一个目录（恢复其滚动位置与选中项）"""
+        state = self.navigation_history.back(self.file_list_updater.capture_view_state())
+        if state:
+            self._restore_history_state(state)
+
+    def navigate_forward(self):
+        """前进到下一个目录（恢复其滚动位置与选中项）"""
+        state = self.navigation_history.forward(self.file_list_updater.capture_view_state())
+        if state:
+            self._restore_history_state(state)
+
+    def _restore_history_state(self, state: dict):
+        """切换到历史记录中的目录（不产生新的历史记录）"""
+        self.current_path = state["path"]
+        self.address_bar.setText(self.current_path)
+        self.right_stack.setCurrentWidget(self.file_list)
+        self.file_list_updater.update_filelist(restore_state=state)
+        self.last_updated_path = self.current_path
+
     # 新增：切换快捷键帮助对话框的显示/隐藏
     def toggle_shortcut_help_dialog(self):
         self.help_dialog_handler.toggle_dialog()
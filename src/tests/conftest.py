@@ -0,0 +1,6 @@
+import os
+import sys
+
+# 模块按 src 目录下的顶层包导入（与 main.pyw 的运行方式一致）
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
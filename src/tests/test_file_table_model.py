@@ -0,0 +1,61 @@
+import pytest
+from PySide6.QtWidgets import QApplication, QTableView
+from PySide6.QtCore import QItemSelectionModel
+from utils.file_record import FileRecord
+from utils.search_query import compile_query
+from widgets.file_table_model import FileTableModel
+
+NAMES = ["alpha.txt", "beta.txt", "alpine.log", "gamma.txt", "alps"]
+
+
+@pytest.fixture()
+def view():
+    app = QApplication.instance() or QApplication([])
+    model = FileTableModel()
+    model.append_entries([FileRecord(name, False, 10, 0.0, False, "." + name.rsplit(".", 1)[-1]) for name in NAMES])
+    model.sort_rows("name")
+    view = QTableView()
+    view.setModel(model)
+    yield view
+    view.deleteLater()
+    app.processEvents()
+
+
+def _select(view, name):
+    model = view.model()
+    index = model.index(model.row_of_name(name), 0)
+    view.selectionModel().setCurrentIndex(index, QItemSelectionModel.SelectionFlag.ClearAndSelect |
+                                          QItemSelectionModel.SelectionFlag.Rows)
+
+
+def _selected_names(view):
+    model = view.model()
+    return sorted({model.item(index.row()).text(0) for index in view.selectionModel().selectedRows()})
+
+
+def _current_name(view):
+    index = view.selectionModel().currentIndex()
+    return view.model().item(index.row()).text(0) if index.isValid() else None
+
+
+def test_filter_keeps_visible_selection(view):
+    _select(view, "alpine.log")
+    model = view.model()
+    assert model.set_filter("a") == 5
+    assert model.set_filter("al") == 3
+    assert model.set_filter("alp") == 3
+    assert _selected_names(view) == ["alpine.log"]
+    assert _current_name(view) == "alpine.log"
+    model.set_query_filter(compile_query("ext:log"))
+    assert _current_name(view) == "alpine.log"
+    model.clear_filter()
+    assert _selected_names(view) == ["alpine.log"]
+    assert model.rowCount() == len(NAMES)
+
+
+def test_filtered_out_selection_is_dropped(view):
+    _select(view, "beta.txt")
+    model = view.model()
+    model.set_filter("alp")
+    assert _selected_names(view) == []
+    assert model.rowCount() == 3
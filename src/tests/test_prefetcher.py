@@ -0,0 +1,65 @@
+import os
+import time
+import pytest
+from PySide6.QtCore import QCoreApplication, QThreadPool
+from threads.prefetcher import DirectoryPrefetcher
+from utils.listing_cache import ListingCache
+
+
+@pytest.fixture(scope="module")
+def app():
+    return QCoreApplication.instance() or QCoreApplication([])
+
+
+def _wait_idle(app, prefetcher, pool, timeout=5.0):
+    deadline = time.monotonic() + timeout
+    while (prefetcher._tasks or prefetcher._queue) and time.monotonic() < deadline:
+        pool.waitForDone(50)
+        app.processEvents()
+
+
+def _prefetch(app, path):
+    cache = ListingCache()
+    pool = QThreadPool()
+    prefetcher = DirectoryPrefetcher(cache, pool)
+    prefetcher.prefetch([path], show_hidden=False)
+    _wait_idle(app, prefetcher, pool)
+    return cache
+
+
+def test_prefetch_caches_listing(app, tmp_path):
+    (tmp_path / "a.txt").write_text("x")
+    cache = _prefetch(app, str(tmp_path))
+    _mtime, file_list = cache.get(str(tmp_path), False)
+    assert [record.name for record in file_list] == ["a.txt"]
+
+
+@pytest.mark.skipif(os.name == "nt" or os.geteuid() == 0, reason="需要 POSIX 权限位生效（非 root）")
+def test_prefetch_of_unreadable_dir_is_not_cached(app, tmp_path):
+    locked = tmp_path / "locked"
+    locked.mkdir()
+    (locked / "a.txt").write_text("x")
+    locked.chmod(0)
+    try:
+        cache = _prefetch(app, str(locked))
+    finally:
+        locked.chmod(0o755)
+    assert not cache.contains(str(locked), False)
+
+
+@pytest.mark.parametrize("error", [PermissionError, OSError])
+def test_prefetch_interrupted_by_error_is_not_cached(app, tmp_path, monkeypatch, error):
+    """扫描中途出错（已产出部分记录）时不缓存不完整的列表"""
+    import threads.file_list_loader as loader
+    (tmp_path / "a.txt").write_text("x")
+    (tmp_path / "b.txt").write_text("x")
+    real_scan = loader.scan_directory_records
+
+    def failing_scan(path, show_hidden, is_running=None):
+        for record in real_scan(path, show_hidden, is_running):
+            yield record
+            raise error("模拟扫描错误")
+
+    monkeypatch.setattr(loader, "scan_directory_records", failing_scan)
+    cache = _prefetch(app, str(tmp_path))
+    assert not cache.contains(str(tmp_path), False)
@@ -0,0 +1,21 @@
+import pytest
+from utils.search_query import compile_query, QueryError
+
+
+@pytest.mark.parametrize("text", ["size:..", "modified:..", "-size:..", "-modified:.."])
+def test_range_without_bounds_is_query_error(text):
+    with pytest.raises(QueryError):
+        compile_query(text)
+
+
+@pytest.mark.parametrize("text", ["size:..1GB", "size:1MB..", "modified:..7d"])
+def test_open_range_compiles(text):
+    query = compile_query(text)
+    clauses, _params = query.sql_filters("f")
+    assert clauses
+    query.matches_record("a.txt", False, 1024, 0.0)
+
+
+def test_negated_range_excludes_whole_interval():
+    query = compile_query("-size:1KB..1MB")
+    assert [query.matches_record("a", False, size, 0.0) for size in (10, 4096, 10 ** 9)] == [True, False, True]
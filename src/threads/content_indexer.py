@@ -0,0 +1,140 @@
+import os
+import time
+import sqlite3
+from PySide6.QtCore import QThread, Signal
+from dbload_manager.content_index import ContentIndex
+from utils.file_utils import EXT_TO_TYPE
+from utils.logging_config import get_logger
+
+logger = get_logger(__name__)
+
+COMMIT_INTERVAL = 1.0  # 提交间隔（秒）：中途停止或退出后已提交的文件不会重新读取
+PROGRESS_INTERVAL = 0.2
+SNIFF_BYTES = 8192  # 文件开头含 NUL 字节视为二进制文件，不索引
+
+
+class ContentIndexThread(QThread):
+    """
+    后台增量更新内容索引（只索引 content_index_types 中的文本类文件）
+    - (路径, 大小, 修改时间) 未变化的文件直接跳过；新增/变化的文件读取文本后写入，已删除的文件移出索引
+    - 限速：读取速度超过 max_bytes_per_second 时暂停；线程以最低优先级运行
+    - 可随时停止：已提交的部分保留，下次更新从未变化的文件处快速跳过（相当于断点续建）
+    """
+    progress = Signal(int, int, str)  # (已写入文件数, 未变化跳过的文件数, 当前目录)
+    index_finished = Signal(int, int, int, float, bool)  # (写入数, 未变化数, 移除数, 耗时秒, 是否被停止)
+    error_occurred = Signal(str)
+
+    def __init__(self, db_path: str, types: list, max_file_bytes: int, max_bytes_per_second: int, parent=None):
+        super().__init__(parent)
+        self.db_path = db_path
+        self.extensions = {ext for ext, file_type in EXT_TO_TYPE.items() if file_type in types}
+        self.max_file_bytes = max_file_bytes
+        self.max_bytes_per_second = max_bytes_per_second
+        self._is_running = True
+        self.indexed = self.unchanged = self.removed = 0
+
+    def stop(self):
+        self._is_running = False
+
+    def run(self):
+        start = time.perf_counter()
+        index = ContentIndex(self.db_path)
+        if not index.open():
+            self.error_occurred.emit("无法打开内容索引")
+            return
+        try:
+            for root in index.roots():
+                if not self._is_running:
+                    break
+                self._update_root(index, root)
+            index.commit()
+        except sqlite3.Error as e:
+            logger.error(f"更新内容索引失败：{str(e)}")
+            self.error_occurred.emit(f"更新内容索引失败：{str(e)}")
+        finally:
+            index.close()
+        self.index_finished.emit(self.indexed, self.unchanged, self.removed,
+                                 time.perf_counter() - start, not self._is_running)
+
+    def _update_root(self, index: ContentIndex, root: str):
+        known = index.docs_under(root)  # {路径: (id, 大小, 修改时间)}
+        seen = set()
+        throttle_start = time.monotonic()
+        throttle_bytes = 0
+        last_commit = last_progress = time.monotonic()
+        stack = [root]
+        while stack and self._is_running:
+            folder = stack.pop()
+            try:
+                with os.scandir(folder) as entries:
+                    entries = list(entries)
+            except OSError:
+                continue
+            for entry in entries:
+                if not self._is_running:
+                    return  # 未遍历完整：不删除未见到的文件
+                try:
+                    if entry.is_dir(follow_symlinks=False):
+                        stack.append(entry.path)
+                        continue
+                    if os.path.splitext(entry.name)[1].lower() not in self.extensions:
+                        continue
+                    st = entry.stat(follow_symlinks=False)
+                except OSError:
+                    continue
+                path = entry.path
+                seen.add(path)
+                doc = known.get(path)
+                if doc is not None and doc[1] == st.st_size and doc[2] == st.st_mtime:
+                    self.unchanged += 1
+                    continue
+                body = self._read_text(path, st.st_size)
+                if body is None:  # 二进制/过大/无法读取：不索引（已索引的旧内容移除）
+                    if doc is not None:
+                        index.delete_docs([doc[0]])
+                        self.removed += 1
+                    continue
+                index.upsert_doc(path, st.st_size, st.st_mtime, body, doc[0] if doc else None)
+                self.indexed += 1
+                throttle_bytes += st.st_size
+                throttle_start, throttle_bytes = self._throttle(throttle_start, throttle_bytes)
+                now = time.monotonic()
+                if now - last_commit >= COMMIT_INTERVAL:
+                    index.commit()
+                    last_commit = now
+            now = time.monotonic()
+            if now - last_progress >= PROGRESS_INTERVAL:
+                self.progress.emit(self.indexed, self.unchanged, folder)
+                last_progress = now
+        if self._is_running:
+            removed = [doc[0] for path, doc in known.items() if path not in seen]
+            index.delete_docs(removed)
+            self.removed += len(removed)
+
+    def _throttle(self, window_start: float, window_bytes: int) -> tuple:
+        """读取速度超过上限时暂停，返回新的计量窗口 (起点, 字节数)"""
+        if not self.max_bytes_per_second:
+            return window_start, window_bytes
+        expected = window_bytes / self.max_bytes_per_second
+        elapsed = time.monotonic() - window_start
+        if expected > elapsed:
+            self.msleep(int((expected - elapsed) * 1000))
+        if elapsed >= 1.0:
+            return time.monotonic(), 0
+        return window_start, window_bytes
+
+    def _read_text(self, path: str, size: int):
+        """读取文本（UTF-8，失败时按 GBK），二进制文件、超过大小上限或无法读取时返回 None"""
+        if size > self.max_file_bytes:
+            return None
+        try:
+            with open(path, "rb") as f:
+                data = f.read(self.max_file_bytes)
+        except OSError:
+            return None
+        if b"\0" in data[:SNIFF_BYTES]:
+            return None
+        try:
+            return data.decode("utf-8")
+        except UnicodeDecodeError:
+            return data.decode("gbk", errors="replace")
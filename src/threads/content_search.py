@@ -0,0 +1,260 @@
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor, FIRST_COMPLETED, wait
+from concurrent.futures.process import BrokenProcessPool
+from multiprocessing import get_context
+from PySide6.QtCore import QObject, QThread, Signal
+from utils.content_grep import compile_pattern, scan_pieces, CHUNK_SIZE, STATUS_OK, STATUS_BINARY
+from utils.file_utils import EXT_TO_TYPE
+from utils.logging_config import get_logger
+
+logger = get_logger(__name__)
+
+# 按扩展名直接跳过的文件（无需打开检查）
+SKIP_TYPES = {"image", "video", "music", "archive", "pdf", "shortcut", "document", "spreadsheet"}
+SKIP_EXTENSIONS = {".exe", ".msi", ".dll", ".so", ".dylib", ".o", ".obj", ".pyc", ".class", ".iso", ".bin", ".db"}
+SKIP_DIRS = {".git", ".svn", ".hg"}  # 版本库元数据目录
+BATCH_BYTES = 4 * 1024 * 1024  # 小文件合并为一个任务，直到总大小或文件数达到上限（减少进程间通信次数）
+BATCH_FILES = 256
+MAX_HITS_PER_FILE = 100  # 每个文件（分块）最多报告的命中行数
+IN_FLIGHT_PER_WORKER = 4  # 每个工作进程最多排队的任务数（遍历不会远远领先于扫描）
+PROGRESS_INTERVAL = 0.2  # 进度与命中结果的发送间隔（秒）
+
+
+def _skip_by_extension(name: str) -> bool:
+    ext = os.path.splitext(name)[1].lower()
+    return ext in SKIP_EXTENSIONS or EXT_TO_TYPE.get(ext) in SKIP_TYPES
+
+
+class _ContentSearchThread(QThread):
+    """
+    单次内容搜索：遍历目录树并把文件（小文件成批、大文件分块）提交到进程池，汇总命中行
+    - 在途任务数有上限，取消后不再提交，尚未开始的任务直接取消，正在扫描的分块结果丢弃
+    - 已提交的文件总大小超过字节预算时停止遍历
+    """
+    hits_found = Signal(int, list)  # (代号, [(路径, 行号, 预览)])
+    progress = Signal(int, int, int, float)  # (代号, 已扫描文件数, 已扫描字节数, 已用秒数)
+    search_finished = Signal(int, int, int, int, float, bool, bool)  # (代号, 文件数, 字节数, 命中数, 耗时, 是否取消, 是否超出预算)
+    error_occurred = Signal(int, str)
+
+    def __init__(self, executor, workers: int, generation: int, root: str, text: str, use_regex: bool,
+                 case_sensitive: bool, file_query, max_hits: int, byte_budget: int, parent=None):
+        super().__init__(parent)
+        self.executor = executor
+        self.generation = generation
+        self.root = root
+        self.args = (text, use_regex, case_sensitive, MAX_HITS_PER_FILE)
+        self.file_query = file_query  # 文件条件（SearchQuery，如 ext:py），为 None 时搜索所有文本文件
+        self.max_hits = max_hits
+        self.byte_budget = byte_budget
+        self.max_in_flight = workers * IN_FLIGHT_PER_WORKER
+        self._is_running = True
+        self.scheduled_bytes = 0
+        self.budget_exhausted = False
+        self.files = 0
+        self.bytes = 0
+        self.hits = 0
+        self._chunked = {}  # {路径: [分块数, {起始偏移: 结果}]}（全部分块返回后才能换算行号）
+
+    def stop(self):
+        self._is_running = False
+
+    def run(self):
+        start = time.perf_counter()
+        futures = set()
+        tasks = self._tasks()
+        batch = []
+        last_emit = 0.0
+        try:
+            while self._is_running:
+                for pieces in tasks:
+                    futures.add(self.executor.submit(scan_pieces, pieces, *self.args))
+                    if len(futures) >= self.max_in_flight or not self._is_running:
+                        break
+                if not futures:
+                    break
+                done, futures = wait(futures, timeout=PROGRESS_INTERVAL, return_when=FIRST_COMPLETED)
+                for future in done:
+                    for result in future.result():
+                        self._collect(result, batch)
+                if self.max_hits and self.hits >= self.max_hits:
+                    break
+                now = time.perf_counter()
+                if now - last_emit >= PROGRESS_INTERVAL:
+                    self._emit(batch, now - start)
+                    last_emit = now
+        except BrokenProcessPool as e:
+            logger.error(f"内容搜索进程池异常：{str(e)}")
+            self.error_occurred.emit(self.generation, "内容搜索进程异常退出")
+        finally:
+            for future in futures:
+                future.cancel()  # 尚未开始的任务不再执行
+        if self._is_running:
+            self._emit(batch, time.perf_counter() - start)
+        self.search_finished.emit(self.generation, self.files, self.bytes, self.hits,
+                                  time.perf_counter() - start, not self._is_running, self.budget_exhausted)
+
+    def _emit(self, batch: list, elapsed: float):
+        if batch:
+            self.hits_found.emit(self.generation, batch[:])
+            batch.clear()
+        self.progress.emit(self.generation, self.files, self.bytes, elapsed)
+
+    def _files(self):
+        """遍历目录树，生成 (路径, 大小)（不跟随符号链接，跳过版本库元数据目录与已知的二进制类型）"""
+        stack = [self.root]
+        query = self.file_query
+        while stack and self._is_running:
+            try:
+                with os.scandir(stack.pop()) as entries:
+                    for entry in entries:
+                        try:
+                            if entry.is_dir(follow_symlinks=False):
+                                if entry.name not in SKIP_DIRS:
+                                    stack.append(entry.path)
+                                continue
+                            if not entry.is_file(follow_symlinks=False) or _skip_by_extension(entry.name):
+                                continue
+                            if query is not None and not query.matches_entry(entry):
+                                continue
+                            yield entry.path, entry.stat(follow_symlinks=False).st_size
+                        except OSError:
+                            continue
+            except OSError:
+                continue
+
+    def _tasks(self):
+        """文件 -> 任务（每个任务为一组片段 [(路径, 起始, 结束)]）"""
+        batch, batch_bytes = [], 0
+        for path, size in self._files():
+            if self.scheduled_bytes + size > self.byte_budget:
+                self.budget_exhausted = True
+                break
+            self.scheduled_bytes += size
+            if size > CHUNK_SIZE:
+                starts = range(0, size, CHUNK_SIZE)
+                self._chunked[path] = [len(starts), {}]
+                for offset in starts:
+                    yield [(path, offset, offset + CHUNK_SIZE)]
+                continue
+            batch.append((path, 0, -1))
+            batch_bytes += size
+            if batch_bytes >= BATCH_BYTES or len(batch) >= BATCH_FILES:
+                yield batch
+                batch, batch_bytes = [], 0
+        if batch:
+            yield batch
+
+    def _collect(self, result: tuple, batch: list):
+        """汇总一个片段的扫描结果（分块文件等全部分块返回后按前面分块的换行数换算行号）"""
+        path, offset, status, scanned, _newlines, hits = result
+        self.bytes += scanned
+        chunked = self._chunked.get(path)
+        if chunked is None:
+            self.files += 1
+            if status == STATUS_OK:
+                self._add_hits(path, hits, 0, batch)
+            return
+        chunked[1][offset] = result
+        if len(chunked[1]) < chunked[0]:
+            return
+        del self._chunked[path]
+        self.files += 1
+        parts = [chunked[1][start] for start in sorted(chunked[1])]
+        if any(part[2] == STATUS_BINARY for part in parts):
+            return
+        line_offset = 0
+        for _path, _offset, part_status, _scanned, newlines, part_hits in parts:
+            if part_status == STATUS_OK:
+                self._add_hits(path, part_hits, line_offset, batch)
+            line_offset += newlines
+
+    def _add_hits(self, path: str, hits: list, line_offset: int, batch: list):
+        if self.max_hits:
+            hits = hits[:max(0, self.max_hits - self.hits)]
+        batch.extend((path, line_offset + line + 1, preview) for line, preview in hits)
+        self.hits += len(hits)
+
+
+class ContentSearch(QObject):
+    """
+    文件内容搜索（grep）：常驻进程池并行扫描（每个文件以 mmap 方式读取，大文件分块），命中行流式返回
+    - 使用 spawn 方式创建工作进程（主进程含 Qt 线程，fork 不安全），进程池在首次搜索时创建并复用；
+      工作进程会重新执行入口脚本，入口脚本须在 if __name__ == "__main__" 内导入 Qt 与主窗口（见 main.pyw）
+    - 新搜索开始或调用 cancel() 时旧搜索停止提交任务，旧代号的结果直接丢弃
+    """
+    hits_found = Signal(list)  # [(路径, 行号, 预览)]
+    progress = Signal(int, int, float)  # (已扫描文件数, 已扫描字节数, 已用秒数)
+    search_finished = Signal(int, int, int, float, bool, bool)  # (文件数, 字节数, 命中数, 耗时秒, 是否取消, 是否超出预算)
+    error_occurred = Signal(str)
+
+    def __init__(self, parent=None, max_workers: int = None):
+        super().__init__(parent)
+        self.max_workers = max_workers or os.cpu_count() or 4
+        self.executor = None
+        self.generation = 0
+        self._thread = None
+        self._threads = []  # 已停止但尚未退出的线程（保持引用直到 finished）
+
+    def start(self, root: str, text: str, use_regex: bool = False, case_sensitive: bool = False,
+              file_query=None, max_hits: int = 1000, byte_budget: int = 20 * 1024 ** 3):
+        """开始在 root 下搜索文件内容（取消上一次搜索）；正则无效时抛出 re.error"""
+        compile_pattern(text, use_regex, case_sensitive)  # 在主线程中先校验
+        self.cancel()
+        if self.executor is None:
+            self.executor = ProcessPoolExecutor(self.max_workers, mp_context=get_context("spawn"))
+        self.generation += 1
+        thread = _ContentSearchThread(self.executor, self.max_workers, self.generation, root, text, use_regex,
+                                      case_sensitive, file_query, max_hits, byte_budget, self)
+        thread.hits_found.connect(self._on_hits_found)
+        thread.progress.connect(self._on_progress)
+        thread.search_finished.connect(self._on_search_finished)
+        thread.error_occurred.connect(self._on_error)
+        thread.finished.connect(self._on_thread_finished)
+        self._thread = thread
+        self._threads.append(thread)
+        thread.start()
+
+    def cancel(self):
+        """取消当前搜索（不等待线程退出，其结束信号仍会报告为已取消）"""
+        if self._thread is not None:
+            self._thread.stop()
+
+    def is_running(self) -> bool:
+        return self._thread is not None
+
+    def _on_hits_found(self, generation: int, hits: list):
+        if generation == self.generation:
+            self.hits_found.emit(hits)
+
+    def _on_progress(self, generation: int, files: int, scanned: int, elapsed: float):
+        if generation == self.generation:
+            self.progress.emit(files, scanned, elapsed)
+
+    def _on_search_finished(self, generation: int, files: int, scanned: int, hits: int, elapsed: float,
+                            cancelled: bool, budget_exhausted: bool):
+        if generation == self.generation:
+            self._thread = None
+            self.search_finished.emit(files, scanned, hits, elapsed, cancelled, budget_exhausted)
+
+    def _on_error(self, generation: int, message: str):
+        if self.executor is not None:
+            self.executor.shutdown(wait=False, cancel_futures=True)
+            self.executor = None  # 下一次搜索时重新创建进程池
+        if generation == self.generation:
+            self.error_occurred.emit(message)
+
+    def _on_thread_finished(self):
+        thread = self.sender()
+        if thread in self._threads:
+            self._threads.remove(thread)
+        thread.deleteLater()
+
+    def shutdown(self, timeout_ms: int = 2000):
+        """程序退出时停止搜索并关闭进程池"""
+        self.cancel()
+        for thread in list(self._threads):
+            thread.wait(timeout_ms)
+        if self.executor is not None:
+            self.executor.shutdown(wait=False, cancel_futures=True)
+            self.executor = None
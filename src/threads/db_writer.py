@@ -0,0 +1,94 @@
+import time
+import queue
+import sqlite3
+from PySide6.QtCore import QThread
+from dbload_manager.database_manager import DatabaseManager
+from utils.logging_config import get_logger
+
+logger = get_logger(__name__)
+
+
+class DatabaseWriter(QThread):
+    """
+    后台写入文件夹大小缓存（GUI 线程只把写入放入队列，不等待提交）
+    - 积累 batch_rows 行或最早一条等待 flush_ms 毫秒后合并为一个事务写入（executemany）
+    - 使用独立连接（WAL 模式，写入期间 GUI 线程仍可读取）
+    - stop() 写入队列中剩余的内容后退出（程序关闭时调用）
+    """
+    def __init__(self, db_path: str, batch_rows: int = 500, flush_ms: int = 1000, parent=None):
+        super().__init__(parent)
+        self.db_path = db_path
+        self.batch_rows = max(1, batch_rows)
+        self.flush_s = max(0, flush_ms) / 1000
+        self._queue = queue.Queue()
+
+    def update_cache(self, folder_path: str, size_bytes: int, last_modified: float, files: int = None,
+                     subdirs: int = None):
+        """文件夹总大小（同 DatabaseManager.update_cache）"""
+        self._queue.put(("cache", (folder_path, size_bytes, last_modified, files, subdirs)))
+
+    def update_dir_tree(self, records: list, removed: list):
+        """分层缓存（同 DatabaseManager.update_dir_tree）"""
+        self._queue.put(("tree", records, removed))
+
+    def invalidate_paths(self, folder_paths: list):
+        """使目录缓存失效（同 DatabaseManager.invalidate_paths；与其他写入按入队顺序执行）"""
+        self._queue.put(("invalidate", list(folder_paths)))
+
+    def stop(self):
+        """写入剩余内容并等待线程退出"""
+        self._queue.put(None)
+        self.wait()
+
+    def run(self):
+        db = DatabaseManager(self.db_path)  # 连接须在本线程中创建
+        caches, records, removed = [], [], []
+        deadline = None  # 最早一条未写入内容的写入时间
+        try:
+            while True:
+                timeout = None if deadline is None else max(0.0, deadline - time.monotonic())
+                try:
+                    item = self._queue.get(timeout=timeout)
+                except queue.Empty:
+                    item = ()
+                if item and item[0] == "invalidate":
+                    # 先写入之前入队的内容，失效标记不会被更早的计算结果覆盖
+                    self._flush(db, caches, records, removed)
+                    caches, records, removed = [], [], []
+                    deadline = None
+                    try:
+                        db.invalidate_paths(item[1])
+                    except sqlite3.Error as e:
+                        db.conn.rollback()
+                        logger.error(f"文件夹大小缓存失效标记写入失败，错误信息：{e}")
+                    continue
+                if item:
+                    if item[0] == "cache":
+                        caches.append(item[1])
+                    else:
+                        records.extend(item[1])
+                        removed.extend(item[2])
+                    if deadline is None:
+                        deadline = time.monotonic() + self.flush_s
+                    if len(caches) + len(records) + len(removed) < self.batch_rows:
+                        continue
+                self._flush(db, caches, records, removed)
+                caches, records, removed = [], [], []
+                deadline = None
+                if item is None:
+                    break
+        finally:
+            db.close()
+
+    @staticmethod
+    def _flush(db: DatabaseManager, caches: list, records: list, removed: list):
+        """在一个事务中写入积累的内容"""
+        if not (caches or records or removed):
+            return
+        start = time.perf_counter()
+        try:
+            db.write_batch(caches, records, removed)
+            logger.debug(f"写入 {len(caches)} 个文件夹大小、{len(records)} 个目录缓存，"
+                         f"用时 {(time.perf_counter() - start) * 1000:.1f} ms")
+        except sqlite3.Error as e:
+            logger.error(f"文件夹大小缓存写入失败（{len(caches) + len(records)} 条），错误信息：{e}")
@@ -0,0 +1,134 @@
+import os
+import time
+from PySide6.QtCore import QThread, Signal, QObject, QTimer, QFileSystemWatcher
+from utils.file_record import scan_directory_records
+from utils.listing_cache import get_dir_mtime
+from utils.logging_config import get_logger
+
+logger = get_logger(__name__)
+
+
+class DirectoryDiffThread(QThread):
+    """重新扫描目录并与上次结果对比，计算新增/删除/变化的条目"""
+    diff_ready = Signal(list, list, list, list, float)  # (完整列表, 新增, 删除的名称, 变化, 目录修改时间)
+
+    def __init__(self, path: str, show_hidden: bool, snapshot: dict):
+        super().__init__()
+        self.path = path
+        self.show_hidden = show_hidden
+        self.snapshot = snapshot  # 上次结果 {名称: FileRecord}（只读）
+
+    def run(self):
+        dir_mtime = get_dir_mtime(self.path)  # 扫描前记录，扫描期间的变化会触发下一次对比
+        try:
+            file_list = list(scan_directory_records(self.path, self.show_hidden))
+        except OSError as e:
+            logger.warning(f"目录变化扫描失败: {self.path}，{str(e)}")
+            return
+        added, changed = [], []
+        names = set()
+        for record in file_list:
+            names.add(record.name)
+            old = self.snapshot.get(record.name)
+            if old is None:
+                added.append(record)
+            elif (old.is_dir, old.size, old.mtime) != (record.is_dir, record.size, record.mtime):
+                changed.append(record)
+        removed = [name for name in self.snapshot if name not in names]
+        self.diff_ready.emit(file_list, added, removed, changed, dir_mtime)
+
+
+class DirectoryWatcher(QObject):
+    """
+    监视当前目录的变化并发出增量差异（代替整表刷新）
+    - 连续事件合并：最后一次事件后等待 debounce_ms 再扫描，但距第一次事件不超过 max_delay_ms
+    - 同一时间最多一个对比扫描，扫描期间的新事件在完成后再合并处理
+    """
+    changes_ready = Signal(str, list, list, list, list, float)  # (目录, 完整列表, 新增, 删除的名称, 变化, 目录修改时间)
+
+    def __init__(self, parent=None, debounce_ms: int = 200, max_delay_ms: int = 1000):
+        super().__init__(parent)
+        self.debounce_ms = debounce_ms
+        self.max_delay_ms = max_delay_ms
+        self.path = None
+        self.show_hidden = False
+        self._snapshot = None  # 当前显示的结果 {名称: FileRecord}（None 表示尚未加载完成）
+        self._thread = None  # 进行中的对比线程
+        self._pending = False  # 有尚未处理的变化事件
+        self._first_event = None  # 本轮合并的第一次事件时间
+        self._watcher = QFileSystemWatcher(self)
+        self._watcher.directoryChanged.connect(self._on_directory_changed)
+        self._timer = QTimer(self)
+        self._timer.setSingleShot(True)
+        self._timer.timeout.connect(self._start_diff)
+
+    def watch(self, path: str, show_hidden: bool):
+        """切换监视目录（结果在 set_snapshot 后才开始对比）"""
+        watched = self._watcher.directories()
+        if watched:
+            self._watcher.removePaths(watched)
+        self.path = path
+        self.show_hidden = show_hidden
+        self._snapshot = None
+        self._thread = None  # 旧目录的对比结果将被丢弃
+        self._pending = False
+        self._first_event = None
+        self._timer.stop()
+        if os.path.isdir(path):
+            self._watcher.addPath(path)
+
+    def set_snapshot(self, file_list: list):
+        """记录当前显示的完整结果，作为后续对比的基准"""
+        self._snapshot = {record.name: record for record in file_list}
+        if self._pending:
+            self.schedule_refresh()
+
+    def schedule_refresh(self, delay_ms: int = None):
+        """安排一次对比扫描（文件操作后可传入 0 立即刷新）"""
+        if self._snapshot is None or self._thread is not None:
+            self._pending = True  # 加载或对比进行中，完成后再处理
+            return
+        now = time.monotonic()
+        if self._first_event is None:
+            self._first_event = now
+        remaining = self.max_delay_ms - (now - self._first_event) * 1000
+        delay = self.debounce_ms if delay_ms is None else delay_ms
+        self._timer.start(int(max(0, min(delay, remaining))))
+
+    def _on_directory_changed(self, path: str):
+        if os.path.normcase(os.path.normpath(path)) == os.path.normcase(os.path.normpath(self.path)):
+            self.schedule_refresh()
+
+    def _start_diff(self):
+        self._first_event = None
+        self._pending = False
+        thread = DirectoryDiffThread(self.path, self.show_hidden, self._snapshot)
+        thread.diff_ready.connect(lambda *result: self._on_diff_ready(thread, *result))
+        thread.finished.connect(lambda: self._on_thread_finished(thread))
+        thread.finished.connect(thread.deleteLater)
+        self._thread = thread
+        thread.start()
+
+    def _on_diff_ready(self, thread, file_list, added, removed, changed, dir_mtime):
+        if thread is not self._thread:
+            return  # 已切换目录，丢弃旧结果
+        self._snapshot = {record.name: record for record in file_list}
+        if added or removed or changed:
+            self.changes_ready.emit(self.path, file_list, added, removed, changed, dir_mtime)
+
+    def _on_thread_finished(self, thread):
+        if thread is not self._thread:
+            return
+        self._thread = None
+        if self._pending:
+            self.schedule_refresh()
+
+    def stop(self):
+        """停止监视并等待进行中的对比线程结束"""
+        self._timer.stop()
+        thread, self._thread = self._thread, None
+        if thread is not None:
+            thread.wait()
+        watched = self._watcher.directories()
+        if watched:
+            self._watcher.removePaths(watched)
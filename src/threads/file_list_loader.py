@@ -1,109 +1,162 @@
-import os
-from PySide6.QtCore import QThread, Signal, QObject
-from utils.file_utils import should_show  # 复用现有过滤函数
+import time
+from PySide6.QtCore import QRunnable, QThreadPool, Signal, QObject
+from utils.file_record import scan_directory_records  # 单次 stat 的紧凑扫描记录
+from utils.listing_cache import get_dir_mtime
 # from utils.logging_config import get_logger
 # logger = get_logger(__name__)
 
-class FileListLoaderThread(QThread):
-    """异步扫描目录的线程类"""
-    list_loaded = Signal(list)  # 发送扫描结果（文件信息列表）
-    error_occurred = Signal(str)  # 新增信号：发送错误信息
-    def __init__(self, path: str, show_hidden: bool):
+CHUNK_SIZE = 2000  # 流式模式：每批最多条目数
+CHUNK_INTERVAL = 0.05  # 流式模式：距上次发送超过该秒数即发送当前批次
+LOAD_PRIORITY = 1  # 正常加载优先于预取
+PREFETCH_PRIORITY = 0
+
+
+class CancellationToken:
+    """协作式取消标记（由扫描任务在条目之间检查，取消后不再发送任何结果）"""
+    __slots__ = ("cancelled",)
+
+    def __init__(self):
+        self.cancelled = False
+
+    def cancel(self):
+        self.cancelled = True
+
+    def is_active(self) -> bool:
+        return not self.cancelled
+
+
+class ScanSignals(QObject):
+    """扫描任务的信号（QRunnable 不是 QObject，由该对象在主线程中转发）"""
+    chunk_loaded = Signal(int, list)  # (代号, 一批扫描记录)
+    list_loaded = Signal(int, float, list)  # (代号, 扫描开始时的目录修改时间, 完整 FileRecord 列表)
+    error_occurred = Signal(int, str)  # (代号, 错误信息)
+    finished = Signal(int)  # (代号) 任务结束（无论是否完成/取消）
+
+
+class ScanTask(QRunnable):
+    """
+    在常驻线程池中扫描单个目录（流式分批发送扫描结果）
+    - generation：任务代号，接收方据此丢弃过期结果，无需等待旧任务退出
+    - token：取消后任务在下一个条目处退出，且不再发送结果
+    """
+    def __init__(self, path: str, show_hidden: bool, generation: int, token: CancellationToken,
+                 signals: ScanSignals, stream: bool = True, max_entries: int = None):
         super().__init__()
+        self.setAutoDelete(False)  # 由提交方持有引用直到 finished，避免 C++ 与 Python 重复释放
         self.path = path
         self.show_hidden = show_hidden
-        self._is_running = True  # 终止标记
-        
+        self.generation = generation
+        self.token = token
+        self.signals = signals
+        self.stream = stream  # 为 False 时只发送完整结果（预取）
+        self.max_entries = max_entries  # 超过该条目数时放弃（不发送结果）
+
     def run(self):
-        """核心：异步扫描目录并收集文件信息"""
-        # print("FileListLoaderThread started.")
+        """核心：扫描目录并收集扫描记录"""
+        try:
+            if self.token.is_active():  # 排队期间已取消的任务直接结束
+                self._scan()
+        finally:
+            self.signals.finished.emit(self.generation)
+
+    def _scan(self):
+        dir_mtime = get_dir_mtime(self.path)
         file_list = []
+        batch = []  # 当前批次（达到条目上限或时间间隔时发送）
+        last_emit = time.monotonic()
         try:
-            with os.scandir(self.path) as entries:
-                for entry in entries:
-                    if not self._is_running:  # 支持中途终止
-                        return
-                    if not should_show(entry, self.show_hidden):  # 复用现有过滤逻辑
-                        continue
-                    # 收集文件元数据（新增“类型”字段）
-                    file_info = {
-                        "name": entry.name,
-                        "path": entry.path,
-                        "is_dir": entry.is_dir(),
-                        "size": entry.stat().st_size,
-                        "mtime": entry.stat().st_mtime
-                    }
-                    file_list.append(file_info)
-            self.list_loaded.emit(file_list)  # 发送扫描结果到主线程
-        except PermissionError as e:
-            self.error_occurred.emit(f"无权限访问目录: {self.path}")  # 发射权限错误
-            # print("warn:无权限访问目录:", self.path)
-            self.list_loaded.emit([])
-        except Exception as e:
-            self.error_occurred.emit(f"扫描目录时出错: {self.path}")  # 异常时发送错误信息
-            self.list_loaded.emit([])  # 发送空列表表示加载失败
-        
-
-    def stop(self):
-        """外部调用终止线程"""
-        # print("stop", self.path)
-        self._is_running = False
-        # print("FileListLoaderThread stopped.")
+            for record in scan_directory_records(self.path, self.show_hidden, self.token.is_active):
+                batch.append(record)
+                if self.max_entries is not None and len(file_list) + len(batch) > self.max_entries:
+                    return
+                # 流式发送：条目数或时间间隔任一达到上限即发送（首批尽快到达界面）
+                now = time.monotonic()
+                if len(batch) >= CHUNK_SIZE or now - last_emit >= CHUNK_INTERVAL:
+                    self._emit_chunk(batch, file_list)
+                    batch = []
+                    last_emit = now
+            if not self.token.is_active():  # 支持中途终止
+                return
+        except PermissionError:
+            self._emit_error(f"无权限访问目录: {self.path}")  # 发射权限错误
+        except Exception:
+            self._emit_error(f"扫描目录时出错: {self.path}")  # 异常时发送错误信息
+        self._emit_chunk(batch, file_list)  # 出错时已发送的批次仍保留在列表中
+        if self.token.is_active():
+            self.signals.list_loaded.emit(self.generation, dir_mtime, file_list)
+
+    def _emit_chunk(self, batch: list, file_list: list):
+        """发送一批结果并并入完整列表（空批次或已取消时不发送）"""
+        if not batch or not self.token.is_active():
+            return
+        file_list.extend(batch)
+        if self.stream:
+            self.signals.chunk_loaded.emit(self.generation, batch)
+
+    def _emit_error(self, message: str):
+        if self.token.is_active():
+            self.signals.error_occurred.emit(self.generation, message)
+
+
 class FileListLoaderManager(QObject):
-    """管理异步扫描线程的管理器（优化）"""
-    list_loaded = Signal(list)  # 转发线程的加载完成信号
-    error_occurred = Signal(str)  # 新增信号：转发线程的错误信号
+    """
+    管理目录扫描的常驻线程池
+    - 每次导航只提交一个任务并递增代号，旧任务通过取消标记协作退出
+    - 旧代号的信号直接丢弃，导航时从不等待或强制终止线程
+    """
+    chunk_loaded = Signal(list)  # 转发当前任务的分批加载信号
+    list_loaded = Signal(list)  # 转发当前任务的加载完成信号
+    error_occurred = Signal(str)  # 转发当前任务的错误信号
 
-    def __init__(self, parent=None):
+    def __init__(self, parent=None, max_workers: int = 4):
         super().__init__(parent)
-        self.active_threads = {}  # {路径: 线程对象}
-        self.all_threads = set()  # 新增：记录所有未完成的线程（无论路径）
-        
+        self.pool = QThreadPool(self)  # 常驻线程池（与预取共用）
+        self.pool.setMaxThreadCount(max_workers)
+        self.pool.setExpiryTimeout(-1)  # 空闲线程不退出，避免每次导航重新创建线程
+        self.signals = ScanSignals(self)
+        self.signals.chunk_loaded.connect(self._on_chunk_loaded)
+        self.signals.list_loaded.connect(self._on_load_finished)
+        self.signals.error_occurred.connect(self._on_error)
+        self.signals.finished.connect(self._on_task_finished)
+        self._tasks = {}  # {代号: 任务}（保持引用直到任务结束，包括已取消的任务）
+        self.generation = 0  # 当前有效任务的代号
+        self._token = None  # 当前任务的取消标记
+
     def start_load(self, path: str, show_hidden: bool):
-        """启动异步扫描（优化：增加路径冷却和重复加载限制）"""
-        # print("start_load", path)
+        """提交扫描任务（取消上一个任务但不等待其退出）"""
         self.stop_all()
-        # 不要提前 return，确保所有线程都能被 stop
-        # if path in self.active_threads:
-        #     return
-
-        thread = FileListLoaderThread(path, show_hidden)
-        self.active_threads[path] = thread
-        self.all_threads.add(thread)
-        # 连接线程的错误信号到管理器的转发信号
-        thread.error_occurred.connect(self.error_occurred.emit)  # 直接转发
-        thread.list_loaded.connect(lambda lst: self._on_load_finished(path, lst))
-        thread.finished.connect(thread.deleteLater)
-        thread.finished.connect(lambda: self._on_thread_finished(thread, path))
-        thread.start()
-
-    def _on_thread_finished(self, thread, path):
-        # print(f"[Thread finished] {getattr(thread, 'path', None)}")
-        self.all_threads.discard(thread)
-        self.active_threads.pop(path, None)
-
-    # 原有 _on_load_finished 和 stop_all 方法保持不变
-    def _on_load_finished(self, path: str, file_list: list):
-        self.list_loaded.emit(file_list)
-        if path in self.active_threads:
-            # print(f"[Load finished] {path}")
-            # logger.info(f"[Load finished] {path}")
-            thread = self.active_threads[path]
-            self.all_threads.discard(thread)  # 从全局集合中移除
-            del self.active_threads[path]
+        self._token = CancellationToken()
+        task = ScanTask(path, show_hidden, self.generation, self._token, self.signals)
+        self._tasks[self.generation] = task
+        self.pool.start(task, LOAD_PRIORITY)
+
+    def _on_task_finished(self, generation: int):
+        self._tasks.pop(generation, None)
+
+    def _on_chunk_loaded(self, generation: int, chunk: list):
+        """转发当前任务的分批结果（过期代号的结果直接丢弃）"""
+        if generation == self.generation:
+            self.chunk_loaded.emit(chunk)
+
+    def _on_load_finished(self, generation: int, dir_mtime: float, file_list: list):
+        if generation == self.generation:
+            self._token = None
+            self.list_loaded.emit(file_list)
+
+    def _on_error(self, generation: int, message: str):
+        if generation == self.generation:
+            self.error_occurred.emit(message)
 
     def stop_all(self):
-        threads = set(self.all_threads) | set(self.active_threads.values())
-        for thread in list(threads):
-            # logger.info(f"stop_all: {getattr(thread, 'path', None)}")
-            # print(f"Calling stop() for thread: {getattr(thread, 'path', None)}")
-            thread.stop()
-        for thread in list(threads):
-            thread.wait(1000)
-            if thread.isRunning():
-                # get_logger().info(f"Thread not terminated: {getattr(thread, 'path', None)}")
-                # print("Thread not terminated:", thread)
-                thread.terminate()  # 极端情况强制终止
-                thread.wait()  # 等待终止完成
-        # self.active_threads.clear()
-        # self.all_threads.clear()
\ No newline at end of file
+        """取消当前任务（不阻塞：递增代号后旧任务的排队信号全部失效）"""
+        if self._token is not None:
+            self._token.cancel()
+            self._token = None
+        self.generation += 1
+
+    def shutdown(self, timeout_ms: int = 2000):
+        """程序退出时取消任务并等待线程池空闲"""
+        self.stop_all()
+        self.pool.clear()  # 移除尚未开始的任务
+        self.pool.waitForDone(timeout_ms)
+        self._tasks.clear()
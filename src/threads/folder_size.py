@@ -1,13 +1,31 @@
 import os
+import time
 from PySide6.QtCore import QThread, Signal, QObject
-from PySide6.QtWidgets import QTreeWidgetItem
+from threads.size_walker import ParallelSizeWalker, SizeStats, scan_dir_size
 from utils.logging_config import get_logger  # 替换原 logging 导入
 
 logger = get_logger(__name__)  # 通过日志模块获取记录器
 
+
+def format_folder_size(total_size: int) -> str:
+    """字节数 -> 缓存与显示使用的大小文本（如 12.34GB）"""
+    units = ['B', 'KB', 'MB', 'GB', 'TB']
+    unit_index = 0
+    while total_size >= 1024 and unit_index < 4:
+        total_size /= 1024
+        unit_index += 1
+    return f'{total_size:.2f}{units[unit_index]}'
+
+
+def log_skipped(stats: SizeStats):
+    """一次计算只记录一条汇总日志（不逐个文件记录无权限错误）"""
+    if stats.denied or stats.errors:
+        logger.info(f"计算 {stats.path} 大小时跳过 {stats.denied} 个无权限的条目、{stats.errors} 个无法读取的条目")
+
+
 class FolderSizeThread(QThread):
-    """计算文件夹大小的线程"""
-    size_updated = Signal(str, str)  # (文件夹路径, 格式化后的大小)
+    """计算文件夹大小的线程（单线程遍历；FolderSizeManager 已改用并行遍历，该类保留给单独使用的场景）"""
+    size_updated = Signal(str, str, object)  # (文件夹路径, 格式化后的大小, 字节数)
 
     def __init__(self, path):
         super().__init__()
@@ -16,16 +34,9 @@ class FolderSizeThread(QThread):
         self._terminate_requested = False  # 强制终止标记
 
     def run(self):
-        total_size = self.calculate_folder_size(self.path)
+        size_bytes = self.calculate_folder_size(self.path)
         if self._is_running:  # 仅在未被终止时发送信号
-            # 原生格式化逻辑（不依赖外部函数）
-            units = ['B', 'KB', 'MB', 'GB', 'TB']
-            unit_index = 0
-            while total_size >= 1024 and unit_index < 4:
-                total_size /= 1024
-                unit_index += 1
-            formatted_size = f'{total_size:.2f}{units[unit_index]}'
-            self.size_updated.emit(self.path, formatted_size)
+            self.size_updated.emit(self.path, format_folder_size(size_bytes), size_bytes)
 
     def stop(self):
         """增强终止逻辑：设置双重标记并增加超时等待"""
@@ -35,83 +46,100 @@ class FolderSizeThread(QThread):
         self.wait(2000)  # 2000ms超时
 
     def calculate_folder_size(self, path):
-        total_size = 0
-        for root, dirs, files in os.walk(path, followlinks=False):
-            # 优先响应强制终止标记（避免os.walk阻塞）
+        stats = SizeStats(path)
+        stack = [path]
+        while stack:
             if self._terminate_requested or not self._is_running:
                 return 0
-            for file in files:
-                try:
-                    file_path = os.path.join(root, file)
-                    total_size += max(os.path.getsize(file_path), 0)  # 防御性编程（避免负数）
-                except PermissionError:
-                    logger.error(f"无权限访问文件: {file_path}")
-                except Exception as e:
-                    logger.error(f"计算文件 {file_path} 大小时出错：{str(e)}")
-                    pass
-        return total_size
+            size, files, subdirs, denied, errors, scanned = scan_dir_size(stack.pop())
+            stats.add(size, files, denied, errors, scanned)
+            stack.extend(subdirs)
+        log_skipped(stats)
+        return stats.bytes
 
 
 class FolderSizeManager(QObject):
-    """管理文件夹大小计算线程的管理器"""
-    size_updated = Signal(QTreeWidgetItem, str)  # (文件列表项, 格式化后的大小)
+    """
+    管理文件夹大小计算（所有文件夹共享 ParallelSizeWalker 的有上限线程池，子目录并行扫描）
+    - 使用数据库中的分层大小缓存：只重新扫描自身修改时间变化的目录，其余目录的大小直接汇总
+    - 只要求读取权限；计算完成后交给 DatabaseWriter 在后台批量写入数据库缓存
+    """
+    size_updated = Signal(str, str, object)  # (文件夹路径, 格式化后的大小, 字节数；无法计算时为 -1)
 
-    def __init__(self, parent=None):
+    def __init__(self, parent=None, max_workers: int = None, cache_path: str = None, revalidate_s: float = 10,
+                 cache_max_age_s: float = 3600):
         super().__init__(parent)
-        self.threads = {}  # 存储线程 {路径: 线程对象}
+        self.walker = ParallelSizeWalker(self, max_workers, cache_path, cache_max_age_s)
+        self.walker.size_calculated.connect(self._on_size_calculated)
+        self.revalidate_s = revalidate_s  # 校验完成后这段时间内再次显示时不重复校验
+        self._validated = {}  # {路径: (上次计算完成的时间, 字节数)}
 
-    def start_calculate(self, path: str, item: QTreeWidgetItem):
-        """启动文件夹大小计算线程（避免重复计算）"""
-        if path in self.threads:
-            logger.debug(f"路径 {path} 已存在计算线程，跳过重复启动")  # 使用模块日志
-            return  # 已存在同路径线程，跳过
+    def start_calculate(self, path: str, force: bool = False, rescan: bool = False):
+        """
+        开始计算（或增量校验）文件夹大小（避免重复计算）
+        :param force: 忽略最近校验的时间
+        :param rescan: 不使用分层缓存，完整重新扫描（F5 刷新时）
+        """
+        if self.walker.is_running(path):
+            logger.debug(f"路径 {path} 正在计算，跳过重复启动")  # 使用模块日志
+            return  # 同一路径正在计算，跳过
+        validated = self._validated.get(path)
+        if not (force or rescan) and validated is not None and time.monotonic() - validated[0] < self.revalidate_s:
+            # 刚计算过：直接显示上次的结果（数据库缓存可能尚未写入，列表中不一定已有显示值）
+            self.size_updated.emit(path, format_folder_size(validated[1]), validated[1])
+            return
         if not os.access(path, os.R_OK):
             logger.error(f"路径 {path} 无读取权限，无法启动计算")  # 使用模块日志
-            self.size_updated.emit(item, "无读取权限")
+            self.size_updated.emit(path, "无读取权限", -1)
             return
-        if not os.access(path, os.W_OK):
-            logger.error(f"路径 {path} 无写入权限，无法启动计算")  # 使用模块日志
-            self.size_updated.emit(item, "无写入权限")
+        self.walker.start(path, rescan)
+
+    def invalidate(self, changed_dirs: list):
+        """目录树监视报告变化：取消受影响的计算，并使这些目录及上级目录的最近计算结果失效"""
+        self.walker.invalidate(changed_dirs)
+        for path in changed_dirs:
+            while True:
+                self._validated.pop(path, None)
+                parent = os.path.dirname(path)
+                if parent == path:
+                    break
+                path = parent
+
+    def _on_size_calculated(self, stats: SizeStats):
+        log_skipped(stats)
+        self._validated[stats.path] = (time.monotonic(), stats.bytes)
+        size = format_folder_size(stats.bytes)
+        if stats.records or stats.removed:
+            self.parent().db_writer.update_dir_tree(stats.records, stats.removed)
+        elif stats.unchanged:  # 子树没有变化（由计算线程与缓存比较）：只更新显示，不写数据库
+            self.size_updated.emit(stats.path, size, stats.bytes)
             return
-        thread = FolderSizeThread(path)
-        self.threads[path] = thread
-        # 连接线程信号到管理器的回调（使用 lambda 绑定固定参数）
-        thread.size_updated.connect(lambda p, s: self._on_size_updated(p, s, item))
-        thread.start()
-
-    def _on_size_updated(self, path: str, size: str, item: QTreeWidgetItem):
-        """线程计算完成后的回调"""
-        self.size_updated.emit(item, size)  # 触发 UI 更新信号
+        self._on_size_updated(stats.path, size, stats.bytes, stats.files, stats.dirs, stats.mtime)
+
+    def _on_size_updated(self, path: str, size: str, size_bytes: int, files: int = None, subdirs: int = None,
+                         last_modified: float = None):
+        """计算完成后的回调（last_modified 为计算线程开始扫描时记录的修改时间，GUI 线程不再 stat）"""
+        self.size_updated.emit(path, size, size_bytes)  # 触发 UI 更新信号（按路径定位列表行）
         # 写入数据库（优化异常处理）
         try:
-            # ：获取最后修改时间时添加异常捕获
-            try:
-                last_modified = os.path.getmtime(path)
-                if last_modified <= 0:
-                    raise ValueError("无效时间戳")
-            except Exception as e:
-                # last_modified = 0  # 无效时间戳设为0（或根据业务需求调整）
-                self.size_updated.emit(item, "读取出错")
+            if last_modified is None or last_modified <= 0:  # 无法读取修改时间或时间戳无效
+                self.size_updated.emit(path, "读取出错", -1)
                 return -1
-            self.parent().db.update_cache(
+            self.parent().db_writer.update_cache(  # 后台线程批量写入，不在 GUI 线程提交
                 folder_path=path,
-                size=size,
-                last_modified=last_modified
+                size_bytes=size_bytes,
+                last_modified=last_modified,
+                files=files,
+                subdirs=subdirs
             )
-            logger.info(f"数据库写入成功，路径：{path}，大小：{size}，最后修改时间：{last_modified}")
         except Exception as e:
             logger.error(f"数据库写入失败，路径：{path}，大小：{size}，错误信息：{str(e)}")
-        if path in self.threads:
-            del self.threads[path]  # 清理已完成的线程记录
 
     def stop_all_threads(self):
-        """停止所有正在运行的线程"""
-        thread_count = len(self.threads)
-        if thread_count == 0:
-            logger.info("无活跃线程需要停止")  # 使用模块日志
-            return
-        logger.info(f"开始停止 {thread_count} 个文件夹大小计算线程")  # 使用模块日志
-        for thread in self.threads.values():
-            thread.stop()
-            thread.wait()  # 等待线程终止
-        self.threads.clear()
\ No newline at end of file
+        """停止所有正在进行的计算"""
+        count = self.walker.running_count()
+        if count == 0:
+            logger.info("无进行中的文件夹大小计算")  # 使用模块日志
+        else:
+            logger.info(f"开始停止 {count} 个文件夹大小计算")  # 使用模块日志
+        self.walker.shutdown()
@@ -0,0 +1,109 @@
+import os
+import time
+import sqlite3
+from PySide6.QtCore import QThread, Signal
+from dbload_manager.filename_index import FilenameIndex
+from utils.logging_config import get_logger
+
+logger = get_logger(__name__)
+
+BATCH_SIZE = 10_000  # 每批写入的条目数
+PROGRESS_INTERVAL = 0.2  # 进度信号最短间隔（秒）
+
+
+class IndexBuildThread(QThread):
+    """
+    后台构建单个卷的文件名索引
+    - 写入临时数据库文件，完成后由主线程调用 FilenameIndex.replace_with 替换旧索引
+    - 只在本卷内遍历（不跟随符号链接，不进入其他挂载点），无权限的目录计数后跳过
+    """
+    progress = Signal(int, str)  # (已索引条目数, 当前目录)
+    build_finished = Signal(str, int, float)  # (临时索引文件, 条目数, 耗时秒)
+    error_occurred = Signal(str)
+
+    def __init__(self, root: str, db_path: str, parent=None):
+        super().__init__(parent)
+        self.root = root
+        self.tmp_path = db_path + ".tmp"
+        self._is_running = True
+        self.skipped_dirs = 0  # 无法访问的目录数
+
+    def stop(self):
+        self._is_running = False
+
+    def run(self):
+        start = time.perf_counter()
+        try:
+            os.makedirs(os.path.dirname(self.tmp_path), exist_ok=True)
+            if os.path.exists(self.tmp_path):
+                os.remove(self.tmp_path)
+            conn = sqlite3.connect(self.tmp_path)
+        except (OSError, sqlite3.Error) as e:
+            self.error_occurred.emit(f"无法创建索引文件：{str(e)}")
+            return
+        try:
+            conn.execute("PRAGMA journal_mode=OFF")  # 临时文件：构建失败直接丢弃，无需日志
+            conn.execute("PRAGMA synchronous=OFF")
+            FilenameIndex.create_schema(conn)
+            count = self._walk(conn)
+            if not self._is_running:
+                conn.close()
+                os.remove(self.tmp_path)
+                return
+            conn.execute("INSERT INTO names(names) VALUES('rebuild')")  # 一次性建立 trigram 索引（比逐行触发器快得多）
+            conn.executemany("INSERT INTO meta VALUES (?, ?)", [
+                ("root", self.root), ("entries", str(count)), ("built_at", str(time.time())),
+                ("skipped_dirs", str(self.skipped_dirs)),
+            ])
+            conn.commit()
+            conn.close()
+        except (OSError, sqlite3.Error) as e:
+            conn.close()
+            logger.error(f"构建文件名索引失败 {self.root}：{str(e)}")
+            self.error_occurred.emit(f"构建索引失败：{str(e)}")
+            return
+        self.build_finished.emit(self.tmp_path, count, time.perf_counter() - start)
+
+    def _walk(self, conn: sqlite3.Connection) -> int:
+        """遍历整个卷并分批写入 dirs/files，返回条目数"""
+        try:
+            root_dev = os.stat(self.root).st_dev
+        except OSError as e:
+            raise OSError(f"无法访问 {self.root}") from e
+        stack = [self.root]
+        dir_rows, file_rows = [], []
+        dir_id = file_id = 0
+        last_progress = 0.0
+        while stack and self._is_running:
+            path = stack.pop()
+            dir_id += 1
+            dir_rows.append((dir_id, path))
+            try:
+                with os.scandir(path) as entries:
+                    for entry in entries:
+                        try:
+                            st = entry.stat(follow_symlinks=False)  # Windows 下来自目录枚举结果，无额外系统调用
+                            is_dir = entry.is_dir(follow_symlinks=False)
+                        except OSError:
+                            continue
+                        file_id += 1
+                        file_rows.append((file_id, dir_id, entry.name, is_dir, 0 if is_dir else st.st_size, st.st_mtime))
+                        if is_dir and (not st.st_dev or st.st_dev == root_dev):  # 不进入其他挂载点
+                            stack.append(entry.path)
+            except OSError:
+                self.skipped_dirs += 1
+            if len(file_rows) >= BATCH_SIZE:
+                self._flush(conn, dir_rows, file_rows)
+            now = time.monotonic()
+            if now - last_progress >= PROGRESS_INTERVAL:
+                self.progress.emit(file_id, path)
+                last_progress = now
+        self._flush(conn, dir_rows, file_rows)
+        return file_id
+
+    @staticmethod
+    def _flush(conn: sqlite3.Connection, dir_rows: list, file_rows: list):
+        conn.executemany("INSERT INTO dirs VALUES (?, ?)", dir_rows)
+        conn.executemany("INSERT INTO files VALUES (?, ?, ?, ?, ?, ?)", file_rows)
+        dir_rows.clear()
+        file_rows.clear()
@@ -0,0 +1,82 @@
+import time
+from PySide6.QtCore import QObject, QRunnable, QThreadPool, Signal
+from dbload_manager.filename_index import FilenameIndex
+from threads.file_list_loader import CancellationToken
+
+
+class _QuerySignals(QObject):
+    query_finished = Signal(int, list, float)  # (代号, 结果行, 耗时毫秒)
+
+
+class _QueryTask(QRunnable):
+    """在工作线程中用独立连接查询文件名索引（SQLite 连接不能跨线程使用）"""
+    def __init__(self, root: str, db_path: str, query, limit: int, token: CancellationToken, generation: int,
+                 signals: _QuerySignals):
+        super().__init__()
+        self.root = root
+        self.db_path = db_path
+        self.query = query
+        self.limit = limit
+        self.token = token
+        self.generation = generation
+        self.signals = signals
+
+    def run(self):
+        if not self.token.is_active():
+            return
+        index = FilenameIndex(self.root, self.db_path)
+        start = time.perf_counter()
+        try:
+            results = index.search_query(self.query, self.limit, is_active=self.token.is_active)
+        finally:
+            index.close()
+        if self.token.is_active():
+            self.signals.query_finished.emit(self.generation, results, (time.perf_counter() - start) * 1000)
+
+
+class IndexQuery(QObject):
+    """
+    后台查询文件名索引（GUI 线程不执行 SQL，输入时界面不卡顿）
+    - 同一时间只执行一个查询；新查询开始或调用 cancel() 时中断旧查询（SQLite 进度回调），旧代号的结果直接丢弃
+    """
+    results_ready = Signal(list, float)  # (结果行, 耗时毫秒)
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.pool = QThreadPool(self)
+        self.pool.setMaxThreadCount(1)
+        self.signals = _QuerySignals(self)
+        self.signals.query_finished.connect(self._on_query_finished)
+        self.generation = 0
+        self._token = None
+
+    def start(self, index: FilenameIndex, query, limit: int):
+        """查询 index（取消上一次查询）"""
+        self.cancel()
+        self.generation += 1
+        self._token = CancellationToken()
+        self.pool.start(_QueryTask(index.root, index.db_path, query, limit, self._token, self.generation, self.signals))
+
+    def cancel(self):
+        """取消当前查询（不等待工作线程退出）"""
+        if self._token is not None:
+            self._token.cancel()
+            self._token = None
+
+    def is_running(self) -> bool:
+        return self._token is not None
+
+    def wait(self, timeout_ms: int = -1) -> bool:
+        """等待已开始的查询退出（替换索引文件前调用，查询连接须先关闭）"""
+        return self.pool.waitForDone(timeout_ms)
+
+    def _on_query_finished(self, generation: int, results: list, elapsed_ms: float):
+        if generation != self.generation or self._token is None:
+            return
+        self._token = None
+        self.results_ready.emit(results, elapsed_ms)
+
+    def shutdown(self, timeout_ms: int = 2000):
+        """程序退出时取消查询并等待工作线程退出"""
+        self.cancel()
+        self.pool.waitForDone(timeout_ms)
@@ -0,0 +1,118 @@
+import os
+from collections import deque
+from PySide6.QtCore import QObject, QThreadPool
+from threads.file_list_loader import CancellationToken, ScanSignals, ScanTask, PREFETCH_PRIORITY
+from utils.listing_cache import ListingCache
+
+
+class DirectoryPrefetcher(QObject):
+    """
+    预测下一步可能打开的目录并提前扫描到目录缓存
+    - 候选：当前选中/悬停的文件夹、上级目录、访问次数最多的子文件夹
+    - 在扫描线程池中以低优先级运行，同时运行的预取任务数有上限，其余候选排队
+    - 真正的导航开始时立即取消（排队清空，运行中的任务停止且结果被丢弃）
+    """
+    def __init__(self, listing_cache: ListingCache, pool: QThreadPool, parent=None, max_concurrent: int = 2,
+                 max_entries: int = 50_000, top_visited: int = 3, max_queued: int = 16,
+                 max_tracked: int = 1000):
+        super().__init__(parent)
+        self.listing_cache = listing_cache
+        self.pool = pool  # 与正常加载共用的常驻线程池
+        self.max_concurrent = max_concurrent
+        self.max_entries = max_entries
+        self.top_visited = top_visited  # 每次预取访问次数最多的前 N 个子文件夹
+        self.max_queued = max_queued  # 排队候选上限（悬停经过的文件夹不会无限堆积）
+        self.max_tracked = max_tracked  # 最多记录的目录访问次数条目
+        self._queue = deque()  # 待预取 (路径, 显示隐藏)
+        self._tasks = {}  # {代号: 任务}（保持引用直到任务结束，包括已取消但尚未退出的任务）
+        self._generation = 0
+        self._failed = set()  # 扫描出错的任务代号（结果不完整，不写入缓存）
+        self.signals = ScanSignals(self)
+        self.signals.list_loaded.connect(self._on_prefetched)
+        self.signals.error_occurred.connect(self._on_prefetch_error)
+        self.signals.finished.connect(self._on_task_finished)
+        self._visits = {}  # {规范化路径: [访问次数, 原始路径]}
+
+    # ---------- 访问统计 ----------
+    def record_visit(self, path: str):
+        """记录一次目录访问（用于挑选最常访问的子文件夹）"""
+        key = os.path.normcase(os.path.normpath(path))
+        visit = self._visits.setdefault(key, [0, path])
+        visit[0] += 1
+        if len(self._visits) > self.max_tracked:
+            del self._visits[min(self._visits, key=lambda k: self._visits[k][0])]
+
+    def most_visited_subfolders(self, path: str) -> list:
+        """返回 path 下访问次数最多的子文件夹（最多 top_visited 个）"""
+        parent = os.path.normcase(os.path.normpath(path))
+        children = [(count, child) for key, (count, child) in self._visits.items()
+                    if os.path.dirname(key) == parent and key != parent]
+        children.sort(key=lambda visit: visit[0], reverse=True)
+        return [child for _, child in children[:self.top_visited]]
+
+    # ---------- 预取调度 ----------
+    def prefetch(self, paths: list, show_hidden: bool, urgent: bool = False):
+        """
+        加入预取候选（已缓存或已排队的目录跳过）
+        :param urgent: 为 True 时插到队首（选中/悬停的文件夹）
+        """
+        for path in paths:
+            key = (path, show_hidden)
+            if (not path or self.listing_cache.contains(path, show_hidden)
+                    or self._is_running(path, show_hidden) or not os.path.isdir(path)):
+                continue
+            if key in self._queue:
+                if not urgent:
+                    continue
+                self._queue.remove(key)
+            if urgent:
+                self._queue.appendleft(key)
+            else:
+                self._queue.append(key)
+        while len(self._queue) > self.max_queued:
+            self._queue.pop()  # 丢弃队尾（优先级最低）的候选
+        self._start_next()
+
+    def prefetch_around(self, path: str, show_hidden: bool):
+        """目录加载完成后预取其上级目录与常访问的子文件夹"""
+        parent = os.path.dirname(path)
+        candidates = self.most_visited_subfolders(path)
+        if parent and parent != path:
+            candidates.append(parent)
+        self.prefetch(candidates, show_hidden)
+
+    def cancel(self):
+        """取消全部预取（不等待任务退出，结果到达时直接丢弃）"""
+        self._queue.clear()
+        for task in self._tasks.values():
+            task.token.cancel()
+
+    def _is_running(self, path: str, show_hidden: bool) -> bool:
+        return any(task.path == path and task.show_hidden == show_hidden and task.token.is_active()
+                   for task in self._tasks.values())
+
+    def _start_next(self):
+        while self._queue and len(self._tasks) < self.max_concurrent:
+            path, show_hidden = self._queue.popleft()
+            self._generation += 1
+            task = ScanTask(path, show_hidden, self._generation, CancellationToken(), self.signals,
+                            stream=False, max_entries=self.max_entries)
+            self._tasks[self._generation] = task
+            self.pool.start(task, PREFETCH_PRIORITY)
+
+    def _on_prefetched(self, generation: int, dir_mtime: float, file_list: list):
+        task = self._tasks.get(generation)
+        if task is None or not task.token.is_active():
+            return  # 已取消（导航已开始）
+        if generation in self._failed:
+            return  # 无权限或中途出错：结果为空或不完整，导航到该目录时重新扫描并显示错误
+        if not self.listing_cache.contains(task.path, task.show_hidden):
+            self.listing_cache.put(task.path, task.show_hidden, dir_mtime, file_list)
+
+    def _on_prefetch_error(self, generation: int, _message: str):
+        self._failed.add(generation)
+
+    def _on_task_finished(self, generation: int):
+        self._tasks.pop(generation, None)
+        self._failed.discard(generation)
+        self._start_next()
@@ -0,0 +1,213 @@
+import os
+import time
+import threading
+from collections import deque
+from PySide6.QtCore import QObject, QRunnable, QThreadPool, QTimer, Signal
+from threads.file_list_loader import CancellationToken
+
+RESULT_BATCH_SIZE = 200  # 每批发送的匹配数
+RESULT_BATCH_INTERVAL = 0.05  # 距上次发送超过该秒数即发送当前批次（首个匹配立即发送）
+PROGRESS_INTERVAL_MS = 100  # 界面统计刷新间隔
+
+
+def result_row(entry, is_dir: bool):
+    """匹配条目 -> 结果行 (完整路径, 是否文件夹, 大小, 修改时间)（只对匹配的条目 stat）"""
+    try:
+        st = entry.stat(follow_symlinks=False)
+    except OSError:
+        return entry.path, is_dir, 0, 0.0
+    return entry.path, is_dir, 0 if is_dir else st.st_size, st.st_mtime
+
+
+class SearchSignals(QObject):
+    """递归搜索任务的信号（由工作线程发出，在主线程中处理）"""
+    results_found = Signal(int, list)  # (代号, 一批结果行)
+    worker_finished = Signal(int)  # (代号) 一个工作任务退出
+
+
+class _SearchState:
+    """一次递归搜索的共享状态：待遍历目录队列 + 计数器（由锁保护）"""
+    def __init__(self, root: str, matcher, token: CancellationToken, max_results: int):
+        self.lock = threading.Condition()
+        self.queue = deque([root])
+        self.pending = 1  # 已入队但尚未遍历完成的目录数（为 0 时搜索结束）
+        self.matcher = matcher
+        self.token = token
+        self.max_results = max_results
+        self.dirs = 0  # 已遍历目录数
+        self.entries = 0  # 已检查条目数
+        self.matches = 0
+        self.errors = 0  # 无法访问的目录数
+
+    def next_dir(self):
+        """取出下一个待遍历目录（队列暂空但仍有目录在遍历时等待；搜索结束或取消时返回 None）"""
+        with self.lock:
+            while not self.queue:
+                if self.pending == 0 or not self.token.is_active():
+                    return None
+                self.lock.wait(0.05)
+            return self.queue.pop()  # 深度优先：队列较短，先遍历到的目录先出结果
+
+    def dir_done(self, subdirs: list, entries: int, matches: int, failed: bool):
+        with self.lock:
+            self.queue.extend(subdirs)
+            self.pending += len(subdirs) - 1
+            self.dirs += 1
+            self.entries += entries
+            self.matches += matches
+            self.errors += failed
+            if self.max_results and self.matches >= self.max_results:
+                self.token.cancel()  # 结果数达到上限：停止遍历
+            if subdirs or self.pending == 0:
+                self.lock.notify_all()
+
+
+class _SearchWorker(QRunnable):
+    """递归搜索工作任务：循环从共享队列取目录，scandir 遍历并匹配条目"""
+    def __init__(self, state: _SearchState, generation: int, signals: SearchSignals):
+        super().__init__()
+        self.setAutoDelete(False)
+        self.state = state
+        self.generation = generation
+        self.signals = signals
+
+    def run(self):
+        try:
+            self._run()
+        finally:
+            self.signals.worker_finished.emit(self.generation)
+
+    def _run(self):
+        state = self.state
+        matcher = state.matcher
+        is_active = state.token.is_active
+        batch = []
+        last_emit = 0.0
+        while True:
+            path = state.next_dir()
+            if path is None:
+                break
+            subdirs = []
+            entries = matches = 0
+            failed = False
+            try:
+                with os.scandir(path) as it:
+                    for entry in it:
+                        if not is_active():  # 取消后不再遍历大目录的剩余条目
+                            break
+                        entries += 1
+                        try:
+                            is_dir = entry.is_dir(follow_symlinks=False)
+                        except OSError:
+                            is_dir = False
+                        if is_dir:
+                            subdirs.append(entry.path)
+                        if matcher(entry):
+                            batch.append(result_row(entry, is_dir))
+                            matches += 1
+            except OSError:
+                failed = True
+            state.dir_done(subdirs, entries, matches, failed)
+            now = time.monotonic()
+            if batch and (len(batch) >= RESULT_BATCH_SIZE or now - last_emit >= RESULT_BATCH_INTERVAL):
+                self._emit(batch)
+                batch = []
+                last_emit = now
+        self._emit(batch)
+
+    def _emit(self, batch: list):
+        if batch:  # 已取消的搜索由接收方按代号丢弃
+            self.signals.results_found.emit(self.generation, batch)
+
+
+class RecursiveSearch(QObject):
+    """
+    无索引时的递归搜索：多个工作任务共享目录队列并行遍历子目录树（scandir 在系统调用期间释放 GIL）
+    - 匹配结果分批流式发送，首个匹配立即显示
+    - 新搜索开始或调用 cancel() 时旧搜索协作退出，旧代号的结果直接丢弃
+    """
+    results_found = Signal(list)  # 一批结果行 (完整路径, 是否文件夹, 大小, 修改时间)
+    progress = Signal(int, int, float)  # (已遍历目录数, 已检查条目数, 已用秒数)
+    search_finished = Signal(int, int, int, float, bool)  # (目录数, 条目数, 匹配数, 耗时秒, 是否被取消)
+
+    def __init__(self, parent=None, max_workers: int = None):
+        super().__init__(parent)
+        self.pool = QThreadPool(self)
+        self.pool.setMaxThreadCount(max_workers or min(32, (os.cpu_count() or 4) * 2))  # I/O 为主：线程数可多于核数
+        self.signals = SearchSignals(self)
+        self.signals.results_found.connect(self._on_results_found)
+        self.signals.worker_finished.connect(self._on_worker_finished)
+        self.progress_timer = QTimer(self)
+        self.progress_timer.setInterval(PROGRESS_INTERVAL_MS)
+        self.progress_timer.timeout.connect(self._emit_progress)
+        self.generation = 0
+        self._state = None
+        self._workers = {}  # {代号: [工作任务]}（保持引用直到任务退出）
+        self._start_time = 0.0
+        self._delivered = 0  # 已发送的结果数（达到上限后多余的结果丢弃）
+
+    def start(self, root: str, matcher, max_results: int = 0):
+        """
+        开始在 root 下递归搜索（取消上一次搜索）
+        :param matcher: matcher(DirEntry) -> bool，在工作线程中调用
+        :param max_results: 匹配数上限（0 表示不限）
+        """
+        self.cancel()
+        self.generation += 1
+        self._state = _SearchState(root, matcher, CancellationToken(), max_results)
+        self._start_time = time.perf_counter()
+        self._delivered = 0
+        workers = [_SearchWorker(self._state, self.generation, self.signals)
+                   for _ in range(self.pool.maxThreadCount())]
+        self._workers[self.generation] = workers
+        for worker in workers:
+            self.pool.start(worker)
+        self.progress_timer.start()
+
+    def cancel(self):
+        """取消当前搜索（不等待工作任务退出）"""
+        if self._state is not None:
+            self._state.token.cancel()
+            self._finish(cancelled=True)
+
+    def is_running(self) -> bool:
+        return self._state is not None
+
+    def _on_results_found(self, generation: int, batch: list):
+        state = self._state
+        if generation != self.generation or state is None:
+            return
+        if state.max_results:
+            batch = batch[:state.max_results - self._delivered]  # 多个工作线程可能同时越过上限
+        if batch:
+            self._delivered += len(batch)
+            self.results_found.emit(batch)
+
+    def _on_worker_finished(self, generation: int):
+        workers = self._workers.get(generation)
+        if workers is None:
+            return
+        workers.pop()
+        if workers:
+            return
+        del self._workers[generation]
+        if generation == self.generation and self._state is not None:
+            self._finish(cancelled=False)  # 正常结束或结果数达到上限
+
+    def _emit_progress(self):
+        state = self._state
+        if state is not None:
+            self.progress.emit(state.dirs, state.entries, time.perf_counter() - self._start_time)
+
+    def _finish(self, cancelled: bool):
+        state = self._state
+        self._state = None
+        self.progress_timer.stop()
+        self.search_finished.emit(state.dirs, state.entries, self._delivered,
+                                  time.perf_counter() - self._start_time, cancelled)
+
+    def shutdown(self, timeout_ms: int = 2000):
+        """程序退出时取消搜索并等待工作线程退出"""
+        self.cancel()
+        self.pool.waitForDone(timeout_ms)
+        self._workers.clear()
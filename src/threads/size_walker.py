@@ -0,0 +1,269 @@
+import os
+import time
+import threading
+from collections import deque
+from PySide6.QtCore import QObject, QRunnable, QThreadPool, Signal
+from threads.file_list_loader import CancellationToken
+from dbload_manager.database_manager import read_dir_tree
+
+
+class SizeStats:
+    """
+    一个文件夹的统计结果（文件总字节数、文件数、目录数，以及跳过的条目计数，不逐个记录日志）
+    使用分层缓存时另含需写回缓存的目录记录（records）、已不存在的目录（removed）与数据库中已缓存的总大小
+    """
+    __slots__ = ("path", "bytes", "files", "dirs", "denied", "errors", "rescanned", "records", "removed", "mtime",
+                 "cached_total")
+
+    def __init__(self, path: str):
+        self.path = path
+        self.bytes = 0
+        self.files = 0
+        self.dirs = 0
+        self.denied = 0  # 无权限访问的目录/文件数
+        self.errors = 0  # 其他原因无法读取的条目数（如遍历期间被删除）
+        self.rescanned = 0  # 重新扫描并写回缓存的目录数
+        self.records = []
+        self.removed = []
+        self.mtime = None  # 开始扫描时文件夹自身的修改时间（无法读取时为 None）
+        self.cached_total = None  # 数据库中已缓存的 (字节数, 计算时的修改时间)
+
+    @property
+    def unchanged(self) -> bool:
+        """结果与数据库中已缓存的总大小一致（无需写入）"""
+        return self.cached_total is not None and tuple(self.cached_total) == (self.bytes, self.mtime)
+
+    def add(self, size: int, files: int, denied: int, errors: int, scanned: bool):
+        self.bytes += size
+        self.files += files
+        self.dirs += scanned
+        self.denied += denied
+        self.errors += errors
+
+
+def scan_dir_size(path: str) -> tuple:
+    """
+    扫描单个目录（不跟随符号链接）：文件大小取自 DirEntry.stat（Windows 下来自目录枚举结果，无额外系统调用）
+    :return: (文件总字节数, 文件数, 子目录路径列表, 无权限数, 其他错误数, 是否成功扫描)
+    """
+    total = files = denied = errors = 0
+    subdirs = []
+    try:
+        with os.scandir(path) as it:
+            for entry in it:
+                try:
+                    if entry.is_dir(follow_symlinks=False):
+                        subdirs.append(entry.path)
+                        continue
+                    total += entry.stat(follow_symlinks=False).st_size
+                    files += 1
+                except PermissionError:
+                    denied += 1
+                except OSError:
+                    errors += 1
+    except PermissionError:
+        return 0, 0, [], 1, 0, False
+    except OSError:
+        return 0, 0, [], 0, 1, False
+    return total, files, subdirs, denied, errors, True
+
+
+class _SizeTask:
+    """一次文件夹大小计算：待扫描目录栈（深度优先，内存占用小）+ 尚未完成的目录数 + 子树的分层缓存"""
+    __slots__ = ("stats", "stack", "pending", "token", "cache", "children", "rescan", "stale", "min_updated")
+
+    def __init__(self, path: str, rescan: bool = False, stale: set = None, min_updated: float = 0):
+        self.stats = SizeStats(path)
+        self.stack = [path]
+        self.pending = 1
+        self.token = CancellationToken()
+        self.cache = None  # {目录: (修改时间, 文件总字节数, 文件数, 子目录数, 写入时间)}（处理根目录时读取）
+        self.children = None  # {目录: [已缓存的子目录]}
+        self.rescan = rescan  # 为 True 时不使用缓存（完整重新扫描，结果仍写回缓存）
+        self.stale = stale if stale is not None else set()  # 已报告变化、数据库中可能尚未标记失效的目录
+        self.min_updated = min_updated  # 早于该时间写入的缓存记录视为过期
+
+
+def scan_dir_cached(task: _SizeTask, path: str) -> tuple:
+    """
+    扫描单个目录，自身修改时间与子目录数都与缓存一致时直接使用缓存（只需一次 stat，不枚举目录）
+    （目录的修改时间在条目增删/改名时变化；文件内容的原地修改由目录树监视标记为失效，
+    未监视的目录依靠缓存记录的最长有效期或完整重新扫描（F5）发现）
+    :return: (scan_dir_size 的结果, 需写回缓存的记录或 None, 已不存在的子目录)
+    """
+    try:
+        mtime = os.stat(path).st_mtime  # 扫描前记录，扫描期间的变化在下次计算时发现
+    except PermissionError:
+        return (0, 0, [], 1, 0, False), None, []
+    except OSError:
+        return (0, 0, [], 0, 1, False), None, []
+    cached = task.cache.get(path)
+    cached_children = task.children.get(path, [])
+    if (cached is not None and not task.rescan and path not in task.stale and cached[4] >= task.min_updated
+            and cached[0] == mtime and cached[3] == len(cached_children)):
+        return (cached[1], cached[2], list(cached_children), 0, 0, True), None, []
+    result = scan_dir_size(path)
+    size, files, subdirs, denied, errors, scanned = result
+    if not scanned:
+        return result, None, []
+    current = set(subdirs)
+    removed = [child for child in cached_children if child not in current]
+    record = None
+    if not denied and not errors:  # 有无法读取的条目时不缓存（下次重新扫描）
+        record = (path, mtime, size, files, len(subdirs))
+    return result, record, removed
+
+
+class SizeWalkerSignals(QObject):
+    """工作线程 -> 主线程"""
+    task_finished = Signal(object)  # _SizeTask
+
+
+class _SizeWorker(QRunnable):
+    def __init__(self, walker):
+        super().__init__()
+        self.walker = walker
+
+    def run(self):
+        self.walker._work()
+
+
+class ParallelSizeWalker(QObject):
+    """
+    并行计算文件夹大小：所有文件夹共享一个有上限的线程池，各文件夹的子目录分散到多个工作线程扫描
+    - 调度按文件夹轮转：每个工作线程依次从不同文件夹取一个目录，大文件夹不会让其他文件夹一直等待
+    - 工作任务在仍有目录扫描中时等待新的子目录，全部完成后才退出（不反复创建工作任务）
+    - 无权限/无法读取的条目只计数（结果中的 denied/errors），由调用方汇总记录
+    - 指定 cache_path 时使用分层大小缓存：修改时间未变化的目录不再枚举，总大小由缓存的各目录汇总
+    """
+    size_calculated = Signal(object)  # SizeStats（已取消的计算不发送）
+
+    def __init__(self, parent=None, max_workers: int = None, cache_path: str = None, cache_max_age_s: float = 3600):
+        super().__init__(parent)
+        self.cache_path = cache_path  # 分层大小缓存所在数据库（为 None 时每次完整遍历）
+        self.cache_max_age_s = cache_max_age_s  # 缓存记录的最长有效期（超过后重新扫描该目录；0 表示不限）
+        self._stale = set()  # 目录树监视报告变化的目录（在重新扫描之前不使用其缓存记录）
+        self.max_workers = max_workers or min(16, (os.cpu_count() or 4) * 2)  # I/O 为主：线程数可多于核数
+        self.pool = QThreadPool(self)
+        self.pool.setMaxThreadCount(self.max_workers)
+        self.signals = SizeWalkerSignals(self)
+        self.signals.task_finished.connect(self._on_task_finished)
+        self._cond = threading.Condition()
+        self._ready = deque()  # 还有待扫描目录的任务（轮转）
+        self._pending = 0  # 所有任务中已入队但尚未扫描完成的目录数
+        self._active = 0  # 正在运行的工作任务数
+        self._tasks = {}  # {文件夹路径: 任务}（主线程维护）
+
+    def start(self, path: str, rescan: bool = False) -> bool:
+        """开始计算 path 的大小（同一路径正在计算时返回 False；rescan 为 True 时不使用缓存）"""
+        if path in self._tasks:
+            return False
+        min_updated = time.time() - self.cache_max_age_s if self.cache_max_age_s else 0
+        task = _SizeTask(path, rescan, self._stale, min_updated)
+        self._tasks[path] = task
+        with self._cond:
+            self._ready.append(task)
+            self._pending += 1
+            spawn = self.max_workers - self._active
+            self._active = self.max_workers
+            self._cond.notify()
+        for _ in range(spawn):
+            self.pool.start(_SizeWorker(self))
+        return True
+
+    def is_running(self, path: str) -> bool:
+        return path in self._tasks
+
+    def running_count(self) -> int:
+        return len(self._tasks)
+
+    def cancel(self, path: str):
+        task = self._tasks.pop(path, None)
+        if task is not None:
+            task.token.cancel()  # 工作线程取到该任务时丢弃其余目录
+
+    def invalidate(self, changed_dirs: list):
+        """
+        目录内容已变化：取消包含这些目录的计算（其结果可能已过期，不再写回缓存），
+        并在这些目录被重新扫描之前不使用其缓存记录
+        """
+        self._stale.update(changed_dirs)
+        for path in list(self._tasks):
+            prefix = os.path.join(path, "")
+            if any(changed == path or changed.startswith(prefix) for changed in changed_dirs):
+                self.cancel(path)
+
+    def cancel_all(self):
+        for path in list(self._tasks):
+            self.cancel(path)
+
+    def shutdown(self, timeout_ms: int = 2000):
+        """程序退出时取消所有计算并等待工作线程退出（正在扫描的目录完成后即退出）"""
+        self.cancel_all()
+        self.pool.waitForDone(timeout_ms)
+
+    def _next(self):
+        """（持有锁时调用）轮转取出下一个待扫描目录；暂无目录但仍有目录在扫描时等待，全部完成时返回 None"""
+        while True:
+            while self._ready:
+                task = self._ready.popleft()
+                if not task.token.is_active():
+                    self._pending -= len(task.stack)  # 已取消：其余目录不再扫描
+                    task.stack.clear()
+                    continue
+                path = task.stack.pop()
+                if task.stack:
+                    self._ready.append(task)
+                return task, path
+            if self._pending == 0:
+                return None
+            self._cond.wait(0.05)
+
+    def _work(self):
+        while True:
+            with self._cond:
+                item = self._next()
+                if item is None:
+                    self._active -= 1
+                    return
+            task, path = item
+            record, removed = None, ()
+            if path == task.stats.path:
+                try:
+                    task.stats.mtime = os.stat(path).st_mtime
+                except OSError:
+                    pass
+            if self.cache_path is None:
+                size, files, subdirs, denied, errors, scanned = scan_dir_size(path)
+            else:
+                if task.cache is None:  # 根目录：此时只有这一个目录在处理，读取整个子树的缓存
+                    task.cache, task.children, task.stats.cached_total = read_dir_tree(self.cache_path, path)
+                result, record, removed = scan_dir_cached(task, path)
+                size, files, subdirs, denied, errors, scanned = result
+            with self._cond:
+                task.stats.add(size, files, denied, errors, scanned)
+                if record is not None:
+                    task.stats.records.append(record)
+                    task.stats.rescanned += 1
+                    if task.token.is_active():
+                        self._stale.discard(path)
+                task.stats.removed.extend(removed)
+                if subdirs and task.token.is_active():
+                    if not task.stack:
+                        self._ready.append(task)
+                    task.stack.extend(subdirs)
+                    task.pending += len(subdirs)
+                    self._pending += len(subdirs)
+                    self._cond.notify(len(subdirs))
+                task.pending -= 1
+                self._pending -= 1
+                if self._pending == 0:
+                    self._cond.notify_all()  # 等待中的工作任务退出
+                finished = task.pending == 0
+            if finished and task.token.is_active():
+                self.signals.task_finished.emit(task)
+
+    def _on_task_finished(self, task: _SizeTask):
+        if self._tasks.get(task.stats.path) is task:  # 期间被取消或重新开始的计算不发送
+            del self._tasks[task.stats.path]
+            self.size_calculated.emit(task.stats)
@@ -0,0 +1,388 @@
+import os
+import time
+import errno
+import sqlite3
+import threading
+from collections import defaultdict, deque
+from PySide6.QtCore import QObject, QThread, Signal, QStorageInfo
+from dbload_manager.filename_index import FilenameIndex, index_path_for
+from utils import inotify
+from utils.logging_config import get_logger
+
+logger = get_logger(__name__)
+
+WATCH_SHARE = 0.5  # 未配置监视数上限时，最多占用内核每用户上限的比例（其余留给其他程序）
+MAX_BATCH_DIRS = 5000  # 变化目录累积到该数量时不等批次间隔立即处理
+CATCH_UP_SLICE = 2000  # 启动时核对索引、轮询冷子树时每处理这么多目录读取一次事件
+POLL_SLICE = CATCH_UP_SLICE
+
+
+def _scan_dir(path: str):
+    """目录的当前条目 [(名称, 是否文件夹, 大小, 修改时间)]，目录已不存在时返回 None（与索引构建时的记录方式一致）"""
+    entries = []
+    try:
+        with os.scandir(path) as it:
+            for entry in it:
+                try:
+                    st = entry.stat(follow_symlinks=False)
+                    is_dir = entry.is_dir(follow_symlinks=False)
+                except OSError:
+                    continue
+                entries.append((entry.name, is_dir, 0 if is_dir else st.st_size, st.st_mtime))
+    except FileNotFoundError:
+        return None
+    except NotADirectoryError:
+        return None
+    except OSError:
+        return []  # 无权限：按空目录处理（与构建时跳过无法访问的目录一致）
+    return entries
+
+
+class _TreeWatcherThread(QThread):
+    """
+    监视线程：对根目录树建立 inotify 监视（超出上限的冷子树改为轮询目录修改时间），
+    事件合并为“变化目录”集合，每批扫描这些目录并同步到文件名索引后发出 dirs_changed
+    """
+    dirs_changed = Signal(list)  # 本批有变化的目录（按路径排序，上级目录在前）
+    status_changed = Signal(int, int)  # (inotify 监视的目录数, 轮询的目录数)
+
+    def __init__(self, roots: dict, max_watches: int, batch_ms: int, poll_interval_s: float, parent=None):
+        super().__init__(parent)
+        self.roots = roots  # {根目录: 所在卷的文件名索引路径}
+        self.max_watches = max_watches
+        self.batch_ms = batch_ms
+        self.poll_interval = poll_interval_s
+        self._is_running = True
+        self._inotify = None
+        self._wd_path = {}  # {监视描述符: 目录}
+        self._path_wd = {}  # {目录: 监视描述符}
+        self._cold = {}  # 轮询的目录 {目录: 修改时间}
+        self._children = defaultdict(set)  # 已知的子目录（删除或移走时据此移除整个子树的监视）
+        self._dirty = set()
+        self._first_dirty = None
+        self.index_lock = threading.Lock()  # 打开文件名索引期间持有（替换索引文件时由主线程获取，暂停同步）
+
+    def stop(self):
+        self._is_running = False
+        if self._inotify is not None:
+            self._inotify.wake()
+
+    def run(self):
+        if inotify.available():
+            try:
+                self._inotify = inotify.Inotify()
+            except OSError as e:
+                logger.warning(f"inotify 初始化失败，改为轮询：{str(e)}")
+        if self._inotify is None:
+            self.max_watches = 0  # 不支持 inotify 的平台：全部轮询
+        try:
+            self._watch_roots()
+            next_poll = time.monotonic() + self.poll_interval
+            while self._is_running:
+                now = time.monotonic()
+                timeout = next_poll - now
+                if self._first_dirty is not None:
+                    timeout = min(timeout, self._first_dirty + self.batch_ms / 1000 - now)
+                if self._inotify is not None:
+                    self._handle_events(self._inotify.read_events(int(max(0, timeout) * 1000)))
+                elif timeout > 0:
+                    self.msleep(int(min(timeout, 0.5) * 1000))  # 分段等待以便及时响应停止
+                now = time.monotonic()
+                if now >= next_poll:
+                    self._poll_cold()
+                    self._promote_cold()
+                    next_poll = time.monotonic() + self.poll_interval
+                if self._dirty and (len(self._dirty) >= MAX_BATCH_DIRS or
+                                    now - self._first_dirty >= self.batch_ms / 1000):
+                    self._flush()
+        finally:
+            if self._inotify is not None:
+                self._inotify.close()
+                self._inotify = None
+
+    # ---------- 监视与轮询 ----------
+    def _watch_roots(self):
+        """按广度优先为根目录树建立监视（越浅的目录越先获得监视），并核对索引是否落后于磁盘"""
+        for root in self.roots:
+            if not self._is_running:
+                return
+            self._add_tree(root)
+        self.status_changed.emit(len(self._path_wd), len(self._cold))
+        logger.info(f"目录监视已启动：inotify 监视 {len(self._path_wd)} 个目录，轮询 {len(self._cold)} 个目录")
+        self._catch_up()
+
+    def _add_tree(self, path: str) -> list:
+        """为 path 及其子目录建立监视（监视数用完后剩余子树改为轮询），返回新加入的目录"""
+        added = []
+        try:
+            root_dev = os.stat(path).st_dev
+        except OSError:
+            return added
+        queue = deque([path])
+        while queue and self._is_running:
+            folder = queue.popleft()
+            if folder in self._path_wd or folder in self._cold:
+                continue
+            self._watch_dir(folder)
+            if folder not in self._path_wd and folder not in self._cold:
+                continue  # 无法访问
+            added.append(folder)
+            parent = os.path.dirname(folder)
+            if parent != folder:
+                self._children[parent].add(folder)
+            try:
+                with os.scandir(folder) as entries:
+                    for entry in entries:
+                        try:
+                            if entry.is_dir(follow_symlinks=False) and entry.stat(follow_symlinks=False).st_dev == root_dev:
+                                queue.append(entry.path)  # 不进入其他挂载点
+                        except OSError:
+                            continue
+            except OSError:
+                continue
+        return added
+
+    def _watch_dir(self, folder: str):
+        """为目录建立 inotify 监视；达到上限或不支持时加入轮询"""
+        if len(self._path_wd) < self.max_watches:
+            try:
+                wd = self._inotify.add_watch(folder)
+                self._wd_path[wd] = folder
+                self._path_wd[folder] = wd
+                return
+            except OSError as e:
+                if e.errno == errno.ENOSPC:  # 内核上限（其他程序也在占用）：以当前数量为准
+                    logger.warning(f"inotify 监视数达到系统上限（{len(self._path_wd)}），其余目录改为轮询")
+                    self.max_watches = len(self._path_wd)
+                elif e.errno in (errno.ENOENT, errno.ENOTDIR, errno.EACCES):
+                    return
+        try:
+            self._cold[folder] = os.stat(folder).st_mtime
+        except OSError:
+            pass
+
+    def _forget_tree(self, path: str):
+        """目录被删除或移走：移除其子树的监视与轮询记录"""
+        stack = [path]
+        while stack:
+            folder = stack.pop()
+            stack.extend(self._children.pop(folder, ()))
+            wd = self._path_wd.pop(folder, None)
+            if wd is not None:
+                del self._wd_path[wd]
+                self._inotify.rm_watch(wd)
+            self._cold.pop(folder, None)
+        parent = os.path.dirname(path)
+        if parent in self._children:
+            self._children[parent].discard(path)
+
+    def _handle_events(self, events: list):
+        for wd, mask, _cookie, name in events:
+            if mask & inotify.IN_Q_OVERFLOW:  # 事件队列溢出：所有监视的目录都重新核对
+                logger.warning("inotify 事件队列溢出，重新核对所有监视的目录")
+                self._mark_dirty(*self._path_wd)
+                continue
+            path = self._wd_path.get(wd)
+            if path is None:
+                continue
+            if mask & inotify.IN_IGNORED:  # 监视已被内核移除（目录已删除）
+                del self._wd_path[wd]
+                if self._path_wd.get(path) == wd:
+                    del self._path_wd[path]
+                continue
+            if mask & (inotify.IN_DELETE_SELF | inotify.IN_MOVE_SELF):
+                if path in self.roots:  # 根目录本身被删除/移走（其他目录由上级目录的事件处理）
+                    self._forget_tree(path)
+                    self._mark_dirty(path)
+                continue
+            self._mark_dirty(path)
+            if mask & inotify.IN_ISDIR:
+                child = os.path.join(path, name)
+                if mask & (inotify.IN_CREATE | inotify.IN_MOVED_TO):
+                    self._add_tree(child)
+                elif mask & (inotify.IN_DELETE | inotify.IN_MOVED_FROM):
+                    self._forget_tree(child)
+
+    def _poll_cold(self):
+        """轮询冷子树：比较目录修改时间（可发现条目增删与改名，文件内容的原地修改要等该目录下次变化）"""
+        for count, (folder, mtime) in enumerate(list(self._cold.items())):
+            if not self._is_running:
+                return
+            if count % POLL_SLICE == 0 and self._inotify is not None:
+                self._handle_events(self._inotify.read_events(0))  # 轮询大量目录期间及时读取事件，避免内核队列溢出
+            if folder not in self._cold:
+                continue  # 已随上级目录一起移除
+            try:
+                current = os.stat(folder).st_mtime
+            except OSError:
+                self._forget_tree(folder)
+                self._mark_dirty(folder, os.path.dirname(folder))
+                continue
+            if current == mtime:
+                continue
+            self._cold[folder] = current
+            self._mark_dirty(folder)
+            known = self._children.get(folder, set())
+            entries = _scan_dir(folder) or []
+            subdirs = {os.path.join(folder, name) for name, is_dir, _size, _mtime in entries if is_dir}
+            for child in known - subdirs:
+                self._forget_tree(child)
+            for child in subdirs - known:
+                self._add_tree(child)
+
+    def _promote_cold(self):
+        """有空余的监视数时（监视的目录被删除后），把最浅的轮询目录改为 inotify 监视"""
+        free = self.max_watches - len(self._path_wd)
+        if free <= 0 or not self._cold or self._inotify is None:
+            return
+        for folder in sorted(self._cold, key=lambda path: path.count(os.sep))[:free]:
+            mtime = self._cold.pop(folder)
+            self._watch_dir(folder)
+            if folder in self._path_wd:
+                try:
+                    if os.stat(folder).st_mtime != mtime:  # 转换期间的变化
+                        self._mark_dirty(folder)
+                except OSError:
+                    pass
+        self.status_changed.emit(len(self._path_wd), len(self._cold))
+
+    def _mark_dirty(self, *paths):
+        if self._first_dirty is None:
+            self._first_dirty = time.monotonic()
+        self._dirty.update(paths)
+
+    # ---------- 同步到索引 ----------
+    def _catch_up(self):
+        """启动时核对索引：索引中记录的目录修改时间与磁盘不一致的目录（程序未运行期间的变化）加入变化集合"""
+        for root, db_path in self.roots.items():
+            folders = [folder for folder in list(self._path_wd) + list(self._cold)
+                       if folder == root or folder.startswith(root.rstrip(os.sep) + os.sep)]
+            for start in range(0, len(folders), CATCH_UP_SLICE):
+                chunk = folders[start:start + CATCH_UP_SLICE]
+                if not self._is_running or not self._catch_up_slice(root, db_path, chunk):
+                    break
+                if self._inotify is not None:
+                    self._handle_events(self._inotify.read_events(0))
+
+    def _catch_up_slice(self, root: str, db_path: str, folders: list) -> bool:
+        """核对一段目录（每段单独打开索引，段之间不占用索引文件）；索引不可用时返回 False"""
+        with self.index_lock:
+            index = FilenameIndex(root, db_path)
+            if not index.prepare_updates():
+                return False
+            try:
+                for folder in folders:
+                    try:
+                        if index.indexed_dir_mtime(folder) != os.stat(folder).st_mtime:
+                            self._mark_dirty(folder)
+                    except OSError:
+                        continue
+            except sqlite3.Error as e:
+                logger.error(f"核对文件名索引失败 {db_path}：{str(e)}")
+                return False
+            finally:
+                index.close()
+        return True
+
+    def _flush(self):
+        dirs = sorted(self._dirty)
+        self._dirty.clear()
+        self._first_dirty = None
+        for root, db_path in self.roots.items():
+            prefix = root.rstrip(os.sep) + os.sep
+            under = [folder for folder in dirs if folder == root or folder.startswith(prefix)]
+            if under:
+                self._sync_index(root, db_path, under)
+        self.dirs_changed.emit(dirs)
+
+    def _sync_index(self, root: str, db_path: str, dirs: list):
+        """重新扫描变化的目录并同步到文件名索引（新增的子文件夹递归扫描），一批一个事务"""
+        if not os.path.exists(db_path):
+            return  # 该卷尚未建立索引
+        with self.index_lock:
+            index = FilenameIndex(root, db_path)
+            if not index.prepare_updates():
+                return
+            try:
+                queue = list(reversed(dirs))
+                while queue:
+                    folder = queue.pop()
+                    entries = _scan_dir(folder)
+                    try:
+                        mtime = os.stat(folder).st_mtime if entries is not None else None
+                    except OSError:
+                        mtime = None
+                    queue.extend(index.sync_dir(folder, entries, mtime))
+                index.commit()
+            except sqlite3.Error as e:
+                logger.error(f"更新文件名索引失败 {db_path}：{str(e)}")
+            finally:
+                index.close()
+
+
+class TreeWatcher(QObject):
+    """
+    后台目录树监视服务：让文件名索引与文件夹大小缓存随磁盘变化保持最新（代替定期重建）
+    - Linux 下使用递归 inotify 监视；监视数受内核每用户上限限制，超出部分（最深的子树）改为定期轮询目录修改时间，
+      有监视被释放时再把最浅的轮询目录改回 inotify；其他平台全部轮询
+    - 事件按目录合并，每批（batch_ms）只重新扫描有变化的目录：文件名索引在后台线程中增量同步，
+      主线程收到 dirs_changed 后使这些目录及其上级目录的大小缓存失效
+    """
+    dirs_changed = Signal(list)  # 有变化的目录（按路径排序）
+    status_changed = Signal(int, int)  # (inotify 监视的目录数, 轮询的目录数)
+
+    def __init__(self, parent=None, max_watches: int = 0, batch_ms: int = 1000, poll_interval_s: float = 30):
+        super().__init__(parent)
+        self.max_watches = max_watches or int(inotify.max_user_watches() * WATCH_SHARE)
+        self.batch_ms = batch_ms
+        self.poll_interval_s = poll_interval_s
+        self._thread = None
+        self._paused_lock = None
+
+    def start(self, roots: list):
+        """开始监视这些目录（替换之前的监视范围）"""
+        self.stop()
+        folders = {}
+        for root in roots:
+            root = os.path.normpath(root)
+            if not os.path.isdir(root):
+                logger.warning(f"监视目录不存在，已忽略：{root}")
+                continue
+            volume = os.path.normpath(QStorageInfo(root).rootPath() or root)
+            folders[root] = index_path_for(volume)
+        if not folders:
+            return
+        self._thread = _TreeWatcherThread(folders, self.max_watches, self.batch_ms, self.poll_interval_s, self)
+        self._thread.dirs_changed.connect(self.dirs_changed)
+        self._thread.status_changed.connect(self.status_changed)
+        self._thread.start(QThread.Priority.LowPriority)
+
+    def is_running(self) -> bool:
+        return self._thread is not None
+
+    def pause_index_updates(self, timeout_s: float = 0) -> bool:
+        """
+        暂停同步文件名索引（替换索引文件前调用，之后须调用 resume_index_updates）
+        :return: 监视线程在 timeout_s 秒内仍占用索引时返回 False（未暂停）
+        """
+        if self._thread is None or self._paused_lock is not None:
+            return True
+        if not self._thread.index_lock.acquire(timeout=timeout_s):
+            return False
+        self._paused_lock = self._thread.index_lock
+        return True
+
+    def resume_index_updates(self):
+        if self._paused_lock is not None:
+            self._paused_lock.release()
+            self._paused_lock = None
+
+    def stop(self):
+        """停止监视并等待线程退出（尚未处理的变化丢弃，下次启动时由索引核对补上）"""
+        if self._thread is None:
+            return
+        self.resume_index_updates()
+        self._thread.stop()
+        self._thread.wait()
+        self._thread.deleteLater()
+        self._thread = None
@@ -0,0 +1,100 @@
+"""
+文件内容搜索的工作进程函数（由进程池调用，只依赖标准库，子进程无需导入 Qt）
+"""
+import re
+import mmap
+from functools import lru_cache
+
+CHUNK_SIZE = 16 * 1024 * 1024  # 大文件按该大小分块，由多个进程并行扫描
+SNIFF_BYTES = 8192  # 文件开头检查的字节数（含 NUL 字节视为二进制文件）
+PREVIEW_BYTES = 240  # 命中行预览的最大字节数
+STATUS_OK, STATUS_BINARY, STATUS_ERROR = 0, 1, 2
+
+
+@lru_cache(maxsize=8)
+def compile_pattern(text: str, use_regex: bool, case_sensitive: bool):
+    """
+    查询文本 -> 字节正则（每个工作进程按参数缓存）
+    - 普通文本含非 ASCII 字符时同时匹配 UTF-8 与 GBK 编码（中文 Windows 下常见的旧文本文件）
+    """
+    flags = 0 if case_sensitive else re.IGNORECASE
+    if use_regex:
+        return re.compile(text.encode("utf-8"), flags)
+    encodings = [text.encode("utf-8")]
+    try:
+        gbk = text.encode("gbk")
+        if gbk != encodings[0]:
+            encodings.append(gbk)
+    except UnicodeEncodeError:
+        pass
+    return re.compile(b"|".join(re.escape(encoded) for encoded in encodings), flags)
+
+
+def scan_pieces(pieces: list, text: str, use_regex: bool, case_sensitive: bool, max_hits: int) -> list:
+    """
+    扫描一批文件片段（工作进程入口）
+    :param pieces: [(路径, 起始偏移, 结束偏移)]，整个文件为 (路径, 0, -1)
+    :return: [(路径, 起始偏移, 状态, 扫描字节数, 片段内换行数, [(片段内行号, 预览)])]
+    """
+    regex = compile_pattern(text, use_regex, case_sensitive)
+    return [_scan_piece(path, start, end, regex, max_hits) for path, start, end in pieces]
+
+
+def _scan_piece(path: str, start: int, end: int, regex, max_hits: int):
+    try:
+        with open(path, "rb") as f:
+            if b"\0" in f.read(SNIFF_BYTES):  # 每个分块都检查文件开头（系统已缓存，开销很小）
+                return path, start, STATUS_BINARY, 0, 0, []
+            f.seek(0, 2)
+            size = f.tell()
+            if size == 0:
+                return path, start, STATUS_OK, 0, 0, []
+            with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+                return (path, start, STATUS_OK) + _scan_range(mm, size, start, end, regex, max_hits)
+    except (OSError, ValueError):
+        return path, start, STATUS_ERROR, 0, 0, []
+
+
+def _line_boundary(mm, size: int, offset: int) -> int:
+    """offset 所在行之后的下一行开头（每一行归属于其开头所在的分块，相邻分块边界一致）"""
+    if offset <= 0:
+        return 0
+    if offset >= size:
+        return size
+    newline = mm.find(b"\n", offset - 1)
+    return size if newline < 0 else newline + 1
+
+
+def _scan_range(mm, size: int, start: int, end: int, regex, max_hits: int) -> tuple:
+    """扫描 [start, end) 调整到行边界后的范围，返回 (扫描字节数, 换行数, 命中)"""
+    begin = _line_boundary(mm, size, start)
+    stop = size if end < 0 else _line_boundary(mm, size, end)
+    hits = []
+    line = 0  # 片段内行号（从 0 开始，由调用方加上前面分块的换行数）
+    counted = begin  # 已统计换行数的位置
+    position = begin
+    while position < stop and len(hits) < max_hits:
+        match = regex.search(mm, position, stop)
+        if match is None:
+            break
+        line_start = max(mm.rfind(b"\n", begin, match.start()) + 1, begin)
+        line_end = mm.find(b"\n", match.start(), stop)
+        if line_end < 0:
+            line_end = stop
+        line += mm[counted:line_start].count(b"\n")
+        counted = line_start
+        hits.append((line, _decode_preview(mm[line_start:min(line_end, line_start + PREVIEW_BYTES)])))
+        position = line_end + 1  # 每行只报告一次
+    newlines = line + mm[counted:stop].count(b"\n")
+    return stop - begin, newlines, hits
+
+
+def _decode_preview(data: bytes) -> str:
+    try:
+        text = data.decode("utf-8")
+    except UnicodeDecodeError as e:
+        if e.start >= len(data) - 3:  # 预览截断在多字节字符中间
+            text = data[:e.start].decode("utf-8", errors="replace")
+        else:
+            text = data.decode("gbk", errors="replace")
+    return text.strip()
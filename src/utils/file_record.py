@@ -0,0 +1,77 @@
+import os
+import sys
+import stat
+from utils.file_utils import EXT_TO_TYPE, FILE_TYPE_IDS, FOLDER_TYPE_ID
+from utils.sort_utils import name_sort_key
+
+# 每条记录的内存预算（字节）：记录对象 + 名称字符串 + 名称排序键 + 大小 + 修改时间，按名称不超过 64 个 ASCII 字符计
+# （扩展名已驻留、类型编号为小整数、布尔值为单例，均不计入单条记录）
+RECORD_MEMORY_BUDGET = 448
+
+_ext_type_ids = {}  # {已驻留的扩展名: 类型编号}
+
+
+class FileRecord:
+    """
+    目录条目的紧凑扫描记录（替代逐条目的 5 键字典）
+    - 每个条目只调用一次 stat，隐藏属性、类型编号与名称排序键在扫描时一次算好
+    - 不存储完整路径（路径 = 所在目录 + name）
+    """
+    __slots__ = ("name", "is_dir", "size", "mtime", "hidden", "type_id", "ext", "sort_key")
+
+    def __init__(self, name: str, is_dir: bool, size: int, mtime: float, hidden: bool, ext: str):
+        self.name = name
+        self.is_dir = is_dir
+        self.size = size
+        self.mtime = mtime
+        self.hidden = hidden
+        self.ext = ext  # 小写扩展名（已驻留，同扩展名的记录共享同一字符串）
+        self.type_id = FOLDER_TYPE_ID if is_dir else _type_id_of_ext(ext)
+        self.sort_key = name_sort_key(name)  # 名称排序键（随记录缓存，排序时不再重复计算）
+
+    def __repr__(self):
+        return f"FileRecord({self.name!r}, is_dir={self.is_dir}, size={self.size}, mtime={self.mtime})"
+
+
+def _type_id_of_ext(ext: str) -> int:
+    type_id = _ext_type_ids.get(ext)
+    if type_id is None:
+        type_id = _ext_type_ids[ext] = FILE_TYPE_IDS[EXT_TO_TYPE.get(ext, 'default')]
+    return type_id
+
+
+def scan_record(entry):
+    """由 DirEntry 构建扫描记录（只 stat 一次；无法访问的条目返回 None）"""
+    try:
+        st = entry.stat()
+    except OSError:
+        try:
+            st = entry.stat(follow_symlinks=False)  # 失效的符号链接：使用链接自身信息
+        except OSError:
+            return None
+    name = entry.name
+    is_dir = stat.S_ISDIR(st.st_mode)
+    hidden = name.startswith('.')
+    if not hidden and sys.platform == "win32":
+        # Windows：DirEntry.stat 已包含文件属性，无需再调用 GetFileAttributes
+        hidden = bool(getattr(st, "st_file_attributes", 0) & stat.FILE_ATTRIBUTE_HIDDEN)
+    ext = '' if is_dir else sys.intern(os.path.splitext(name)[1].lower())
+    return FileRecord(name, is_dir, st.st_size, st.st_mtime, hidden, ext)
+
+
+def scan_directory_records(path: str, show_hidden: bool, is_running=None):
+    """逐条产出目录扫描记录（按显示隐藏文件设置过滤；is_running 返回 False 时中止）"""
+    with os.scandir(path) as entries:
+        for entry in entries:
+            if is_running is not None and not is_running():
+                return
+            record = scan_record(entry)
+            if record is None or (record.hidden and not show_hidden):
+                continue
+            yield record
+
+
+def record_memory_bytes(record: FileRecord) -> int:
+    """估算单条记录占用的内存（与 RECORD_MEMORY_BUDGET 对照）"""
+    return (sys.getsizeof(record) + sys.getsizeof(record.name) + sys.getsizeof(record.sort_key)
+            + sys.getsizeof(record.size) + sys.getsizeof(record.mtime))
@@ -1,5 +1,7 @@
 import os
 import sys  # 新增：用于判断操作系统
+import time
+from functools import lru_cache
 # 原有的 win32api/win32con 导入保留，但增加条件判断
 if sys.platform == "win32":
     import win32api
@@ -39,6 +41,11 @@ for file_type, exts in _original_type_map.items():
     for ext in exts:
         EXT_TO_TYPE[ext.lower()] = file_type  # 统一小写处理扩展名
 
+# 文件类型编号（列式存储中用1字节类型id代替类型字符串）
+FILE_TYPES = list(dict.fromkeys(['default', 'folder', *_original_type_map]))
+FILE_TYPE_IDS = {file_type: type_id for type_id, file_type in enumerate(FILE_TYPES)}
+FOLDER_TYPE_ID = FILE_TYPE_IDS['folder']
+
 def get_file_type(filename):
     """优化后的文件类型判断（O(1)时间复杂度）"""
     ext = os.path.splitext(filename)[1].lower()
@@ -53,6 +60,22 @@ def format_size(size):
         unit_index += 1
     return f'{size:.2f}{units[unit_index]}'
 
+# 显示文本备忘录上限（按值缓存：大量文件共享相同大小或同一分钟的修改时间）
+DISPLAY_MEMO_SIZE = 4096
+
+@lru_cache(maxsize=DISPLAY_MEMO_SIZE)
+def format_size_cached(size):
+    """格式化文件大小（按大小值备忘，用于列表显示）"""
+    return format_size(size)
+
+@lru_cache(maxsize=DISPLAY_MEMO_SIZE)
+def _format_mtime_minute(minute):
+    return time.strftime("%Y-%m-%d %H:%M", time.localtime(minute * 60))
+
+def format_mtime(mtime):
+    """格式化修改时间为 "2024-06-01 12:34"（按分钟备忘；0 表示未知，返回空串）"""
+    return _format_mtime_minute(int(mtime // 60)) if mtime else ""
+
 def create_char_icon(char):
     """生成字符图标"""
     size = 32
@@ -0,0 +1,176 @@
+import re
+import heapq
+
+# 评分参数（参考 fzf）：每个匹配字符得分，单词开头/驼峰/数字开头加分，连续匹配加分，间隔扣分
+SCORE_MATCH = 16
+BONUS_BOUNDARY = 8  # 名称开头或分隔符之后
+BONUS_CAMEL = 7  # 小写后的大写字母、字母后的数字
+BONUS_CONSECUTIVE = 4  # 紧接上一个匹配字符
+BONUS_FIRST_CHAR_MULTIPLIER = 2  # 第一个模式字符的位置加分翻倍
+PENALTY_GAP_START = -3
+PENALTY_GAP_EXTENSION = -1
+PENALTY_DEPTH = -4  # 路径候选：最后一个匹配字符之后每多一级目录扣分（匹配越靠近末级名称越好）
+SEPARATORS = frozenset(" _-.,:;/\\()[]{}'\"+")
+PATH_SEPARATORS = "/\\"
+REFINE_FACTOR = 4  # 粗评分后取前 k × 该倍数个候选做精确评分
+QUICK_SCORE_LIMIT = 20_000  # 粗评分的候选数上限
+
+
+class FuzzyMatcher:
+    """
+    fzf 风格的子序列模糊匹配（不区分大小写）：如 "qrfv3" 匹配 "quarterly_report_final_v3.xlsx"
+    - quick_score：最左匹配后反向收紧得到最短窗口，按该对齐计分（只用 find/rfind，开销小）
+    - score：动态规划求最佳对齐（单词开头与连续匹配优先），只用于粗评分排名靠前的候选
+    """
+    def __init__(self, pattern: str):
+        self.pattern = "".join(pattern.split()).casefold()  # 空白不参与匹配
+        head = re.escape(self.pattern[:1])
+        # 子序列正则：以首字符开头（正则引擎可直接跳到该字符），[^b]*b 只找下一个模式字符，不回溯
+        self.regex = re.compile(head + "".join(
+            f"[^{re.escape(ch)}]*{re.escape(ch)}" for ch in self.pattern[1:]))
+        # 首字符位于单词开头（名称开头或分隔符之后）：候选过多时据此缩小粗评分范围
+        self.boundary_regex = re.compile(f"^{head}|[{re.escape(''.join(sorted(SEPARATORS)))}]{head}")
+
+    def quick_score(self, folded: str, text: str):
+        """按最短窗口对齐计分（folded 为折叠后的文本，text 为原文），不匹配时返回 None"""
+        pattern = self.pattern
+        index = -1
+        for ch in pattern:
+            index = folded.find(ch, index + 1)
+            if index < 0:
+                return None
+        positions = [0] * len(pattern)
+        positions[-1] = index
+        for i in range(len(pattern) - 2, -1, -1):
+            index = folded.rfind(pattern[i], 0, index)
+            positions[i] = index
+        bonus_text = text if len(text) == len(folded) else folded  # casefold 改变长度时不计驼峰加分
+        score = 0
+        previous = -2
+        for i, position in enumerate(positions):
+            bonus = _bonus(bonus_text, position)
+            if i == 0:
+                score += bonus * BONUS_FIRST_CHAR_MULTIPLIER
+            elif position == previous + 1:
+                score += max(bonus, BONUS_CONSECUTIVE)
+            else:
+                score += bonus + PENALTY_GAP_START + PENALTY_GAP_EXTENSION * (position - previous - 2)
+            previous = position
+        return score + SCORE_MATCH * len(pattern) + _depth_penalty(folded, previous)
+
+    def score(self, folded: str, text: str):
+        """
+        最佳对齐的得分（动态规划，只在模式字符出现的位置上计算），不匹配时返回 None
+        间隔扣分是线性的，因此“隔开若干字符接上前一个匹配”的最佳值可随位置递增维护前缀最大值
+        """
+        pattern = self.pattern
+        if not pattern:
+            return None
+        bonus_text = text if len(text) == len(folded) else folded
+        previous = {j: SCORE_MATCH + _bonus(bonus_text, j) * BONUS_FIRST_CHAR_MULTIPLIER
+                    for j in _occurrences(folded, pattern[0], 0)}  # {位置: 以该位置结尾的最佳得分}
+        for ch in pattern[1:]:
+            if not previous:
+                return None
+            ends = list(previous.items())
+            current = {}
+            best_gap = None  # max(得分 - 扣分斜率 × 位置)，只包含位置 <= j - 2 的前一匹配
+            k = 0
+            for j in _occurrences(folded, ch, ends[0][0] + 1):
+                while k < len(ends) and ends[k][0] <= j - 2:
+                    value = ends[k][1] - PENALTY_GAP_EXTENSION * ends[k][0]
+                    best_gap = value if best_gap is None or value > best_gap else best_gap
+                    k += 1
+                bonus = _bonus(bonus_text, j)
+                best = None
+                if best_gap is not None:
+                    best = best_gap + PENALTY_GAP_START + PENALTY_GAP_EXTENSION * (j - 2) + bonus
+                consecutive = previous.get(j - 1)
+                if consecutive is not None:
+                    consecutive += max(bonus, BONUS_CONSECUTIVE)
+                    best = consecutive if best is None or consecutive > best else best
+                if best is not None:
+                    current[j] = best + SCORE_MATCH
+            previous = current
+        if not previous:
+            return None
+        return max(value + _depth_penalty(folded, j) for j, value in previous.items())
+
+
+class FuzzyIndex:
+    """
+    一组候选文本（如当前列表的名称列、历史路径）的批量模糊排名
+    - 预筛选先用首字符子串测试，再对剩余候选调用一次编译好的子序列正则（均在 C 层完成）；继续输入时只在上一次的匹配中筛选
+    - 通过预筛选的候选先粗评分，只对排名靠前的候选做精确评分，最终只返回前 k 个
+    - 匹配数超过 QUICK_SCORE_LIMIT 时（通常是只输入了一两个字符），只粗评分首字符位于单词开头的候选
+      （首字符加分翻倍，这类候选得分普遍更高），仍过多时优先较短的名称
+    """
+    def __init__(self, texts: list, folded: list = None):
+        self.texts = texts
+        self.folded = folded if folded is not None else [text.casefold() for text in texts]
+
+    def __len__(self):
+        return len(self.texts)
+
+    def matching(self, matcher: FuzzyMatcher, candidates=None) -> list:
+        """
+        子序列预筛选：返回匹配的候选下标（保持 candidates 的顺序）
+        :param candidates: 只在这些下标中筛选（如上一次匹配的结果），为 None 时筛选全部
+        """
+        folded = self.folded
+        if candidates is None:
+            candidates = range(len(folded))
+        head = matcher.pattern[:1]
+        candidates = [i for i in candidates if head in folded[i]]  # 先用子串测试排除不含首字符的候选（比正则快）
+        if len(matcher.pattern) == 1:
+            return candidates
+        search = matcher.regex.search
+        return [i for i in candidates if search(folded[i])]
+
+    def top_k(self, matcher: FuzzyMatcher, k: int, candidates=None):
+        """
+        排名前 k 的候选
+        :return: ([(得分, 下标)]（得分从高到低，同分时较短的文本在前）, 全部匹配的下标)
+        """
+        matches = self.matching(matcher, candidates)
+        folded, texts = self.folded, self.texts
+        pool = matches
+        if len(pool) > QUICK_SCORE_LIMIT:
+            boundary = matcher.boundary_regex.search
+            pool = [i for i in pool if boundary(folded[i])] or pool
+            if len(pool) > QUICK_SCORE_LIMIT:
+                pool = sorted(pool, key=lambda i: len(folded[i]))[:QUICK_SCORE_LIMIT]
+        quick = matcher.quick_score
+        scored = [(quick(folded[i], texts[i]), -len(folded[i]), i) for i in pool]
+        refined = [(matcher.score(folded[i], texts[i]), length, i)
+                   for _score, length, i in heapq.nlargest(k * REFINE_FACTOR, scored)]
+        top = heapq.nlargest(k, refined)
+        return [(score, i) for score, _length, i in top], matches
+
+
+def _bonus(text: str, position: int) -> int:
+    """位置加分：开头/分隔符之后 > 驼峰/数字开头 > 其他"""
+    if position == 0:
+        return BONUS_BOUNDARY
+    previous, current = text[position - 1], text[position]
+    if previous in SEPARATORS:
+        return BONUS_BOUNDARY
+    if (previous.islower() and current.isupper()) or (current.isdigit() and not previous.isdigit()):
+        return BONUS_CAMEL
+    return 0
+
+
+def _occurrences(text: str, ch: str, start: int):
+    """ch 在 text 中从 start 起的所有位置"""
+    index = text.find(ch, start)
+    while index >= 0:
+        yield index
+        index = text.find(ch, index + 1)
+
+
+def _depth_penalty(folded: str, last_position: int) -> int:
+    """路径候选中最后一个匹配字符之后的目录层数扣分（普通名称不含路径分隔符，不扣分）"""
+    depth = 0
+    for separator in PATH_SEPARATORS:
+        depth += folded.count(separator, last_position + 1)
+    return depth * PENALTY_DEPTH
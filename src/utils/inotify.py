@@ -0,0 +1,125 @@
+"""
+Linux inotify 的 ctypes 封装（无第三方依赖；其他平台 available() 返回 False，由调用方退回轮询）
+"""
+import os
+import sys
+import errno
+import select
+import struct
+import ctypes
+import ctypes.util
+
+IN_ATTRIB = 0x00000004
+IN_CLOSE_WRITE = 0x00000008
+IN_MOVED_FROM = 0x00000040
+IN_MOVED_TO = 0x00000080
+IN_CREATE = 0x00000100
+IN_DELETE = 0x00000200
+IN_DELETE_SELF = 0x00000400
+IN_MOVE_SELF = 0x00000800
+IN_Q_OVERFLOW = 0x00004000
+IN_IGNORED = 0x00008000
+IN_ONLYDIR = 0x01000000
+IN_DONT_FOLLOW = 0x02000000
+IN_EXCL_UNLINK = 0x04000000
+IN_ISDIR = 0x40000000
+IN_NONBLOCK = 0o4000
+IN_CLOEXEC = 0o2000000
+
+# 目录监视使用的事件：条目增删/改名、写入完成、属性（含修改时间）变化、目录自身被删除/移动
+WATCH_MASK = (IN_ATTRIB | IN_CLOSE_WRITE | IN_MOVED_FROM | IN_MOVED_TO | IN_CREATE | IN_DELETE |
+              IN_DELETE_SELF | IN_MOVE_SELF | IN_ONLYDIR | IN_DONT_FOLLOW | IN_EXCL_UNLINK)
+_EVENT_HEADER = struct.Struct("iIII")  # wd, mask, cookie, len
+_READ_SIZE = 256 * 1024
+MAX_USER_WATCHES_PATH = "/proc/sys/fs/inotify/max_user_watches"
+
+_libc = None
+
+
+def _load_libc():
+    global _libc
+    if _libc is None and sys.platform.startswith("linux"):
+        try:
+            libc = ctypes.CDLL(ctypes.util.find_library("c") or "libc.so.6", use_errno=True)
+            libc.inotify_init1, libc.inotify_add_watch, libc.inotify_rm_watch
+        except (OSError, AttributeError):
+            return None
+        libc.inotify_add_watch.argtypes = [ctypes.c_int, ctypes.c_char_p, ctypes.c_uint32]
+        libc.inotify_rm_watch.argtypes = [ctypes.c_int, ctypes.c_int]
+        _libc = libc
+    return _libc
+
+
+def available() -> bool:
+    return _load_libc() is not None
+
+
+def max_user_watches() -> int:
+    """内核允许每个用户创建的监视数（读取失败时返回 8192，即旧内核的默认值）"""
+    try:
+        with open(MAX_USER_WATCHES_PATH) as f:
+            return int(f.read().strip())
+    except (OSError, ValueError):
+        return 8192
+
+
+class Inotify:
+    """一个 inotify 实例：add_watch/rm_watch 管理目录监视，read_events 等待并读取事件（可由 wake 从其他线程唤醒）"""
+    def __init__(self):
+        libc = _load_libc()
+        if libc is None:
+            raise OSError(errno.ENOSYS, "inotify 不可用")
+        self._libc = libc
+        self.fd = libc.inotify_init1(IN_NONBLOCK | IN_CLOEXEC)
+        if self.fd < 0:
+            raise OSError(ctypes.get_errno(), "inotify_init1 失败")
+        self._wake_read, self._wake_write = os.pipe()
+        self._poll = select.poll()
+        self._poll.register(self.fd, select.POLLIN)
+        self._poll.register(self._wake_read, select.POLLIN)
+
+    def add_watch(self, path: str, mask: int = WATCH_MASK) -> int:
+        """添加监视，返回监视描述符；达到监视数上限时抛出 errno 为 ENOSPC 的 OSError"""
+        wd = self._libc.inotify_add_watch(self.fd, os.fsencode(path), mask)
+        if wd < 0:
+            code = ctypes.get_errno()
+            raise OSError(code, os.strerror(code), path)
+        return wd
+
+    def rm_watch(self, wd: int):
+        self._libc.inotify_rm_watch(self.fd, wd)  # 目录已删除时内核已自动移除，忽略错误
+
+    def read_events(self, timeout_ms: int) -> list:
+        """等待最多 timeout_ms 毫秒，返回 [(wd, mask, cookie, 名称)]（超时或被唤醒时可能为空）"""
+        ready = self._poll.poll(max(0, timeout_ms))
+        events = []
+        for fd, _flags in ready:
+            if fd == self._wake_read:
+                os.read(self._wake_read, 64)
+                continue
+            while True:
+                try:
+                    data = os.read(self.fd, _READ_SIZE)
+                except BlockingIOError:
+                    break
+                offset = 0
+                while offset < len(data):
+                    wd, mask, cookie, length = _EVENT_HEADER.unpack_from(data, offset)
+                    offset += _EVENT_HEADER.size
+                    name = os.fsdecode(data[offset:offset + length].rstrip(b"\0"))
+                    offset += length
+                    events.append((wd, mask, cookie, name))
+                if len(data) < _READ_SIZE:
+                    break
+        return events
+
+    def wake(self):
+        """唤醒正在 read_events 中等待的线程"""
+        os.write(self._wake_write, b"\0")
+
+    def close(self):
+        for fd in (self.fd, self._wake_read, self._wake_write):
+            try:
+                os.close(fd)
+            except OSError:
+                pass
@@ -7,10 +7,28 @@ default_shortcuts = [
     # 高频导航操作（用户最常用）
     {
         "keys": (Qt.KeyboardModifier.AltModifier, Qt.Key.Key_Left),
+        "callback": lambda main_window: main_window.navigate_back,
+        "target_widget": None,
+        "description": "后退"
+    },
+    {
+        "keys": (Qt.KeyboardModifier.AltModifier, Qt.Key.Key_Right),
+        "callback": lambda main_window: main_window.navigate_forward,
+        "target_widget": None,
+        "description": "前进"
+    },
+    {
+        "keys": (Qt.KeyboardModifier.AltModifier, Qt.Key.Key_Up),
         "callback": lambda main_window: main_window.navigate_parent_dir,
         "target_widget": None,
         "description": "返回上级目录"
     },
+    {
+        "keys": (Qt.KeyboardModifier.NoModifier, Qt.Key.Key_Backspace),
+        "callback": lambda main_window: main_window.navigate_parent_dir,
+        "target_widget": lambda main_window: main_window.file_list,
+        "description": "返回上级目录（文件列表）"
+    },
     {
         "keys": (Qt.KeyboardModifier.ControlModifier, Qt.Key.Key_H),
         "callback": lambda main_window: main_window.navigate_home,
@@ -64,7 +82,7 @@ default_shortcuts = [
                 parent_widget=main_window,
                 current_path=main_window.current_path,
                 selected_items=main_window.file_list.selectedItems(),
-                update_callback=main_window.update_filelist,
+                update_callback=main_window.refresh_changes,
                 error_callback=lambda title, msg: QMessageBox.critical(main_window, title, msg)
             )
         ),
@@ -97,7 +115,7 @@ default_shortcuts = [
     # 界面控制操作（刷新/搜索/聚焦/列显隐）
     {
         "keys": (Qt.KeyboardModifier.NoModifier, Qt.Key.Key_F5),
-        "callback": lambda main_window: main_window.update_filelist,
+        "callback": lambda main_window: main_window.refresh_filelist,
         "target_widget": None,
         "description": "刷新界面"
     },
@@ -0,0 +1,65 @@
+import os
+from collections import OrderedDict
+
+DEFAULT_MAX_ENTRIES = 200_000  # 默认总条目上限（按 RECORD_MEMORY_BUDGET 估算约 90MB，不含列表模型中当前目录的数据）
+
+
+def get_dir_mtime(path: str) -> float:
+    """获取目录修改时间（失败时返回 0，视为缓存失效）"""
+    try:
+        return os.stat(path).st_mtime
+    except OSError:
+        return 0.0
+
+
+class ListingCache:
+    """
+    目录扫描结果的 LRU 缓存
+    - 键：(路径, 是否显示隐藏文件)
+    - 值：(扫描开始时的目录修改时间, 文件信息列表)
+    - 同时限制缓存目录数与总条目数，超出时淘汰最久未访问的目录
+      （条目上限由配置项 listing_cache_max_entries 设置，默认 DEFAULT_MAX_ENTRIES）
+    """
+    def __init__(self, max_dirs: int = 64, max_entries: int = DEFAULT_MAX_ENTRIES):
+        self.max_dirs = max_dirs
+        self.max_entries = max_entries
+        self._entries = OrderedDict()  # {(路径, 显示隐藏): (目录修改时间, 文件信息列表)}
+        self._entry_count = 0  # 当前缓存的文件信息总数
+
+    def get(self, path: str, show_hidden: bool):
+        """返回 (目录修改时间, 文件信息列表)，未缓存时返回 None"""
+        key = (path, show_hidden)
+        cached = self._entries.get(key)
+        if cached is not None:
+            self._entries.move_to_end(key)  # 标记为最近使用
+        return cached
+
+    def contains(self, path: str, show_hidden: bool) -> bool:
+        """是否已缓存（不影响淘汰顺序）"""
+        return (path, show_hidden) in self._entries
+
+    def put(self, path: str, show_hidden: bool, dir_mtime: float, file_list: list):
+        """写入扫描结果（单个目录超过条目上限时不缓存）"""
+        key = (path, show_hidden)
+        self._discard(key)
+        if len(file_list) > self.max_entries:
+            return
+        self._entries[key] = (dir_mtime, file_list)
+        self._entry_count += len(file_list)
+        while len(self._entries) > self.max_dirs or self._entry_count > self.max_entries:
+            _, (_, evicted) = self._entries.popitem(last=False)
+            self._entry_count -= len(evicted)
+
+    def invalidate(self, path: str):
+        """使指定目录的缓存失效（两种隐藏文件设置都清除）"""
+        for show_hidden in (False, True):
+            self._discard((path, show_hidden))
+
+    def clear(self):
+        self._entries.clear()
+        self._entry_count = 0
+
+    def _discard(self, key):
+        cached = self._entries.pop(key, None)
+        if cached is not None:
+            self._entry_count -= len(cached[1])
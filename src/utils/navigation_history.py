@@ -0,0 +1,46 @@
+class NavigationHistory:
+    """
+    后退/前进历史记录
+    每条记录为视图状态字典：{"path": 路径, "top": 首个可见项名称, "current": 当前项名称, "selected": [选中项名称]}
+    """
+    def __init__(self, max_size: int = 100):
+        self.max_size = max_size
+        self._back = []  # 后退栈（末尾为最近离开的目录）
+        self._forward = []  # 前进栈
+
+    def visit(self, state: dict):
+        """离开目录时记录其视图状态（新的导航会清空前进栈）"""
+        self._back.append(state)
+        del self._back[:-self.max_size]
+        self._forward.clear()
+
+    def back(self, current_state: dict):
+        """后退：返回目标视图状态，并把当前状态压入前进栈（无可后退时返回 None）"""
+        if not self._back:
+            return None
+        self._forward.append(current_state)
+        return self._back.pop()
+
+    def forward(self, current_state: dict):
+        """前进：返回目标视图状态，并把当前状态压入后退栈（无可前进时返回 None）"""
+        if not self._forward:
+            return None
+        self._back.append(current_state)
+        return self._forward.pop()
+
+    def can_go_back(self) -> bool:
+        return bool(self._back)
+
+    def can_go_forward(self) -> bool:
+        return bool(self._forward)
+
+    def visited_paths(self) -> list:
+        """历史记录中的目录（去重，最近访问的在前）"""
+        paths = []
+        seen = set()
+        for state in [*reversed(self._back), *reversed(self._forward)]:
+            path = state.get("path")
+            if path and path not in seen:
+                seen.add(path)
+                paths.append(path)
+        return paths
@@ -0,0 +1,261 @@
+import re
+import time
+import shlex
+import fnmatch
+from datetime import datetime
+from utils.file_utils import EXT_TO_TYPE
+
+# 大小单位（1024 进制，与 format_size 一致）
+SIZE_UNITS = {"": 1, "b": 1, "k": 1024, "kb": 1024, "m": 1024 ** 2, "mb": 1024 ** 2,
+              "g": 1024 ** 3, "gb": 1024 ** 3, "t": 1024 ** 4, "tb": 1024 ** 4}
+# 时间单位（modified:<7d 表示 7 天内修改过）
+AGE_UNITS = {"s": 1, "min": 60, "h": 3600, "d": 86400, "w": 7 * 86400, "mo": 30 * 86400, "y": 365 * 86400}
+_COMPARE = re.compile(r'^(>=|<=|>|<|=)?(.+)$')
+_NUMBER_UNIT = re.compile(r'^(\d+(?:\.\d+)?)\s*([a-z]*)$')
+_OPERATORS = {
+    ">": lambda a, b: a > b, ">=": lambda a, b: a >= b, "<": lambda a, b: a < b,
+    "<=": lambda a, b: a <= b, "=": lambda a, b: a == b,
+}
+
+
+class QueryError(ValueError):
+    """查询语法错误（消息可直接显示给用户）"""
+
+
+class SearchQuery:
+    """
+    编译后的搜索查询：谓词按代价分三级，依次执行，前一级不通过就不再执行后面的检查
+    1. 名称（子串/通配符/正则/扩展名/类型）：只看名称，无需任何系统调用
+    2. 是否文件夹：DirEntry.is_dir 通常来自目录枚举结果，无需 stat
+    3. 大小/修改时间：只有前两级都通过的候选才 stat
+    同一个查询可用于当前列表（matches_record）、递归遍历（matches_entry）与文件名索引（sql_filters + literals）
+    """
+    def __init__(self, text: str):
+        self.text = text
+        self.name_tests = []  # [(代价, test(折叠后的名称) -> bool)]
+        self.is_dir = None  # None：不限；True：只要文件夹；False：只要文件
+        # [(是否取反, ((字段 "size"/"mtime", 运算符, 值), ...))]：每个条件的各个边界同时成立才算满足，
+        # 取反作用于整个条件（-size:1KB..1MB 表示不在该区间内）
+        self.stat_tests = []
+        self.literals = []  # 名称中必须出现的字面子串（已折叠，索引据此筛选候选）
+        self.plain_text = None  # 查询只是一个普通子串时为该子串（当前列表可走增量过滤）
+
+    @property
+    def needs_stat(self) -> bool:
+        return bool(self.stat_tests)
+
+    def matches_name(self, name: str) -> bool:
+        folded = name.casefold()
+        for _cost, test in self.name_tests:
+            if not test(folded):
+                return False
+        return True
+
+    def matches_record(self, name: str, is_dir: bool, size: int, mtime: float) -> bool:
+        """已有元数据的条目（当前列表、索引行）"""
+        if self.name_tests and not self.matches_name(name):
+            return False
+        if self.is_dir is not None and bool(is_dir) != self.is_dir:
+            return False
+        return not self.stat_tests or self._matches_stat(bool(is_dir), size, mtime)
+
+    def matches_entry(self, entry) -> bool:
+        """递归遍历中的 DirEntry（只有通过名称与类型检查的候选才调用 stat）"""
+        if self.name_tests and not self.matches_name(entry.name):
+            return False
+        if self.is_dir is None and not self.stat_tests:
+            return True
+        try:
+            is_dir = entry.is_dir(follow_symlinks=False)
+            if self.is_dir is not None and is_dir != self.is_dir:
+                return False
+            if not self.stat_tests:
+                return True
+            st = entry.stat(follow_symlinks=False)
+        except OSError:
+            return False
+        return self._matches_stat(is_dir, st.st_size, st.st_mtime)
+
+    def _matches_stat(self, is_dir: bool, size: int, mtime: float) -> bool:
+        for negate, bounds in self.stat_tests:
+            if is_dir and bounds[0][0] == "size":  # 文件夹没有自身大小：大小条件（含取反）只匹配文件
+                return False
+            holds = all(_OPERATORS[op](size if field == "size" else mtime, value) for field, op, value in bounds)
+            if holds == negate:
+                return False
+        return True
+
+    def sql_filters(self, alias: str = "f") -> tuple:
+        """可下推到文件名索引 files 表的条件：(WHERE 子句列表, 参数列表)"""
+        clauses, params = [], []
+        if self.is_dir is not None:
+            clauses.append(f"{alias}.is_dir = ?")
+            params.append(1 if self.is_dir else 0)
+        for negate, bounds in self.stat_tests:
+            if bounds[0][0] == "size":
+                clauses.append(f"{alias}.is_dir = 0")
+            condition = " AND ".join(f"{alias}.{field} {op} ?" for field, op, _value in bounds)
+            clauses.append(f"NOT ({condition})" if negate else f"({condition})")
+            params.extend(value for _field, _op, value in bounds)
+        return clauses, params
+
+
+def compile_query(text: str, prefix: bool = False) -> SearchQuery:
+    """
+    解析查询文本（只解析一次，结果可反复用于大量候选）
+    - 普通词：名称包含该词（多个词需同时满足）；含 * 或 ? 时按通配符匹配整个名称
+    - ext:log,txt  name:/正则/  name:*.py  type:video|folder|file
+    - size:>100MB  size:1MB..1GB  modified:<7d（7 天内）  modified:>2024-01-01
+    - 在条件前加 - 表示取反（如 -ext:tmp）；含空格的词用引号括起来
+    :param prefix: 为 True 时普通词匹配名称开头
+    """
+    query = SearchQuery(text)
+    try:
+        tokens = _split_tokens(text)
+    except ValueError as e:
+        raise QueryError(f"引号不匹配：{text}") from e
+    plain_words = 0
+    for token in tokens:
+        negate = token.startswith("-") and len(token) > 1
+        if negate:
+            token = token[1:]
+        key, sep, value = token.partition(":")
+        key = key.lower()
+        if sep and key in _FIELD_PARSERS:
+            if not value:
+                raise QueryError(f"条件缺少取值：{token}")
+            _FIELD_PARSERS[key](query, value, negate)
+        else:
+            _add_name_pattern(query, token, negate, prefix)
+            plain_words += not negate
+    if len(tokens) == 1 and plain_words == 1 and not prefix and not _is_glob(tokens[0]):
+        query.plain_text = tokens[0].casefold()
+    query.name_tests.sort(key=lambda item: item[0])  # 代价低的先执行
+    return query
+
+
+def _split_tokens(text: str) -> list:
+    """按空白拆分，双引号内的空白保留（不处理反斜杠转义，正则中的 \\d 等原样保留；单引号视为普通字符）"""
+    lexer = shlex.shlex(text, posix=True)
+    lexer.whitespace_split = True
+    lexer.quotes = '"'
+    lexer.escape = ""
+    lexer.commenters = ""
+    return list(lexer)
+
+
+def _add_test(query: SearchQuery, cost: int, test, negate: bool):
+    query.name_tests.append((cost, (lambda name: not test(name)) if negate else test))
+
+
+def _is_glob(pattern: str) -> bool:
+    return "*" in pattern or "?" in pattern
+
+
+def _add_name_pattern(query: SearchQuery, pattern: str, negate: bool, prefix: bool = False):
+    """名称条件：/正则/、通配符或子串"""
+    if len(pattern) >= 2 and pattern.startswith("/") and pattern.endswith("/"):
+        try:
+            regex = re.compile(pattern[1:-1], re.IGNORECASE)
+        except re.error as e:
+            raise QueryError(f"正则表达式错误：{pattern}（{e}）") from e
+        _add_test(query, 2, lambda name: regex.search(name) is not None, negate)
+        return
+    folded = pattern.casefold()
+    if _is_glob(folded):
+        regex = re.compile(fnmatch.translate(folded), re.DOTALL)
+        _add_test(query, 1, lambda name: regex.match(name) is not None, negate)
+        if not negate:
+            query.literals.append(max(re.split(r'[*?]|\[.*?\]', folded), key=len))
+        return
+    if prefix:
+        _add_test(query, 0, lambda name: name.startswith(folded), negate)
+    else:
+        _add_test(query, 0, lambda name: folded in name, negate)
+    if not negate:
+        query.literals.append(folded)
+
+
+def _parse_name(query: SearchQuery, value: str, negate: bool):
+    _add_name_pattern(query, value, negate)
+
+
+def _parse_ext(query: SearchQuery, value: str, negate: bool):
+    exts = tuple("." + ext.lstrip(".").casefold() for ext in value.split(",") if ext.strip("."))
+    if not exts:
+        raise QueryError(f"扩展名为空：ext:{value}")
+    _add_test(query, 0, lambda name: name.endswith(exts), negate)
+    if not negate and len(exts) == 1:
+        query.literals.append(exts[0])
+
+
+def _parse_type(query: SearchQuery, value: str, negate: bool):
+    category = value.casefold()
+    if category in ("folder", "dir", "文件夹"):
+        query.is_dir = not negate
+        return
+    if category in ("file", "文件"):
+        query.is_dir = negate
+        return
+    exts = tuple(ext for ext, file_type in EXT_TO_TYPE.items() if file_type == category)
+    if not exts:
+        categories = "、".join(sorted(set(EXT_TO_TYPE.values())))
+        raise QueryError(f"未知类型：{value}（可用：folder、file、{categories}）")
+    _add_test(query, 0, lambda name: name.endswith(exts), negate)
+
+
+def _parse_size(query: SearchQuery, value: str, negate: bool):
+    bounds = []
+    for op, amount in _comparisons(value):
+        match = _NUMBER_UNIT.match(amount.strip().lower())
+        if not match or match.group(2) not in SIZE_UNITS:
+            raise QueryError(f"无法识别的大小：{amount}（如 100MB、1.5G、500k）")
+        bounds.append(("size", op, int(float(match.group(1)) * SIZE_UNITS[match.group(2)])))
+    query.stat_tests.append((negate, tuple(bounds)))
+
+
+def _parse_modified(query: SearchQuery, value: str, negate: bool):
+    now = time.time()
+    bounds = []
+    for op, amount in _comparisons(value):
+        amount = amount.strip().lower()
+        match = _NUMBER_UNIT.match(amount)
+        if match and match.group(2) in AGE_UNITS:
+            # 相对时间：<7d 表示距今不到 7 天，即修改时间晚于 7 天前（运算符方向与时间戳相反）
+            threshold = now - float(match.group(1)) * AGE_UNITS[match.group(2)]
+            op = {">": "<", ">=": "<=", "<": ">", "<=": ">=", "=": ">="}[op]
+        else:
+            try:
+                day = datetime.strptime(amount, "%Y-%m-%d")
+            except ValueError as e:
+                raise QueryError(f"无法识别的时间：{amount}（如 7d、12h、2024-01-01）") from e
+            threshold = day.timestamp()
+            if op == "=":  # 指定日期当天：拆成 [当天 0 点, 次日 0 点)
+                bounds.append(("mtime", ">=", threshold))
+                bounds.append(("mtime", "<", threshold + 86400))
+                continue
+            if op in (">", "<="):
+                threshold += 86400  # 按整天比较：>2024-01-01 表示 1 月 2 日及以后
+        bounds.append(("mtime", op, threshold))
+    query.stat_tests.append((negate, tuple(bounds)))
+
+
+def _comparisons(value: str) -> list:
+    """"a..b" -> [(">=", a), ("<=", b)]；">a" -> [(">", a)]；"a" -> [("=", a)]"""
+    if ".." in value:
+        low, _, high = value.partition("..")
+        if not (low or high):
+            raise QueryError(f"范围至少需要一个边界：{value}（如 1MB..1GB、..1GB、7d..）")
+        return [(op, amount) for op, amount in ((">=", low), ("<=", high)) if amount]
+    op, amount = _COMPARE.match(value).groups()
+    return [(op or "=", amount)]
+
+
+_FIELD_PARSERS = {
+    "name": _parse_name,
+    "ext": _parse_ext,
+    "type": _parse_type,
+    "size": _parse_size,
+    "modified": _parse_modified,
+    "mtime": _parse_modified,
+}
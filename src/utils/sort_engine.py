@@ -0,0 +1,82 @@
+from array import array
+
+try:
+    import numpy as np  # 可选依赖：有 NumPy 时在 C 层完成排序与筛选
+except ImportError:
+    np = None
+
+
+class ColumnSortEngine:
+    """
+    列式排序引擎：按 (排序键, 方向) 缓存全部数据下标的排序排列
+    - 规则与 sort_file_list 一致：文件夹优先 + 排序键升序，降序为升序排列整体反转
+    - 降序由已缓存的升序排列反转得到（O(n)），再次应用同一排序直接复用缓存
+    - 列数据变化时需调用 invalidate()
+    """
+    def __init__(self):
+        self._cache = {}  # {(排序键, 是否降序): 排列}
+
+    def invalidate(self, sort_key: str = None):
+        """丢弃缓存的排列（指定 sort_key 时只丢弃该列的排列）"""
+        if sort_key is None:
+            self._cache.clear()
+            return
+        self._cache.pop((sort_key, False), None)
+        self._cache.pop((sort_key, True), None)
+
+    def permutation(self, sort_key: str, reverse: bool, is_dir, values_of):
+        """
+        返回全部数据下标按 (sort_key, reverse) 排序后的排列
+        :param is_dir: 是否为文件夹列
+        :param values_of: 回调，values_of(sort_key) 返回排序键列（仅在缓存未命中时调用）
+        """
+        cached = self._cache.get((sort_key, reverse))
+        if cached is not None:
+            return cached
+        ascending = self._cache.get((sort_key, False))
+        if ascending is None:
+            ascending = self._cache[(sort_key, False)] = _argsort(is_dir, values_of(sort_key))
+        if not reverse:
+            return ascending
+        descending = ascending[::-1] if np is not None else array('l', reversed(ascending))
+        self._cache[(sort_key, True)] = descending
+        return descending
+
+    @staticmethod
+    def select(permutation, indices, size: int) -> list:
+        """按排列顺序返回 indices 中的数据下标（indices 为可见行集合，size 为数据总数）"""
+        if not isinstance(indices, (list, tuple)):
+            indices = list(indices)
+        if len(indices) == size:  # 全部可见（无过滤、无已删除条目）
+            return permutation.tolist()
+        if np is not None:
+            mask = np.zeros(size, dtype=bool)
+            mask[np.asarray(indices, dtype=np.intp)] = True
+            return permutation[mask[permutation]].tolist()
+        mask = bytearray(size)
+        for index in indices:
+            mask[index] = 1
+        return [index for index in permutation if mask[index]]
+
+    @staticmethod
+    def inverse(order: list, size: int) -> array:
+        """视图顺序的逆映射：数据下标 -> 视图行（不在 order 中的为 -1）"""
+        if np is not None:
+            positions = np.full(size, -1, dtype=np.int64)
+            positions[np.asarray(order, dtype=np.intp)] = np.arange(len(order), dtype=np.int64)
+            return array('q', positions.tobytes())
+        positions = array('q', [-1]) * size
+        for row, index in enumerate(order):
+            positions[index] = row
+        return positions
+
+
+def _argsort(is_dir, values):
+    """文件夹优先的稳定排序，返回数据下标排列（数值列用 NumPy；名称排序键为 Python 对象，用内置排序）"""
+    if np is not None and isinstance(values, array):
+        is_file = (np.frombuffer(is_dir, dtype=np.int8) if isinstance(is_dir, array) else np.asarray(is_dir)) == 0
+        keys = np.frombuffer(values, dtype=values.typecode)
+        return np.lexsort((keys, is_file))  # 最后一个键为主键：文件夹（False）排在前面
+    order = sorted(range(len(values)), key=values.__getitem__)
+    order = [index for index in order if is_dir[index]] + [index for index in order if not is_dir[index]]
+    return np.array(order, dtype=np.intp) if np is not None else array('l', order)
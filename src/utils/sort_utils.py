@@ -1,7 +1,61 @@
+import re
+import locale
+
+_DIGIT_RUNS = re.compile(r'(\d+)')
+_natural_sort = True  # 自然排序：数字串按数值比较（file2 < file10）
+_use_collation = False  # 文本段按区域规则排序（locale.strxfrm），否则按码位
+
+
+def configure_name_sort(natural: bool = True, collation_locale=None) -> bool:
+    """
+    设置名称排序方式（程序启动时调用；已缓存的目录结果需清空后才会使用新规则）
+    :param natural: 是否启用自然排序（数字串按数值比较）
+    :param collation_locale: 区域名（如 "zh_CN.UTF-8"；"" 为系统默认），None 表示按码位排序
+    :return: 区域设置是否生效
+    """
+    global _natural_sort, _use_collation
+    _natural_sort = natural
+    _use_collation = False
+    if collation_locale is None:
+        return True
+    try:
+        locale.setlocale(locale.LC_COLLATE, collation_locale)
+    except locale.Error:
+        return False
+    _use_collation = True
+    return True
+
+
+def name_sort_key(name: str) -> str:
+    """
+    名称排序键（扫描时每个条目计算一次，随扫描记录一起缓存）
+    - 不区分大小写；启用区域规则时中文等按区域排序规则（如拼音）比较
+    - 自然排序：每个数字串编码为 "\\x00" + 长度字符 + 去掉前导零的数字，
+      文本段与数字段按位置对齐，整个键是普通字符串，排序时直接按字符串比较（C 层，无需逐段比较）
+      （\\x00 不会出现在文件名与 strxfrm 结果中，且小于任何字符，保证较短的文本段排在前面）
+    """
+    folded = name.casefold()
+    if not _use_collation:
+        return _DIGIT_RUNS.sub(_encode_digits, folded) if _natural_sort else folded
+    if not _natural_sort:
+        return locale.strxfrm(folded)
+    parts = _DIGIT_RUNS.split(folded)
+    parts[0::2] = map(locale.strxfrm, parts[0::2])  # 区域规则只作用于文本段
+    for i in range(1, len(parts), 2):
+        parts[i] = _encode_digits(parts[i])
+    return "".join(parts)
+
+
+def _encode_digits(run) -> str:
+    """数字串 -> "\\x00" + 长度字符 + 数字（去掉前导零并统一全角等 Unicode 数字，数值大者长度字符更大）"""
+    digits = str(int(run if isinstance(run, str) else run.group()))
+    return f"\x00{chr(0x20 + len(digits))}{digits}"
+
+
 def sort_file_list(file_list: list, sort_key: str = "name", reverse: bool = False) -> list:
     """
     通用文件列表排序函数
-    :param file_list: 待排序的文件信息列表（每个元素是字典，包含"name"/"size"/"mtime"/"is_dir"等键）
+    :param file_list: 待排序的扫描记录列表（FileRecord，含 name/sort_key/size/mtime/is_dir 属性）
     :param sort_key: 排序依据（可选值："name"名称/"size"大小/"mtime"修改时间）
     :param reverse: 是否降序（默认升序）
     :return: 排序后的文件列表
@@ -9,15 +63,15 @@ def sort_file_list(file_list: list, sort_key: str = "name", reverse: bool = Fals
     # 定义排序规则（文件夹优先 + 指定键排序）
     def sort_key_func(item):
         # 文件夹优先（is_dir为True时排前面）
-        is_folder = 0 if item["is_dir"] else 1
+        is_folder = 0 if item.is_dir else 1
         # 根据不同键返回排序值
         if sort_key == "size":
-            key_value = item["size"]
+            key_value = item.size
         elif sort_key == "mtime":
-            key_value = item["mtime"]
+            key_value = item.mtime
         else:  # 默认按名称排序
             # print(sort_key)
-            key_value = item["name"].lower()  # 不区分大小写
+            key_value = item.sort_key  # 扫描时预先计算的名称排序键（自然排序/区域规则）
         return (is_folder, key_value)
     # print(sort_key_func(file_list[0]))
     # 执行排序
@@ -25,3 +79,4 @@ def sort_file_list(file_list: list, sort_key: str = "name", reverse: bool = Fals
     # print(sorted_list)
 
     return sorted_list
+
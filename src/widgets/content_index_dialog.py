@@ -0,0 +1,230 @@
+import os
+import time
+from PySide6.QtWidgets import (QDialog, QVBoxLayout, QHBoxLayout, QPushButton, QLineEdit, QLabel, QListWidget,
+                               QTableView, QHeaderView, QAbstractItemView)
+from PySide6.QtCore import Qt, QAbstractTableModel, QModelIndex, QThread, QTimer
+from dbload_manager.content_index import ContentIndex, CONTENT_INDEX_PATH, MIN_TRIGRAM_CHARS
+from threads.content_indexer import ContentIndexThread
+from utils.file_utils import get_file_type, format_size_cached
+
+
+class SnippetResultModel(QAbstractTableModel):
+    """全文搜索结果模型：每行 (完整路径, 命中片段)，按相关度排序"""
+    HEADERS = ["文件", "片段"]
+
+    def __init__(self, icons=None, parent=None):
+        super().__init__(parent)
+        self.icons = icons or {}
+        self._rows = []
+
+    def set_results(self, rows: list):
+        self.beginResetModel()
+        self._rows = list(rows)
+        self.endResetModel()
+
+    def result_at(self, row: int):
+        return self._rows[row] if 0 <= row < len(self._rows) else None
+
+    def rowCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else len(self._rows)
+
+    def columnCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else len(self.HEADERS)
+
+    def data(self, index, role=Qt.ItemDataRole.DisplayRole):
+        if not index.isValid():
+            return None
+        path, snippet = self._rows[index.row()]
+        column = index.column()
+        if role == Qt.ItemDataRole.DisplayRole:
+            return os.path.basename(path) if column == 0 else snippet
+        if role == Qt.ItemDataRole.DecorationRole and column == 0:
+            return self.icons.get(get_file_type(path), self.icons.get('default'))
+        if role == Qt.ItemDataRole.ToolTipRole:
+            return path if column == 0 else snippet
+        return None
+
+    def headerData(self, section, orientation, role=Qt.ItemDataRole.DisplayRole):
+        if orientation == Qt.Orientation.Horizontal and role == Qt.ItemDataRole.DisplayRole:
+            return self.HEADERS[section]
+        return super().headerData(section, orientation, role)
+
+
+class ContentIndexDialog(QDialog):
+    """
+    全文搜索（持久化内容索引，需手动添加要索引的文件夹）
+    - 更新索引：后台限速增量更新（只读取新增/变化的文件），可随时停止，下次从已提交的进度继续
+    - 输入即查询（防抖），结果按相关度排序并显示命中片段，双击在主窗口中打开所在目录并选中该文件
+    """
+    def __init__(self, main_window):
+        super().__init__(main_window)
+        self.main_window = main_window
+        self.setWindowTitle("全文搜索")
+        self.resize(900, 600)
+        config = main_window.config_manager
+        self.result_limit = config.get("search_result_limit", 1000)
+        self.index_types = config.get("content_index_types", ["text", "code"])
+        self.max_file_bytes = config.get("content_index_max_file_mb", 10) * 1024 * 1024
+        self.max_bytes_per_second = config.get("content_index_max_mb_per_s", 20) * 1024 * 1024
+        self.index = ContentIndex(CONTENT_INDEX_PATH)  # 查询连接（WAL：更新索引期间仍可查询）
+        self.index_thread = None
+        self.query_timer = QTimer(self)
+        self.query_timer.setSingleShot(True)
+        self.query_timer.setInterval(config.get("filter_debounce_ms", 150))
+        self.query_timer.timeout.connect(self._run_query)
+        self._init_ui()
+        self._load_roots()
+
+    def _init_ui(self):
+        layout = QVBoxLayout(self)
+        roots_row = QHBoxLayout()
+        self.roots_list = QListWidget()  # 索引范围
+        self.roots_list.setMaximumHeight(90)
+        roots_row.addWidget(self.roots_list, 1)
+        buttons = QVBoxLayout()
+        add_btn = QPushButton("添加当前文件夹")
+        add_btn.clicked.connect(self._add_current_folder)
+        buttons.addWidget(add_btn)
+        remove_btn = QPushButton("移除")
+        remove_btn.clicked.connect(self._remove_root)
+        buttons.addWidget(remove_btn)
+        self.update_btn = QPushButton("更新索引")
+        self.update_btn.clicked.connect(self._toggle_update)
+        buttons.addWidget(self.update_btn)
+        roots_row.addLayout(buttons)
+        layout.addLayout(roots_row)
+
+        self.index_label = QLabel()  # 索引状态/更新进度
+        layout.addWidget(self.index_label)
+
+        self.query_input = QLineEdit()
+        self.query_input.setPlaceholderText("搜索已索引文件的内容（任意语言的子串，至少 3 个字符，不区分大小写）")
+        self.query_input.textChanged.connect(lambda _text: self.query_timer.start())
+        self.query_input.returnPressed.connect(self._run_query)
+        layout.addWidget(self.query_input)
+
+        self.result_model = SnippetResultModel(self.main_window.icons, self)
+        self.result_view = QTableView()
+        self.result_view.setModel(self.result_model)
+        self.result_view.setSelectionBehavior(QAbstractItemView.SelectionBehavior.SelectRows)
+        self.result_view.setEditTriggers(QAbstractItemView.EditTrigger.NoEditTriggers)
+        self.result_view.verticalHeader().setVisible(False)
+        self.result_view.horizontalHeader().setSectionResizeMode(1, QHeaderView.ResizeMode.Stretch)
+        self.result_view.setColumnWidth(0, 250)
+        self.result_view.doubleClicked.connect(self._open_result)
+        layout.addWidget(self.result_view, 1)
+
+        self.status_label = QLabel()  # 查询结果统计
+        layout.addWidget(self.status_label)
+
+    def set_query(self, text: str):
+        """以搜索框中的内容作为初始查询"""
+        if text:
+            self.query_input.setText(text)
+        self.query_input.setFocus()
+
+    # ---------- 索引范围与更新 ----------
+    def _load_roots(self):
+        self.roots_list.clear()
+        self.roots_list.addItems(self.index.roots())
+        self._update_index_status()
+
+    def _update_index_status(self):
+        if self.index_thread is not None:
+            return
+        files, total = self.index.stats()
+        if not self.roots_list.count():
+            self.index_label.setText("尚未添加要索引的文件夹（只索引 " + "、".join(self.index_types) + " 类文件）")
+        else:
+            self.index_label.setText(f"已索引 {files:,} 个文件（{format_size_cached(total)}）")
+
+    def _add_current_folder(self):
+        path = self.main_window.current_path
+        if not os.path.isdir(path):
+            self.main_window.statusBar().showMessage("当前位置不是文件夹，无法加入索引", 3000)
+            return
+        if self.index_thread is not None:
+            self.main_window.statusBar().showMessage("正在更新索引，请停止更新后再修改索引范围", 3000)
+            return
+        if not self.index.add_root(path):
+            self.main_window.statusBar().showMessage("无法写入内容索引，未能加入索引范围", 5000)
+            return
+        self._load_roots()
+
+    def _remove_root(self):
+        item = self.roots_list.currentItem()
+        if item is None or self.index_thread is not None:
+            return  # 更新期间不修改索引范围
+        if not self.index.remove_root(item.text()):
+            self.main_window.statusBar().showMessage("无法写入内容索引，未能移出索引范围", 5000)
+            return
+        self._load_roots()
+        self._run_query()
+
+    def _toggle_update(self):
+        """开始增量更新索引（更新中再次点击则停止）"""
+        if self.index_thread is not None:
+            self.index_thread.stop()
+            return
+        if not self.roots_list.count():
+            self._update_index_status()
+            return
+        self.index_thread = ContentIndexThread(self.index.db_path, self.index_types, self.max_file_bytes,
+                                               self.max_bytes_per_second, self)
+        self.index_thread.progress.connect(self._on_index_progress)
+        self.index_thread.index_finished.connect(self._on_index_finished)
+        self.index_thread.error_occurred.connect(self._on_index_error)
+        self.index_thread.finished.connect(self._on_index_thread_finished)
+        self.update_btn.setText("停止")
+        self.index_label.setText("正在更新索引...")
+        self.index_thread.start(QThread.Priority.LowestPriority)  # 不影响前台浏览
+
+    def _on_index_progress(self, indexed: int, unchanged: int, current_dir: str):
+        self.index_label.setText(f"正在更新索引：已写入 {indexed:,} 个文件，{unchanged:,} 个未变化  {current_dir}")
+
+    def _on_index_finished(self, indexed: int, unchanged: int, removed: int, elapsed: float, stopped: bool):
+        state = "索引更新已停止（下次从此处继续）" if stopped else "索引更新完成"
+        self.main_window.statusBar().showMessage(
+            f"{state}：写入 {indexed:,} 个文件，{unchanged:,} 个未变化，移除 {removed:,} 个，用时 {elapsed:.1f} 秒", 5000)
+
+    def _on_index_error(self, message: str):
+        self.main_window.statusBar().showMessage(message, 5000)
+
+    def _on_index_thread_finished(self):
+        self.index_thread.deleteLater()
+        self.index_thread = None
+        self.update_btn.setText("更新索引")
+        self._update_index_status()
+        self._run_query()
+
+    # ---------- 查询 ----------
+    def _run_query(self):
+        self.query_timer.stop()
+        text = self.query_input.text().strip()
+        if not text:
+            self.result_model.set_results([])
+            self.status_label.clear()
+            return
+        if len(text) < MIN_TRIGRAM_CHARS:
+            self.result_model.set_results([])
+            self.status_label.setText(f"请至少输入 {MIN_TRIGRAM_CHARS} 个字符")
+            return
+        start = time.perf_counter()
+        results = self.index.search(text, self.result_limit)
+        elapsed = (time.perf_counter() - start) * 1000
+        self.result_model.set_results(results)
+        more = "（仅显示前 {:,} 个）".format(self.result_limit) if len(results) >= self.result_limit else ""
+        self.status_label.setText(f"找到 {len(results):,} 个文件{more}，用时 {elapsed:.0f} ms")
+
+    def _open_result(self, index):
+        """在主窗口中打开结果所在目录并选中该文件"""
+        result = self.result_model.result_at(index.row())
+        if result is not None:
+            self.main_window.reveal_path(result[0])
+
+    def shutdown(self):
+        """程序退出时停止索引更新（已提交的进度保留）并关闭数据库"""
+        if self.index_thread is not None:
+            self.index_thread.stop()
+            self.index_thread.wait()
+        self.index.close()
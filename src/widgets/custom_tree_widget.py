@@ -1,12 +1,26 @@
-from PySide6.QtWidgets import QTreeWidget
+from PySide6.QtWidgets import QTreeView
 from PySide6.QtGui import QPainter, QColor
-from PySide6.QtCore import Qt
+from PySide6.QtCore import Qt, Signal
+from widgets.file_table_model import FileTableModel
+
+class FileListWidget(QTreeView):
+    """自定义文件列表视图（基于 FileTableModel），支持在空状态时显示提示文本"""
+    itemDoubleClicked = Signal(object, int)  # (行句柄, 列)，与 QTreeWidget 信号保持一致
 
-class FileListWidget(QTreeWidget):
-    """自定义 QTreeWidget，支持在空状态时显示提示文本"""
     def __init__(self, parent=None):
         super().__init__(parent)
         self._empty_hint = ""  # 初始无提示
+        self.setModel(FileTableModel(self))
+        self.setRootIsDecorated(False)  # 平铺列表，无展开箭头
+        self.setItemsExpandable(False)
+        self.setUniformRowHeights(True)  # 行高一致，滚动时无需逐行计算尺寸
+        self.setAllColumnsShowFocus(True)
+        self.doubleClicked.connect(self._on_double_clicked)
+
+    def _on_double_clicked(self, index):
+        item = self.model().item(index.row())
+        if item is not None:
+            self.itemDoubleClicked.emit(item, index.column())
 
     def set_empty_hint(self, text: str):
         """设置空状态提示文本"""
@@ -14,10 +28,33 @@ class FileListWidget(QTreeWidget):
         # super().update()  # 触发重绘
         self.viewport().update()  # 关键修改：通过视口触发无参重绘
 
+    def setHeaderLabels(self, labels: list):
+        """设置表头文本（兼容 QTreeWidget 接口）"""
+        self.model().set_header_labels(labels)
+
+    def clear(self):
+        """清空列表"""
+        self.model().clear()
+
+    def selectedItems(self) -> list:
+        """返回选中行的行句柄列表（按显示顺序）"""
+        model = self.model()
+        rows = sorted(index.row() for index in self.selectionModel().selectedRows())
+        return [model.item(row) for row in rows]
+
+    def currentItem(self):
+        """返回当前行的行句柄（无当前行时返回 None）"""
+        index = self.currentIndex()
+        return self.model().item(index.row()) if index.isValid() else None
+
+    def itemAt(self, pos):
+        """返回视口坐标处的行句柄（空白处返回 None）"""
+        index = self.indexAt(pos)
+        return self.model().item(index.row()) if index.isValid() else None
 
     def paintEvent(self, event):
         """重写绘制事件：空状态时绘制提示文本"""
-        if self.topLevelItemCount() == 0 and self._empty_hint:
+        if self.model().rowCount() == 0 and self._empty_hint:
             # 无内容且有提示时，在中心绘制灰色文本
             painter = QPainter(self.viewport())
             painter.setPen(QColor(Qt.gray))
@@ -1,13 +1,17 @@
 import os
-import sys
-from PySide6.QtWidgets import QTreeWidgetItem, QTreeWidget
-from PySide6.QtCore import Qt
-from PySide6.QtGui import QColor
-from utils.file_utils import get_file_type, format_size
+from PySide6.QtCore import QPoint, QItemSelectionModel, QTimer
+from PySide6.QtWidgets import QAbstractItemView
 from dbload_manager.database_manager import DatabaseManager
 from threads.file_list_loader import FileListLoaderManager  # 导入
+from threads.dir_watcher import DirectoryWatcher
+from threads.prefetcher import DirectoryPrefetcher
 from handlers.header_sort_handler import HeaderSortHandler  # 新增导入
-from utils.sort_utils import sort_file_list  # 新增：导入排序工具
+from widgets.custom_tree_widget import FileListWidget
+from widgets.file_table_model import FileTableModel
+from utils.listing_cache import ListingCache, get_dir_mtime
+from threads.folder_size import format_folder_size
+from utils.search_query import compile_query
+from utils.navigation_history import NavigationHistory
 from utils.logging_config import get_logger
 logger = get_logger(__name__)
 class FileListUpdater:
@@ -15,9 +19,29 @@ class FileListUpdater:
         self.fm = fm  # 持有主窗口引用
         self.folder_threads = {}  # 实例变量：在FileListUpdater内部维护线程字典
         # ：初始化异步加载管理器
-        self.file_list_loader = FileListLoaderManager(self.fm)
-        self.file_list_loader.list_loaded.connect(self._update_filelist_from_thread)
+        self.file_list_loader = FileListLoaderManager(
+            self.fm, max_workers=self.fm.config_manager.get("scan_workers", 4))
+        self.file_list_loader.chunk_loaded.connect(self._update_filelist_from_thread)  # 流式：逐批追加
+        self.file_list_loader.list_loaded.connect(self._finish_filelist_from_thread)  # 扫描完成：整体排序
         self.file_list_loader.error_occurred.connect(self._handle_scan_error)  # 新增错误处理
+        # 目录监视：文件变化时只应用增量差异（不清空列表、不丢失滚动位置）
+        self.dir_watcher = DirectoryWatcher(self.fm)
+        self.dir_watcher.changes_ready.connect(self.apply_directory_changes)
+        # 预取：选中/悬停的文件夹、上级目录与常访问的子文件夹提前扫描到目录缓存
+        config = self.fm.config_manager
+        self.prefetcher = DirectoryPrefetcher(
+            self.listing_cache, self.file_list_loader.pool, self.fm,
+            max_concurrent=config.get("prefetch_max_concurrent", 2),  # 设为 0 关闭预取
+            max_entries=config.get("prefetch_max_entries", 50_000)
+        )
+        self._hover_timer = QTimer(self.fm)  # 悬停停留一段时间后才预取（鼠标划过不触发）
+        self._hover_timer.setSingleShot(True)
+        self._hover_timer.setInterval(150)
+        self._hover_timer.timeout.connect(self._prefetch_hovered)
+        self._hovered_row = -1
+        self.file_list.setMouseTracking(True)
+        self.file_list.entered.connect(self._on_item_hovered)
+        self.file_list.selectionModel().currentChanged.connect(lambda current, _: self._prefetch_row(current.row()))
         # 可选：连接进度信号（用于显示加载提示）
         # self.file_list_loader.progress_updated.connect(self._update_progress)
         # 新增：初始化排序处理器并连接表头事件
@@ -26,16 +50,29 @@ class FileListUpdater:
         # self.fm.file_list.header().sectionDoubleClicked.connect(self.header_handler.on_header_double_clicked)
         # 新增：缓存文件列表数据（用于排序）
         self.file_list_data = []  
+        self._streamed_count = 0  # 流式加载：已追加到列表的条目数
+        self._file_count = 0  # 流式加载过程中的文件计数
+        self._folder_count = 0  # 流式加载过程中的文件夹计数
+        self._cached_child_sizes = None  # 当前目录子文件夹的缓存大小（首批文件夹到达时一次查询）
+        self._rescan_sizes = False  # 当前列表的文件夹大小是否完整重新扫描（F5）
         self.show_mtime = self.fm.config_manager.config.get("show_mtime", False)
         self.last_updated_path = None  # 新增：记录最后一次更新的路径
         self.error_occurred = False
+        self.model.icons = self.icons  # 模型在 data() 中按类型取图标
+        self._scan_mtime = 0.0  # 本次扫描开始时的目录修改时间（写入目录缓存）
+        self._pending_view_state = None  # 加载完成后需恢复的视图状态（后退/前进）
 
         
     @property
-    def file_list(self) -> QTreeWidget:
+    def file_list(self) -> FileListWidget:
         """通过主窗口直接获取文件列表控件"""
         return self.fm.file_list
 
+    @property
+    def model(self) -> FileTableModel:
+        """文件列表数据模型"""
+        return self.fm.file_list.model()
+
     @property
     def current_path(self) -> str:
         """通过主窗口直接获取当前路径"""
@@ -61,6 +98,16 @@ class FileListUpdater:
         """通过主窗口直接获取数据库实例"""
         return self.fm.db
 
+    @property
+    def listing_cache(self) -> ListingCache:
+        """通过主窗口直接获取目录扫描缓存"""
+        return self.fm.listing_cache
+
+    @property
+    def navigation_history(self) -> NavigationHistory:
+        """通过主窗口直接获取后退/前进历史"""
+        return self.fm.navigation_history
+
     @property
     def folder_size_manager(self):
         """通过主窗口直接获取文件夹大小管理器"""
@@ -72,11 +119,30 @@ class FileListUpdater:
     #     """通过主窗口直接获取线程存储字典"""
     #     return self.fm.folder_threads
 
-    def update_filelist(self):
-        """更新文件列表（核心功能）"""
+    def update_filelist(self, restore_state: dict = None, reveal_name: str = None, rescan_sizes: bool = False):
+        """
+        更新文件列表（核心功能）
+        :param restore_state: 后退/前进时要恢复的视图状态（为 None 时视为新的导航并记录历史）
+        :param reveal_name: 加载完成后选中并滚动到该条目（搜索结果跳转）
+        :param rescan_sizes: 文件夹大小不使用分层缓存，完整重新扫描（F5 刷新）
+        """
+        self.prefetcher.cancel()  # 真正的导航开始：立即取消预取
+        self._hover_timer.stop()
+        if restore_state is None and self.last_updated_path not in (None, self.current_path):
+            self.navigation_history.visit(self.capture_view_state())
+        if self.last_updated_path != self.current_path:
+            self.prefetcher.record_visit(self.current_path)
         # self.file_list_loader.stop_all()  # 触发管理器清理
         self._clean_old_threads()
         self.file_list.clear()
+        self.model.base_path = self.current_path
+        self.model.show_all_sizes = self.show_all_sizes
+        self._reset_stream_state()
+        self._rescan_sizes = rescan_sizes
+        self._pending_view_state = restore_state
+        if reveal_name is not None:
+            self._pending_view_state = {"selected": [reveal_name], "current": reveal_name, "top": reveal_name}
+        self.dir_watcher.watch(self.current_path, self.show_hidden)
         self._setup_header_layout()  # 设置列布局
         # self.file_list_loader.stop_all()  # 关键修改：终止所有未完成的扫描线程
         # self._clean_old_threads()    # 清理旧线程
@@ -87,10 +153,21 @@ class FileListUpdater:
         try:
             # file_count, folder_count = self._process_directory_entries()  # 处理目录条目
             # self._update_status_bar(file_count, folder_count)  # 更新状态栏
+            self.error_occurred = False
+            self.last_updated_path = self.current_path
+            dir_mtime = get_dir_mtime(self.current_path)
+            cached = self.listing_cache.get(self.current_path, self.show_hidden)
+            if cached is not None:
+                # 命中目录缓存：立即显示缓存结果
+                self.file_list_loader.stop_all()
+                self._scan_mtime, cached_list = cached
+                self._show_listing(cached_list)
+                if self._scan_mtime != dir_mtime:
+                    self.dir_watcher.schedule_refresh(0)  # 目录已变化：后台对比扫描，只更新差异
+                return
+            self._scan_mtime = dir_mtime
             # ：启动异步加载线程
             self.file_list_loader.start_load(self.current_path, self.show_hidden)
-            self.last_updated_path = self.current_path
-            self.error_occurred = False
         except Exception as e:
             # 错误提示
             # print(f"文件列表更新失败: {str(e)}")
@@ -125,11 +202,11 @@ class FileListUpdater:
             thread.deleteLater()
             del self.folder_threads[path]
 
-    def start_folder_size_thread(self, path, item):
+    def start_folder_size_thread(self, path):
         """启动文件夹大小计算线程（使用内部字典存储）"""
         if path in self.folder_threads:  # 避免重复启动
             return
-        thread = self.folder_size_manager.start_calculate(path, item)
+        thread = self.folder_size_manager.start_calculate(path, rescan=self._rescan_sizes)
         if thread is not None:  # ：检查线程是否有效
             self.folder_threads[path] = thread  # 仅存储有效线程
     
@@ -188,42 +265,27 @@ class FileListUpdater:
 
     #     except Exception:
     #         pass
-    def _apply_hidden_style2(self, item, entry):
-        """应用隐藏文件灰色显示样式"""
-        try:
-            if sys.platform == "win32":
-                import win32api
-                import win32con
-                # Windows系统：使用文件属性判断
-                is_hidden = win32api.GetFileAttributes(entry) & win32con.FILE_ATTRIBUTE_HIDDEN
-            else:
-                # Unix-like系统（Linux/macOS）：检查文件名是否以.开头
-                is_hidden = os.path.basename(entry).startswith('.')
-            # is_hidden = win32api.GetFileAttributes(entry) & win32con.FILE_ATTRIBUTE_HIDDEN
-            if is_hidden:
-                # print("隐藏文件")
-                item.setForeground(0, QColor(Qt.GlobalColor.gray))
-
-        except Exception:
-            pass
-    def _handle_folder_size_calculation2(self, entry, item):
-        """处理文件夹大小异步计算及缓存"""
-        folder_path = entry
-        db_result = self.db.get_cached_size(folder_path)
-
-        if db_result:
-            cached_size, db_last_modified = db_result
-            try:
-                current_last_modified = os.path.getmtime(folder_path)
-            except Exception:
-                current_last_modified = 0
-            
-            if current_last_modified != db_last_modified:
-                self.start_folder_size_thread(folder_path, item)
-            else:
-                item.setText(1, cached_size)
-        else:
-            self.start_folder_size_thread(folder_path, item)
+    def _handle_folder_size_calculation2(self, folder_path, mtime, cached):
+        """
+        处理文件夹大小异步计算及缓存：缓存有效时先显示缓存值，并在后台增量校验（只重新扫描变化的目录）
+        :param mtime: 扫描记录中的修改时间（不再单独 stat）
+        :param cached: 批量查询得到的 (字节数, 计算时的修改时间)，未缓存时为 None
+        """
+        if cached is not None:
+            cached_bytes, db_last_modified = cached
+            if mtime == db_last_modified:
+                self.model.set_folder_size(folder_path, format_folder_size(cached_bytes), cached_bytes)
+        self.start_folder_size_thread(folder_path)
+
+    def _handle_folder_sizes(self, path: str, records: list, cached_sizes: dict = None):
+        """为一批扫描记录中的文件夹显示缓存大小并启动计算（cached_sizes 为 None 时一次查询 path 下的全部缓存）"""
+        if cached_sizes is None:
+            cached_sizes = self.db.get_cached_children(path)
+        for record in records:
+            if record.is_dir:
+                self._handle_folder_size_calculation2(os.path.join(path, record.name), record.mtime,
+                                                      cached_sizes.get(record.name))
+
     # def _handle_folder_size_calculation(self, entry, item):
     #     """处理文件夹大小异步计算及缓存"""
     #     folder_path = entry.path
@@ -252,94 +314,144 @@ class FileListUpdater:
         # 触发状态栏更新回调（需主窗口实现）
         self.fm.status_bar.showMessage(status_text)  # 直接通过主窗口访问状态栏
         
-    def filter_files(self, keyword: str):
-        """根据关键词过滤文件列表项，返回匹配数量"""
-        match_count = 0
-        for index in range(self.file_list.topLevelItemCount()):
-            item = self.file_list.topLevelItem(index)
-            file_name = item.text(0)
-            if keyword in file_name:
-                item.setHidden(False)
-                match_count += 1
-            else:
-                item.setHidden(True)
-        return match_count  # ：返回匹配的文件数量
+    def filter_files(self, keyword: str, fuzzy: bool = False):
+        """
+        根据关键词过滤文件列表（在模型上批量更新可见行，空关键词显示全部），返回匹配数量
+        - 支持查询语法（ext:log size:>100MB modified:<7d type:video name:/正则/），语法错误时抛出 QueryError
+        - fuzzy 为 True 时按子序列模糊匹配（如 qrfv3 -> quarterly_report_final_v3.xlsx），只显示得分最高的若干行
+        """
+        if not keyword:
+            self.model.clear_filter()
+            return self.model.rowCount()
+        if fuzzy:
+            return self.model.set_fuzzy_filter(keyword, self.fm.config_manager.get("fuzzy_result_limit", 200))
+        query = compile_query(keyword)
+        if query.plain_text is not None:
+            return self.model.set_filter(query.plain_text)  # 普通子串：可在上一次结果中增量缩小
+        return self.model.set_query_filter(query)
 
     def clear_filter(self):
         """清除过滤，显示所有文件"""
-        for index in range(self.file_list.topLevelItemCount()):
-            item = self.file_list.topLevelItem(index)
-            item.setHidden(False)
+        self.model.clear_filter()
+
+    def _reset_stream_state(self):
+        """重置流式加载状态（开始新的扫描前调用）"""
+        self.file_list_data = []
+        self._streamed_count = 0
+        self._file_count = self._folder_count = 0
+        self._cached_child_sizes = None  # 当前目录子文件夹的缓存大小（首批文件夹到达时一次查询）
+
+    def _show_listing(self, file_list: list):
+        """同步显示一份完整的扫描结果（目录缓存命中时使用）"""
+        self._update_filelist_from_thread(file_list)
+        self._finish_filelist_from_thread(file_list)
 
-    def _update_filelist_from_thread(self, file_list: list):
-        """异步扫描完成后更新文件列表"""
-        self.file_list_data = file_list  # 缓存数据
+    def _update_filelist_from_thread(self, chunk: list):
+        """流式加载：追加一批扫描结果，并在状态栏显示已加载数量"""
+        self.model.append_entries(chunk)  # 仅写入列数据，显示文本/图标在 data() 中按需生成
+        folders = sum(1 for record in chunk if record.is_dir)
+        self._folder_count += folders
+        self._file_count += len(chunk) - folders
+        if folders and self.show_all_sizes:
+            if self._cached_child_sizes is None:
+                self._cached_child_sizes = self.db.get_cached_children(self.current_path)
+            self._handle_folder_sizes(self.current_path, chunk, self._cached_child_sizes)
+        self._streamed_count += len(chunk)
+        self.file_list.set_empty_hint("")
+        if not self.error_occurred:
+            self.fm.status_bar.showMessage(
+                f"{self.current_path} | 加载中… 已加载 {self._streamed_count} 项"
+            )
+
+    def _finish_filelist_from_thread(self, file_list: list):
+        """扫描完成：缓存完整列表，并在模型上按默认方式重排（不重建）"""
+        self.file_list_data = file_list  # 缓存数据（用于排序）
+        self.dir_watcher.set_snapshot(file_list)
+        if not self.error_occurred:
+            self.listing_cache.put(self.current_path, self.show_hidden, self._scan_mtime, file_list)
         # 初始按默认方式排序（名称升序）
-        sorted_file_list = sort_file_list(
-            file_list,
-            sort_key="name",  # 按名称排序（可选"size"/"mtime"）
-            reverse=False
-        )
-        # sorted_file_list = sort_file_list(
-        # file_list, 
-        # sort_key="name",  # 按名称排序（可选"size"/"mtime"）
-        # reverse=False     # 升序（True为降序）
-        # )
-        # print(f"[Debug] 更新文件列表，包含 {len(self.sorted_file_list)} 项")
-        self.file_list.clear()  # 清除临时提示
-        file_count = folder_count = 0
-        for info in sorted_file_list:
-            # 统计文件/文件夹数量（与原有逻辑一致）
-            if info["is_dir"]:
-                folder_count += 1
-            else:
-                file_count += 1
-            # 创建列表项（复用 _create_list_item 逻辑）
-            item = self._create_list_item_from_info(info)
-            self._apply_hidden_style2(item, info["path"])  # 隐藏文件样式
-            # 处理文件夹大小计算（与原有逻辑一致）
-            if info["is_dir"] and self.show_all_sizes:
-                self._handle_folder_size_calculation2(info["path"], item)
-        self._update_status_bar(file_count, folder_count)
+        self.model.sort_rows(sort_key="name", reverse=False)
+        self._update_status_bar(self._file_count, self._folder_count)
         # 无文件时显示空提示
-        if file_count == 0 and folder_count == 0:
+        if not file_list:
             self.file_list.set_empty_hint("当前目录为空")
         else:
             self.file_list.set_empty_hint("")
-    def _update_filelist_from_sorted(self,filelist2:list):
-        """
-        从排序后的文件列表更新UI，用于过滤后的显示。
-        :param filelist2: 已排序的文件列表数据
-        """
-        if filelist2:
-            # self._setup_header_layout()
-            self.file_list.clear()
-            for info in filelist2:
-                # 创建列表项（复用 _create_list_item 逻辑）
-                item = self._create_list_item_from_info(info)
-                self._apply_hidden_style2(item, info["path"])  # 隐藏文件样式
-                # 新增：处理文件夹大小计算（与_update_filelist_from_thread逻辑一致）
-                if info["is_dir"] and self.show_all_sizes:
-                    self._handle_folder_size_calculation2(info["path"], item)
-                # 关键新增：清空旧列表项（避免重复显示）
-                self.file_list.addTopLevelItem(item)
-
-    def _create_list_item_from_info(self, info: dict):
-        """适配异步扫描结果的列表项创建（复用原有逻辑）"""
-        file_type = 'folder' if info["is_dir"] else get_file_type(info["name"])
-        size = '<文件夹>' if (info["is_dir"] and not self.show_all_sizes) else format_size(info["size"])
-        if info["is_dir"] and self.show_all_sizes:
-            size = "计算中"  # 异步计算时显示占位符
-        item = QTreeWidgetItem(self.file_list, [info["name"], size])
-        item.setIcon(0, self.icons.get(file_type, self.icons['default']))
-        item.setToolTip(0, info["name"])
-        if self.show_mtime:
-            import datetime
-            if info["mtime"]:
-                # 格式化时间戳为可读格式（如 "2024-06-01 12:34"）
-                mtime_str = datetime.datetime.fromtimestamp(info["mtime"]).strftime("%Y-%m-%d %H:%M")
-                item.setText(2, mtime_str)  # 设置第三列内容
-        return item
+        if self._pending_view_state is not None:
+            self.restore_view_state(self._pending_view_state)
+            self._pending_view_state = None
+        if not self.error_occurred:
+            self.prefetcher.prefetch_around(self.current_path, self.show_hidden)
+
+    def _on_item_hovered(self, index):
+        """鼠标悬停到某行：停留片刻后预取该文件夹"""
+        self._hovered_row = index.row()
+        self._hover_timer.start()
+
+    def _prefetch_hovered(self):
+        self._prefetch_row(self._hovered_row)
+
+    def _prefetch_row(self, row: int):
+        """预取指定视图行的文件夹（优先于其他候选）"""
+        item = self.model.item(row)
+        if item is not None and item.is_dir:
+            self.prefetcher.prefetch([item.path], self.show_hidden, urgent=True)
+
+    def apply_directory_changes(self, path: str, file_list: list, added: list, removed: list,
+                                changed: list, dir_mtime: float):
+        """应用目录监视得到的增量差异（仅改动受影响的行）"""
+        if path != self.current_path:
+            return
+        self.model.remove_names(removed)
+        self.model.update_entries(changed)
+        self.model.insert_entries(added)
+        if self.show_all_sizes and any(record.is_dir for record in added):
+            self._handle_folder_sizes(path, added)
+        self.file_list_data = file_list
+        self.listing_cache.put(path, self.show_hidden, dir_mtime, file_list)
+        self._folder_count = sum(1 for record in file_list if record.is_dir)
+        self._file_count = len(file_list) - self._folder_count
+        self._update_status_bar(self._file_count, self._folder_count)
+        self.file_list.set_empty_hint("当前目录为空" if not file_list else "")
+
+    def refresh_folder_sizes(self, changed_dirs: list):
+        """目录树监视报告变化：重新计算当前列表中受影响的子文件夹的大小（仅在显示所有大小时）"""
+        if not self.show_all_sizes:
+            return
+        prefix = os.path.join(self.current_path, "")
+        affected = {changed[len(prefix):].split(os.sep, 1)[0] for changed in changed_dirs if changed.startswith(prefix)}
+        for name in affected:
+            item = self.model.item(self.model.row_of_name(name))
+            if item is not None and item.is_dir:
+                self.folder_size_manager.start_calculate(item.path, force=True)
+
+    def capture_view_state(self) -> dict:
+        """记录当前目录的视图状态（首个可见项、当前项与选中项，用于后退/前进时恢复）"""
+        top = self.file_list.itemAt(QPoint(0, 0))
+        current = self.file_list.currentItem()
+        return {
+            "path": self.last_updated_path,
+            "top": top.text(0) if top else None,
+            "current": current.text(0) if current else None,
+            "selected": [item.text(0) for item in self.file_list.selectedItems()],
+        }
+
+    def restore_view_state(self, state: dict):
+        """恢复视图状态（已不存在的条目忽略）"""
+        model = self.model
+        selection_model = self.file_list.selectionModel()
+        for name in state["selected"]:
+            row = model.row_of_name(name)
+            if row >= 0:
+                selection_model.select(model.index(row, 0),
+                                       QItemSelectionModel.Select | QItemSelectionModel.Rows)
+        row = model.row_of_name(state["current"])
+        if row >= 0:
+            selection_model.setCurrentIndex(model.index(row, 0), QItemSelectionModel.NoUpdate)
+        row = model.row_of_name(state["top"])
+        if row >= 0:
+            self.file_list.scrollTo(model.index(row, 0), QAbstractItemView.PositionAtTop)
+
     def _handle_scan_error(self, error_msg):
         # 显示错误提示 （通过status_bar）
         # print(f"[Debug] 扫描错误：{error_msg}")
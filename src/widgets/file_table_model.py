@@ -0,0 +1,481 @@
+import os
+from array import array
+from PySide6.QtCore import Qt, QAbstractTableModel, QModelIndex, QMimeData, QUrl
+from PySide6.QtGui import QColor
+from utils.file_utils import FILE_TYPES, format_size_cached, format_mtime
+from utils.fuzzy_match import FuzzyMatcher, FuzzyIndex
+from utils.sort_engine import ColumnSortEngine
+
+NAME_COLUMN, SIZE_COLUMN, MTIME_COLUMN = 0, 1, 2
+DEFAULT_HEADERS = ["名称", "大小", "修改时间"]
+HIDDEN_COLOR = QColor(Qt.GlobalColor.gray)  # 隐藏文件文字颜色（共享同一对象）
+
+
+class FileListItem:
+    """文件列表行句柄（提供与 QTreeWidgetItem 相同的只读接口：text/data/icon）"""
+    __slots__ = ("model", "index")
+
+    def __init__(self, model, index: int):
+        self.model = model
+        self.index = index  # 数据下标（不随排序/过滤变化）
+
+    @property
+    def path(self) -> str:
+        return self.model.path_at(self.index)
+
+    @property
+    def is_dir(self) -> bool:
+        return bool(self.model.is_dir_at(self.index))
+
+    def text(self, column: int) -> str:
+        return self.model.display_text(self.index, column)
+
+    def data(self, column: int, role=Qt.ItemDataRole.UserRole):
+        if role == Qt.ItemDataRole.UserRole:
+            return self.path
+        return self.model.cell_data(self.index, column, role)
+
+    def icon(self, column: int = 0):
+        return self.model.cell_data(self.index, column, Qt.ItemDataRole.DecorationRole)
+
+
+class FileTableModel(QAbstractTableModel):
+    """
+    文件列表模型：数据按列存储在紧凑数组中（名称/大小/修改时间/类型id），
+    显示文本与图标仅在 data() 中为可见行生成。
+    """
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.icons = {}  # 图标集合（由 FileListUpdater 注入）
+        self.base_path = ""  # 当前目录（路径 = base_path + 名称，不逐行存储）
+        self.show_all_sizes = False  # 文件夹是否显示大小（否则显示“<文件夹>”）
+        self._headers = list(DEFAULT_HEADERS)
+        self._sort_spec = None  # 当前排序方式 (排序键, 是否降序)
+        self._filter_keyword = None  # 当前过滤关键词（已大小写折叠；None 表示不过滤）
+        self._filter_query = None  # 当前过滤查询（SearchQuery，含 ext:/size: 等条件时使用）
+        self._filter_fuzzy = None  # 当前模糊过滤 (FuzzyMatcher, 全部匹配的下标, 当时的数据条数)（只显示得分最高的若干行）
+        self._sort_engine = ColumnSortEngine()  # 按排序键缓存排列（列数据变化时失效）
+        self._reset_columns()
+
+    def _reset_columns(self):
+        """清空所有列数据"""
+        self._names = []  # 名称列
+        self._name_keys = []  # 名称排序键列（扫描时计算，见 name_sort_key）
+        self._folded_names = []  # 大小写折叠后的名称列（过滤时直接比较，不逐次转换）
+        self._is_dir = array('b')  # 是否为文件夹
+        self._sizes = array('q')  # 大小（字节）
+        self._mtimes = array('d')  # 修改时间（时间戳）
+        self._type_ids = array('B')  # 文件类型编号（FILE_TYPES 下标）
+        self._hidden = array('b')  # 是否隐藏（扫描时已判断）
+        self._index_of_name = {}  # {名称: 数据下标}（仅包含现存条目，已删除条目的列数据保留但不再引用）
+        self._size_text = {}  # {数据下标: 文件夹大小文本}（异步计算结果/缓存）
+        self._order = []  # 视图行 -> 数据下标（排序与过滤后的结果）
+        self._positions = None  # 数据下标 -> 视图行（按需重建）
+        self._sort_engine.invalidate()
+
+    # ---------- 数据写入 ----------
+    def clear(self):
+        """清空模型"""
+        self.beginResetModel()
+        self._reset_columns()
+        self._filter_keyword = None
+        self._filter_query = None
+        self._filter_fuzzy = None
+        self.endResetModel()
+
+    def append_entries(self, records: list):
+        """追加一批扫描记录（流式加载，按到达顺序追加在末尾）"""
+        if not records:
+            return
+        start = len(self._names)
+        self._sort_engine.invalidate()
+        for record in records:
+            self._append_columns(record)  # 只写入列数据，尚未加入可见行
+        new_indices = [index for index in range(start, len(self._names)) if self._match_filter(index)]
+        if new_indices:
+            first_row = len(self._order)
+            self.beginInsertRows(QModelIndex(), first_row, first_row + len(new_indices) - 1)
+            self._order.extend(new_indices)
+            self._positions = None
+            self.endInsertRows()
+
+    def _append_columns(self, record) -> int:
+        """写入一行列数据（FileRecord），返回数据下标"""
+        index = len(self._names)
+        self._names.append(record.name)
+        self._name_keys.append(record.sort_key)
+        folded = record.name.casefold()
+        self._folded_names.append(record.name if folded == record.name else folded)  # 已是小写时共用名称字符串
+        self._is_dir.append(1 if record.is_dir else 0)
+        self._sizes.append(record.size)
+        self._mtimes.append(record.mtime or 0.0)
+        self._type_ids.append(record.type_id)
+        self._hidden.append(1 if record.hidden else 0)
+        self._index_of_name[record.name] = index
+        return index
+
+    # ---------- 增量更新（目录监视） ----------
+    def insert_entries(self, records: list):
+        """插入新增条目（有排序方式时二分查找插入位置，其余行不变）"""
+        self._sort_engine.invalidate()
+        for record in records:
+            if record.name in self._index_of_name:
+                self.update_entries([record])
+                continue
+            index = self._append_columns(record)
+            if self._match_filter(index):
+                self._insert_row(index)
+
+    def remove_names(self, names: list):
+        """删除指定名称的条目（按连续行区间批量移除）"""
+        positions = self._row_positions()
+        rows = []
+        for name in names:
+            index = self._index_of_name.pop(name, None)
+            if index is None:
+                continue
+            self._size_text.pop(index, None)
+            if positions[index] >= 0:
+                rows.append(positions[index])
+        rows.sort(reverse=True)
+        while rows:
+            last = first = rows.pop(0)
+            while rows and rows[0] == first - 1:
+                first = rows.pop(0)
+            self.beginRemoveRows(QModelIndex(), first, last)
+            del self._order[first:last + 1]
+            self._positions = None
+            self.endRemoveRows()
+
+    def update_entries(self, records: list):
+        """更新已变化条目的大小/修改时间（影响当前排序时移动到新位置）"""
+        self._sort_engine.invalidate()
+        for record in records:
+            index = self._index_of_name.get(record.name)
+            if index is None:
+                continue
+            self._is_dir[index] = 1 if record.is_dir else 0
+            if not (record.is_dir and index in self._size_text):  # 保留异步计算得到的文件夹大小
+                self._sizes[index] = record.size
+            self._mtimes[index] = record.mtime or 0.0
+            self._type_ids[index] = record.type_id
+            self._hidden[index] = 1 if record.hidden else 0
+            row = self._row_positions()[index]
+            if row < 0:
+                continue
+            if self._keeps_sort_order() and self._sort_spec[0] != "name":
+                self.beginRemoveRows(QModelIndex(), row, row)
+                del self._order[row]
+                self._positions = None
+                self.endRemoveRows()
+                self._insert_row(index)
+            else:
+                self.dataChanged.emit(self.index(row, 0), self.index(row, len(DEFAULT_HEADERS) - 1))
+
+    def _keeps_sort_order(self) -> bool:
+        """视图行是否按当前排序方式排列（模糊过滤时按匹配得分排列，不能二分查找）"""
+        return self._sort_spec is not None and self._filter_fuzzy is None
+
+    def _insert_row(self, index: int):
+        """把数据下标插入到视图中的排序位置（无排序方式或模糊过滤时追加到末尾）"""
+        row = self._sorted_row(index)
+        self.beginInsertRows(QModelIndex(), row, row)
+        self._order.insert(row, index)
+        self._positions = None
+        self.endInsertRows()
+
+    def _sorted_row(self, index: int, after_equal: bool = True) -> int:
+        """二分查找数据下标在当前排序中的插入位置（after_equal 为 True 时相等的插在后面，否则返回相等区间的起点）"""
+        if not self._keeps_sort_order():
+            return len(self._order)
+        reverse = self._sort_spec[1]
+        key = self._row_key(index)
+        low, high = 0, len(self._order)
+        while low < high:
+            mid = (low + high) // 2
+            mid_key = self._row_key(self._order[mid])
+            if after_equal:
+                before = (key > mid_key) if reverse else (key < mid_key)
+            else:
+                before = (key >= mid_key) if reverse else (key <= mid_key)
+            if before:
+                high = mid
+            else:
+                low = mid + 1
+        return low
+
+    def _row_key(self, index: int) -> tuple:
+        """单行排序键（与 ColumnSortEngine 的排序规则一致）"""
+        sort_key = self._sort_spec[0]
+        if sort_key == "size":
+            value = self._sizes[index]
+        elif sort_key == "mtime":
+            value = self._mtimes[index]
+        else:
+            value = self._name_keys[index]
+        return (0 if self._is_dir[index] else 1, value)
+
+    def set_folder_size(self, path: str, text: str, size_bytes: int = -1):
+        """
+        更新文件夹大小（异步计算结果/数据库缓存；路径不在当前目录时忽略）
+        - 大小列保存字节数；当前按大小排序时只把该行移动到新的排序位置，不重排整个列表
+        :param size_bytes: 字节数（-1 表示无法计算，只更新显示文本）
+        """
+        index = self._index_of_name.get(os.path.basename(path))
+        if index is None or self.path_at(index) != path:
+            return
+        self._size_text[index] = text
+        if 0 <= size_bytes != self._sizes[index] and self._keeps_sort_order() and self._sort_spec[0] == "size":
+            row = self._find_row(index)  # 须在修改大小之前定位（按原排序键查找）
+            self._sizes[index] = size_bytes
+            self._sort_engine.invalidate("size")
+            row = self._move_to_sorted_row(index, row)
+        else:
+            if 0 <= size_bytes != self._sizes[index]:
+                self._sizes[index] = size_bytes
+                self._sort_engine.invalidate("size")
+            row = self._row_positions()[index]
+        if row >= 0:
+            model_index = self.index(row, SIZE_COLUMN)
+            self.dataChanged.emit(model_index, model_index, [Qt.ItemDataRole.DisplayRole])
+
+    def _move_to_sorted_row(self, index: int, row: int) -> int:
+        """排序键变化后把位于 row 的数据下标移动到新的排序位置（二分查找，视图保留选中项），返回新的视图行"""
+        if row < 0:
+            return row
+        del self._order[row]
+        new_row = self._sorted_row(index)
+        self._order.insert(row, index)
+        if new_row == row:
+            return row
+        # beginMoveRows 的目标位置按移动前的行号计算
+        self.beginMoveRows(QModelIndex(), row, row, QModelIndex(), new_row + 1 if new_row > row else new_row)
+        del self._order[row]
+        self._order.insert(new_row, index)
+        self._positions = None
+        self.endMoveRows()
+        return new_row
+
+    def _find_row(self, index: int) -> int:
+        """定位数据下标所在的视图行（行号映射已失效时在排序键相等的区间内查找，不重建整个映射）"""
+        if self._positions is not None or not self._keeps_sort_order():
+            return self._row_positions()[index]
+        low = self._sorted_row(index, after_equal=False)
+        high = self._sorted_row(index)
+        try:
+            return self._order.index(index, low, high)
+        except ValueError:
+            return -1  # 已被过滤
+
+    # ---------- 排序与过滤 ----------
+    def sort_rows(self, sort_key: str = "name", reverse: bool = False):
+        """按指定键重排现有行（复用缓存的排列，不重建数据，保持选中项）"""
+        self._sort_spec = (sort_key, reverse)
+        self._apply_order(self._sorted(self._order))
+
+    def set_filter(self, keyword: str) -> int:
+        """
+        按名称关键词过滤（不区分大小写，一次性批量更新可见行，保留仍可见的选中项），返回匹配数量
+        - 新关键词包含上一个关键词时（继续输入），只在当前匹配的行中缩小范围，且无需重新排序
+        """
+        keyword = keyword.casefold()
+        folded = self._folded_names
+        previous = self._filter_keyword
+        if previous is not None and previous in keyword and self._filter_query is None and self._filter_fuzzy is None:
+            new_order = [i for i in self._order if keyword in folded[i]]
+        else:
+            new_order = self._sorted(i for i in self._index_of_name.values() if keyword in folded[i])
+        self._filter_keyword = keyword
+        self._filter_query = None
+        self._filter_fuzzy = None
+        self._apply_order(new_order)
+        return len(self._order)
+
+    def set_query_filter(self, query) -> int:
+        """按编译后的查询过滤（名称/类型/大小/修改时间均已在列数据中，无需 stat），返回匹配数量"""
+        folded, is_dir, sizes, mtimes = self._folded_names, self._is_dir, self._sizes, self._mtimes  # 名称条件只比较折叠后的名称
+        matches = query.matches_record
+        new_order = self._sorted(i for i in self._index_of_name.values()
+                                 if matches(folded[i], is_dir[i], sizes[i], mtimes[i]))
+        self._filter_keyword = None
+        self._filter_query = query
+        self._filter_fuzzy = None
+        self._apply_order(new_order)
+        return len(self._order)
+
+    def set_fuzzy_filter(self, pattern: str, limit: int) -> int:
+        """
+        模糊过滤：按得分从高到低只显示前 limit 行（不按当前排序方式重排），返回全部匹配的数量
+        - 新模式以上一个模式开头时（继续输入），只在上一次的匹配中重新筛选
+        """
+        matcher = FuzzyMatcher(pattern)
+        names = self._names
+        if self._filter_fuzzy is not None and matcher.pattern.startswith(self._filter_fuzzy[0].pattern):
+            _previous, candidates, count = self._filter_fuzzy
+            candidates = candidates + list(range(count, len(names)))  # 加上之后新增的条目
+            if len(self._index_of_name) != len(names):  # 有条目被删除：排除已删除的下标
+                index_of_name = self._index_of_name
+                candidates = [i for i in candidates if index_of_name.get(names[i]) == i]
+        elif len(self._index_of_name) == len(names):
+            candidates = None  # 没有删除过条目：全部下标都是现存条目
+        else:
+            candidates = list(self._index_of_name.values())
+        top, matches = FuzzyIndex(names, self._folded_names).top_k(matcher, limit, candidates)
+        self._filter_keyword = None
+        self._filter_query = None
+        self._filter_fuzzy = (matcher, matches, len(names))
+        self._apply_order([index for _score, index in top])
+        return len(matches)
+
+    def clear_filter(self):
+        """清除过滤，显示所有行"""
+        self._filter_keyword = None
+        self._filter_query = None
+        self._filter_fuzzy = None
+        self._apply_order(self._sorted(self._index_of_name.values()))
+
+    def _match_filter(self, index: int) -> bool:
+        if self._filter_fuzzy is not None:  # 新增条目：匹配即追加（排在已显示的结果之后）
+            return self._filter_fuzzy[0].regex.search(self._folded_names[index]) is not None
+        if self._filter_query is not None:
+            return self._filter_query.matches_record(self._folded_names[index], self._is_dir[index],
+                                                     self._sizes[index], self._mtimes[index])
+        return self._filter_keyword is None or self._filter_keyword in self._folded_names[index]
+
+    def _sorted(self, indices) -> list:
+        """按当前排序方式排序下标（无排序方式时保持原顺序）"""
+        if self._sort_spec is None:
+            return list(indices)
+        sort_key, reverse = self._sort_spec
+        permutation = self._sort_engine.permutation(sort_key, reverse, self._is_dir, self._sort_values)
+        return self._sort_engine.select(permutation, indices, len(self._names))
+
+    def _sort_values(self, sort_key: str):
+        """排序键列（名称使用预先计算的排序键）"""
+        if sort_key == "size":
+            return self._sizes
+        if sort_key == "mtime":
+            return self._mtimes
+        return self._name_keys
+
+    def _apply_order(self, new_order: list):
+        """
+        以布局变化方式替换可见行（排序与过滤共用，视图保留选中项与当前项）
+        - 仍可见的行跟随数据移动到新位置；被过滤掉的行对应的持久索引失效（从选中项中移除）
+        """
+        self.layoutAboutToBeChanged.emit()
+        old_indexes = self.persistentIndexList()
+        data_indices = [self._order[index.row()] for index in old_indexes]
+        self._order = new_order
+        self._positions = None
+        if old_indexes:
+            positions = self._row_positions()
+            self.changePersistentIndexList(old_indexes, [
+                self.index(positions[data_index], index.column()) if positions[data_index] >= 0 else QModelIndex()
+                for index, data_index in zip(old_indexes, data_indices)
+            ])
+        self.layoutChanged.emit()
+
+    def _row_positions(self) -> array:
+        """数据下标 -> 视图行（未显示的数据为 -1）"""
+        if self._positions is None:
+            self._positions = self._sort_engine.inverse(self._order, len(self._names))
+        return self._positions
+
+    # ---------- 行访问 ----------
+    def item(self, row: int):
+        """返回视图行对应的行句柄"""
+        if 0 <= row < len(self._order):
+            return FileListItem(self, self._order[row])
+        return None
+
+    def row_of_name(self, name: str) -> int:
+        """返回名称对应的视图行（不存在或已被过滤时返回 -1）"""
+        index = self._index_of_name.get(name)
+        return -1 if index is None else self._row_positions()[index]
+
+    def path_at(self, index: int) -> str:
+        return os.path.join(self.base_path, self._names[index])
+
+    def is_dir_at(self, index: int) -> int:
+        return self._is_dir[index]
+
+    def display_text(self, index: int, column: int) -> str:
+        """生成单元格显示文本（仅在显示时调用）"""
+        if column == NAME_COLUMN:
+            return self._names[index]
+        if column == SIZE_COLUMN:
+            if self._is_dir[index]:
+                if not self.show_all_sizes:
+                    return '<文件夹>'
+                return self._size_text.get(index, "计算中")  # 异步计算时显示占位符
+            return format_size_cached(self._sizes[index])
+        if column == MTIME_COLUMN:
+            # 格式化时间戳为可读格式（如 "2024-06-01 12:34"），同一分钟的文件共享结果
+            return format_mtime(self._mtimes[index])
+        return ""
+
+    def cell_data(self, index: int, column: int, role):
+        """按数据下标返回单元格数据"""
+        if role == Qt.ItemDataRole.DisplayRole:
+            return self.display_text(index, column)
+        if column != NAME_COLUMN:
+            return None
+        if role == Qt.ItemDataRole.DecorationRole:
+            file_type = FILE_TYPES[self._type_ids[index]]
+            return self.icons.get(file_type, self.icons.get('default'))
+        if role == Qt.ItemDataRole.ToolTipRole:
+            return self._names[index]
+        if role == Qt.ItemDataRole.ForegroundRole:
+            return HIDDEN_COLOR if self._hidden[index] else None
+        if role == Qt.ItemDataRole.UserRole:
+            return self.path_at(index)
+        return None
+
+    # ---------- QAbstractTableModel 接口 ----------
+    def rowCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else len(self._order)
+
+    def columnCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else len(DEFAULT_HEADERS)
+
+    def data(self, index, role=Qt.ItemDataRole.DisplayRole):
+        if not index.isValid():
+            return None
+        return self.cell_data(self._order[index.row()], index.column(), role)
+
+    def headerData(self, section, orientation, role=Qt.ItemDataRole.DisplayRole):
+        if orientation == Qt.Orientation.Horizontal and role == Qt.ItemDataRole.DisplayRole:
+            return self._headers[section] if section < len(self._headers) else None
+        return super().headerData(section, orientation, role)
+
+    def setHeaderData(self, section, orientation, value, role=Qt.ItemDataRole.EditRole):
+        if orientation != Qt.Orientation.Horizontal or section >= len(self._headers):
+            return False
+        self._headers[section] = value
+        self.headerDataChanged.emit(orientation, section, section)
+        return True
+
+    def set_header_labels(self, labels: list):
+        """设置表头文本（未指定的列使用默认文本）"""
+        self._headers = list(labels) + DEFAULT_HEADERS[len(labels):]
+        self.headerDataChanged.emit(Qt.Orientation.Horizontal, 0, len(self._headers) - 1)
+
+    def flags(self, index):
+        if not index.isValid():
+            return Qt.ItemFlag.NoItemFlags
+        return Qt.ItemFlag.ItemIsEnabled | Qt.ItemFlag.ItemIsSelectable | Qt.ItemFlag.ItemIsDragEnabled
+
+    def mimeTypes(self):
+        return ["text/uri-list"]
+
+    def mimeData(self, indexes):
+        """拖放数据：选中行对应的本地文件 URL（忽略已不存在的路径）"""
+        mime_data = QMimeData()
+        rows = sorted({index.row() for index in indexes if index.isValid()})
+        paths = [self.path_at(self._order[row]) for row in rows]
+        mime_data.setUrls([QUrl.fromLocalFile(path) for path in paths if os.path.exists(path)])
+        return mime_data
+
+    def supportedDragActions(self):
+        return Qt.DropAction.CopyAction
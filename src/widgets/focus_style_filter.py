@@ -12,7 +12,7 @@ class FocusStyleFilter(QObject):
                 # 应用高亮样式（继承初始样式+边框）
                 obj.setStyleSheet(f"""
                     {self.initial_style}
-                    QTreeWidget {{
+                    QTreeView {{
                         border: 3px solid #2196F3;
                         background-color: rgba(0, 0, 0, 180);
                     }}
@@ -0,0 +1,509 @@
+import os
+import re
+from PySide6.QtWidgets import (QDialog, QWidget, QVBoxLayout, QHBoxLayout, QComboBox, QPushButton, QLineEdit,
+                               QCheckBox, QLabel, QProgressBar, QTableView, QHeaderView, QAbstractItemView)
+from PySide6.QtCore import Qt, QAbstractTableModel, QModelIndex, QStorageInfo, QTimer
+from dbload_manager.filename_index import FilenameIndex
+from threads.index_builder import IndexBuildThread
+from threads.index_query import IndexQuery
+from threads.recursive_search import RecursiveSearch
+from threads.content_search import ContentSearch
+from utils.file_utils import get_file_type, format_size_cached, format_mtime
+from utils.search_query import compile_query, QueryError
+
+# 不建立索引的伪文件系统（Linux）
+_PSEUDO_FILESYSTEMS = {"proc", "sysfs", "tmpfs", "devtmpfs", "devpts", "cgroup", "cgroup2", "squashfs",
+                       "overlay", "securityfs", "debugfs", "tracefs", "pstore", "bpf", "autofs", "mqueue"}
+INDEX_SWAP_RETRIES = 20  # 索引文件被占用（目录树监视正在同步、其他程序打开）时替换的重试次数
+INDEX_SWAP_RETRY_MS = 500
+
+
+def list_volumes() -> list:
+    """已挂载且可读的卷根目录（跨平台，由 QStorageInfo 提供）"""
+    roots = []
+    for volume in QStorageInfo.mountedVolumes():
+        if not (volume.isValid() and volume.isReady()):
+            continue
+        if bytes(volume.fileSystemType()).decode(errors="ignore") in _PSEUDO_FILESYSTEMS:
+            continue
+        roots.append(os.path.normpath(volume.rootPath()))
+    return sorted(set(roots))
+
+
+class SearchResultModel(QAbstractTableModel):
+    """搜索结果模型：每行 (完整路径, 是否文件夹, 大小, 修改时间)，支持分批追加（流式结果）"""
+    HEADERS = ["名称", "所在文件夹", "大小", "修改时间"]
+
+    def __init__(self, icons=None, parent=None):
+        super().__init__(parent)
+        self.icons = icons or {}
+        self._rows = []
+
+    def clear(self):
+        self.beginResetModel()
+        self._rows = []
+        self.endResetModel()
+
+    def set_results(self, rows: list):
+        self.beginResetModel()
+        self._rows = list(rows)
+        self.endResetModel()
+
+    def append_results(self, rows: list):
+        if not rows:
+            return
+        first = len(self._rows)
+        self.beginInsertRows(QModelIndex(), first, first + len(rows) - 1)
+        self._rows.extend(rows)
+        self.endInsertRows()
+
+    def result_at(self, row: int):
+        return self._rows[row] if 0 <= row < len(self._rows) else None
+
+    def rowCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else len(self._rows)
+
+    def columnCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else len(self.HEADERS)
+
+    def data(self, index, role=Qt.ItemDataRole.DisplayRole):
+        if not index.isValid():
+            return None
+        path, is_dir, size, mtime = self._rows[index.row()]
+        column = index.column()
+        if role == Qt.ItemDataRole.DisplayRole:
+            if column == 0:
+                return os.path.basename(path)
+            if column == 1:
+                return os.path.dirname(path)
+            if column == 2:
+                return "<文件夹>" if is_dir else format_size_cached(size)
+            if column == 3:
+                return format_mtime(mtime)
+        elif role == Qt.ItemDataRole.DecorationRole and column == 0:
+            file_type = 'folder' if is_dir else get_file_type(path)
+            return self.icons.get(file_type, self.icons.get('default'))
+        elif role == Qt.ItemDataRole.ToolTipRole:
+            return path
+        return None
+
+    def headerData(self, section, orientation, role=Qt.ItemDataRole.DisplayRole):
+        if orientation == Qt.Orientation.Horizontal and role == Qt.ItemDataRole.DisplayRole:
+            return self.HEADERS[section]
+        return super().headerData(section, orientation, role)
+
+
+class ContentResultModel(QAbstractTableModel):
+    """内容搜索结果模型：每行 (完整路径, 行号, 预览)，显示为 “相对路径:行号” 与命中行内容"""
+    HEADERS = ["位置", "内容"]
+
+    def __init__(self, icons=None, parent=None):
+        super().__init__(parent)
+        self.icons = icons or {}
+        self.root = ""  # 搜索根目录（位置列显示相对路径）
+        self._rows = []
+
+    def clear(self):
+        self.beginResetModel()
+        self._rows = []
+        self.endResetModel()
+
+    def append_results(self, rows: list):
+        if not rows:
+            return
+        first = len(self._rows)
+        self.beginInsertRows(QModelIndex(), first, first + len(rows) - 1)
+        self._rows.extend(rows)
+        self.endInsertRows()
+
+    def result_at(self, row: int):
+        return self._rows[row] if 0 <= row < len(self._rows) else None
+
+    def rowCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else len(self._rows)
+
+    def columnCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else len(self.HEADERS)
+
+    def data(self, index, role=Qt.ItemDataRole.DisplayRole):
+        if not index.isValid():
+            return None
+        path, line, preview = self._rows[index.row()]
+        column = index.column()
+        if role == Qt.ItemDataRole.DisplayRole:
+            if column == 0:
+                return f"{os.path.relpath(path, self.root) if self.root else path}:{line}"
+            return preview
+        if role == Qt.ItemDataRole.DecorationRole and column == 0:
+            return self.icons.get(get_file_type(path), self.icons.get('default'))
+        if role == Qt.ItemDataRole.ToolTipRole:
+            return f"{path}:{line}"
+        return None
+
+    def headerData(self, section, orientation, role=Qt.ItemDataRole.DisplayRole):
+        if orientation == Qt.Orientation.Horizontal and role == Qt.ItemDataRole.DisplayRole:
+            return self.HEADERS[section]
+        return super().headerData(section, orientation, role)
+
+
+class IndexSearchDialog(QDialog):
+    """
+    高级搜索（替代内嵌 Everything.exe，跨平台）
+    - 整个卷：查询该卷的持久化文件名索引（FilenameIndex），索引在后台线程中构建并显示进度，构建期间旧索引仍可查询
+    - 当前文件夹：无需索引，并行递归遍历子文件夹，结果边找边显示
+    - 文件内容：在当前文件夹及子文件夹中用进程池搜索文件内容（回车开始），命中行边找边显示
+    - 输入即查询（防抖），双击结果在主窗口中打开所在目录并选中该条目
+    """
+    SCOPE_INDEX, SCOPE_SUBTREE, SCOPE_CONTENT = 0, 1, 2
+
+    def __init__(self, main_window):
+        super().__init__(main_window)
+        self.main_window = main_window
+        self.setWindowTitle("高级搜索")
+        self.resize(900, 600)
+        self.result_limit = main_window.config_manager.get("search_result_limit", 1000)
+        self.index = None  # 当前卷的文件名索引
+        self.build_thread = None
+        self.index_query = IndexQuery(self)
+        self.recursive_search = RecursiveSearch(self, main_window.config_manager.get("search_workers"))
+        self.content_search = ContentSearch(self, main_window.config_manager.get("content_search_workers"))
+        self.content_budget = main_window.config_manager.get("content_search_budget_mb", 20 * 1024) * 1024 * 1024
+        self.query_timer = QTimer(self)
+        self.query_timer.setSingleShot(True)
+        self.query_timer.setInterval(main_window.config_manager.get("filter_debounce_ms", 150))
+        self.query_timer.timeout.connect(self._run_query)
+        self._init_ui()
+        self.index_query.results_ready.connect(self._on_index_results)
+        self.recursive_search.results_found.connect(self.result_model.append_results)
+        self.recursive_search.progress.connect(self._on_search_progress)
+        self.recursive_search.search_finished.connect(self._on_search_finished)
+        self.content_search.hits_found.connect(self.content_model.append_results)
+        self.content_search.progress.connect(self._on_content_progress)
+        self.content_search.search_finished.connect(self._on_content_finished)
+        self.content_search.error_occurred.connect(self.status_label.setText)
+        self._load_volumes()
+
+    def _init_ui(self):
+        layout = QVBoxLayout(self)
+        top = QHBoxLayout()
+        self.scope_combo = QComboBox()
+        self.scope_combo.addItems(["整个卷（索引）", "当前文件夹及子文件夹", "文件内容（当前文件夹及子文件夹）"])
+        self.scope_combo.currentIndexChanged.connect(self._on_scope_changed)
+        top.addWidget(self.scope_combo)
+        self.volume_combo = QComboBox()
+        self.volume_combo.currentTextChanged.connect(self._on_volume_changed)
+        top.addWidget(self.volume_combo, 1)
+        self.build_btn = QPushButton("建立索引")
+        self.build_btn.clicked.connect(self._toggle_build)
+        top.addWidget(self.build_btn)
+        layout.addLayout(top)
+
+        self.index_label = QLabel()  # 索引状态/构建进度
+        layout.addWidget(self.index_label)
+        self.progress_bar = QProgressBar()
+        self.progress_bar.setRange(0, 0)  # 总数未知：忙碌指示
+        self.progress_bar.setVisible(False)
+        layout.addWidget(self.progress_bar)
+
+        query_row = QHBoxLayout()
+        self.query_input = QLineEdit()
+        self.query_input.setPlaceholderText("文件名（任意部分），可加条件：ext:log size:>100MB modified:<7d type:video name:/正则/")
+        self.query_input.textChanged.connect(self._on_query_edited)
+        self.query_input.returnPressed.connect(self._run_query)
+        query_row.addWidget(self.query_input, 1)
+        self.prefix_check = QCheckBox("匹配开头")
+        self.prefix_check.toggled.connect(lambda _checked: self._run_query())
+        query_row.addWidget(self.prefix_check)
+        self.stop_btn = QPushButton("停止")
+        self.stop_btn.setEnabled(False)
+        self.stop_btn.clicked.connect(self._stop_search)
+        query_row.addWidget(self.stop_btn)
+        layout.addLayout(query_row)
+
+        self.content_options = QWidget()  # 内容搜索选项（仅文件内容范围显示）
+        content_row = QHBoxLayout(self.content_options)
+        content_row.setContentsMargins(0, 0, 0, 0)
+        self.file_filter_input = QLineEdit()
+        self.file_filter_input.setPlaceholderText("文件条件（可选）：ext:py,txt size:<10MB modified:<30d")
+        self.file_filter_input.returnPressed.connect(self._run_query)
+        content_row.addWidget(self.file_filter_input, 1)
+        self.regex_check = QCheckBox("正则表达式")
+        content_row.addWidget(self.regex_check)
+        self.case_check = QCheckBox("区分大小写")
+        content_row.addWidget(self.case_check)
+        self.content_options.setVisible(False)
+        layout.addWidget(self.content_options)
+
+        self.result_model = SearchResultModel(self.main_window.icons, self)
+        self.content_model = ContentResultModel(self.main_window.icons, self)
+        self.result_view = QTableView()
+        self.result_view.setModel(self.result_model)
+        self.result_view.setSelectionBehavior(QAbstractItemView.SelectionBehavior.SelectRows)
+        self.result_view.setEditTriggers(QAbstractItemView.EditTrigger.NoEditTriggers)
+        self.result_view.verticalHeader().setVisible(False)
+        self.result_view.horizontalHeader().setSectionResizeMode(0, QHeaderView.ResizeMode.Interactive)
+        self.result_view.horizontalHeader().setSectionResizeMode(1, QHeaderView.ResizeMode.Stretch)
+        self.result_view.setColumnWidth(0, 300)
+        self.result_view.doubleClicked.connect(self._open_result)
+        layout.addWidget(self.result_view, 1)
+
+        self.status_label = QLabel()  # 查询结果统计
+        layout.addWidget(self.status_label)
+
+    # ---------- 卷与索引 ----------
+    def _load_volumes(self):
+        volumes = list_volumes()
+        self.volume_combo.addItems(volumes)
+        current_root = os.path.normpath(QStorageInfo(self.main_window.current_path).rootPath() or "")
+        if current_root in volumes:
+            self.volume_combo.setCurrentText(current_root)
+        if self.index is None or not self.index.exists():
+            self.scope_combo.setCurrentIndex(self.SCOPE_SUBTREE)  # 尚无索引：默认递归搜索当前文件夹
+
+    def _on_scope_changed(self, scope: int):
+        self.volume_combo.setEnabled(scope == self.SCOPE_INDEX)
+        content = scope == self.SCOPE_CONTENT
+        self.content_options.setVisible(content)
+        self.prefix_check.setVisible(not content)
+        self.result_view.setModel(self.content_model if content else self.result_model)
+        self.result_view.horizontalHeader().setSectionResizeMode(1, QHeaderView.ResizeMode.Stretch)
+        self.result_view.setColumnWidth(0, 300)
+        if content:
+            self._stop_search()
+            self.status_label.setText("按回车开始搜索文件内容")
+        else:
+            self._run_query()
+
+    def _on_volume_changed(self, root: str):
+        if self.build_thread is not None:
+            self.build_thread.stop()  # 切换卷时放弃正在构建的索引
+        if self.index is not None:
+            self.index.close()
+        self.index = FilenameIndex(root) if root else None
+        self._update_index_status()
+        self._run_query()
+
+    def _update_index_status(self):
+        if self.build_thread is not None:
+            return
+        info = self.index.info() if self.index is not None else {}
+        if info:
+            built_at = format_mtime(float(info.get("built_at", 0)))
+            self.index_label.setText(f"索引：{int(info.get('entries', 0)):,} 个条目（{built_at} 建立）")
+            self.build_btn.setText("重建索引")
+        else:
+            self.index_label.setText("该卷尚未建立索引（可搜索当前文件夹及子文件夹）")
+            self.build_btn.setText("建立索引")
+
+    def _toggle_build(self):
+        """开始构建索引（构建中再次点击则取消）"""
+        if self.build_thread is not None:
+            self.build_thread.stop()
+            return
+        if self.index is None:
+            return
+        self.build_thread = IndexBuildThread(self.index.root, self.index.db_path, self)
+        self.build_thread.progress.connect(self._on_build_progress)
+        self.build_thread.build_finished.connect(self._on_build_finished)
+        self.build_thread.error_occurred.connect(self._on_build_error)
+        self.build_thread.finished.connect(self._on_build_thread_finished)
+        self.build_btn.setText("取消")
+        self.progress_bar.setVisible(True)
+        self.index_label.setText("正在建立索引...")
+        self.build_thread.start()
+
+    def _on_build_progress(self, count: int, current_dir: str):
+        self.index_label.setText(f"正在建立索引：已索引 {count:,} 个条目  {current_dir}")
+
+    def _on_build_finished(self, tmp_path: str, count: int, elapsed: float):
+        thread = self.sender()
+        if self.index is None or thread.root != self.index.root:
+            _discard_file(tmp_path)  # 构建期间已切换到其他卷
+            return
+        skipped = f"，跳过 {thread.skipped_dirs} 个无法访问的目录" if thread.skipped_dirs else ""
+        self._install_index(self.index, tmp_path, f"索引建立完成：{count:,} 个条目，用时 {elapsed:.1f} 秒{skipped}",
+                            INDEX_SWAP_RETRIES)
+
+    def _install_index(self, index: FilenameIndex, tmp_path: str, message: str, retries: int):
+        """
+        用构建完成的索引文件替换旧索引
+        - 先等待后台查询退出并暂停目录树监视的索引同步（两者都打开着旧索引文件）
+        - 文件仍被占用时稍后重试，重试用尽后删除临时文件并在状态栏提示
+        """
+        if index is not self.index:
+            _discard_file(tmp_path)  # 等待重试期间已切换到其他卷
+            return
+        if retries < INDEX_SWAP_RETRIES and self.build_thread is not None:
+            return  # 等待重试期间开始了新的构建（新构建会重写临时文件）
+        self.index_query.cancel()
+        self.index_query.wait()
+        watcher = self.main_window.tree_watcher
+        replaced = False
+        if watcher.pause_index_updates():
+            try:
+                replaced = index.replace_with(tmp_path)
+            finally:
+                watcher.resume_index_updates()
+        if replaced:
+            self.main_window.statusBar().showMessage(message, 5000)
+            if retries < INDEX_SWAP_RETRIES:  # 首次替换后由构建线程结束的处理刷新
+                self._update_index_status()
+                if self.scope_combo.currentIndex() == self.SCOPE_INDEX:
+                    self._run_query()
+        elif retries > 0:
+            QTimer.singleShot(INDEX_SWAP_RETRY_MS, lambda: self._install_index(index, tmp_path, message, retries - 1))
+        else:
+            _discard_file(tmp_path)
+            self.main_window.statusBar().showMessage("索引文件被占用，无法替换为新建立的索引，已放弃本次构建结果", 5000)
+
+    def _on_build_error(self, message: str):
+        self.main_window.statusBar().showMessage(message, 5000)
+
+    def _on_build_thread_finished(self):
+        self.build_thread.deleteLater()
+        self.build_thread = None
+        self.progress_bar.setVisible(False)
+        self._update_index_status()
+        if self.scope_combo.currentIndex() == self.SCOPE_INDEX:
+            self._run_query()
+
+    # ---------- 查询 ----------
+    def _on_query_edited(self, _text: str):
+        """输入即查询；文件内容搜索开销大，只在回车时开始"""
+        if self.scope_combo.currentIndex() != self.SCOPE_CONTENT:
+            self.query_timer.start()
+
+    def _stop_search(self):
+        if self.index_query.is_running():
+            self.index_query.cancel()
+            self.stop_btn.setEnabled(False)
+            self.status_label.setText("已停止")
+        self.recursive_search.cancel()
+        self.content_search.cancel()
+
+    def _run_query(self):
+        self.query_timer.stop()
+        self._stop_search()
+        text = self.query_input.text().strip()
+        self.result_model.clear()
+        self.content_model.clear()
+        if not text:
+            self.status_label.clear()
+            return
+        if self.scope_combo.currentIndex() == self.SCOPE_CONTENT:
+            self._start_content_search(self.query_input.text())
+            return
+        try:
+            query = compile_query(text, prefix=self.prefix_check.isChecked())
+        except QueryError as e:
+            self.status_label.setText(str(e))
+            return
+        if self.scope_combo.currentIndex() == self.SCOPE_SUBTREE:
+            self._start_recursive_search(query)
+            return
+        if self.index is None:
+            return
+        self.stop_btn.setEnabled(True)
+        self.status_label.setText("正在查询索引...")
+        self.index_query.start(self.index, query, self.result_limit)  # 在工作线程中查询，下一次输入时取消
+
+    def _on_index_results(self, results: list, elapsed: float):
+        self.stop_btn.setEnabled(False)
+        self.result_model.set_results(results)
+        more = "（仅显示前 {:,} 个）".format(self.result_limit) if len(results) >= self.result_limit else ""
+        self.status_label.setText(f"找到 {len(results):,} 个结果{more}，用时 {elapsed:.0f} ms")
+
+    def _start_recursive_search(self, query):
+        """在当前文件夹下并行递归搜索（结果流式追加到结果列表）"""
+        root = self.main_window.current_path
+        if not os.path.isdir(root):
+            self.status_label.setText("当前位置不是文件夹，无法递归搜索")
+            return
+        self.stop_btn.setEnabled(True)
+        self.status_label.setText(f"正在搜索 {root} ...")
+        self.recursive_search.start(root, query.matches_entry, self.result_limit)
+
+    def _start_content_search(self, text: str):
+        """在当前文件夹下并行搜索文件内容（命中行流式追加到结果列表）"""
+        root = self.main_window.current_path
+        if not os.path.isdir(root):
+            self.status_label.setText("当前位置不是文件夹，无法搜索文件内容")
+            return
+        file_query = None
+        file_filter = self.file_filter_input.text().strip()
+        try:
+            if file_filter:
+                file_query = compile_query(file_filter)
+            self.content_search.start(root, text, self.regex_check.isChecked(), self.case_check.isChecked(),
+                                      file_query, self.result_limit, self.content_budget)
+        except QueryError as e:
+            self.status_label.setText(str(e))
+            return
+        except re.error as e:
+            self.status_label.setText(f"正则表达式错误：{e}")
+            return
+        self.content_model.root = root
+        self.stop_btn.setEnabled(True)
+        self.status_label.setText(f"正在搜索 {root} 中的文件内容...")
+
+    def _on_content_progress(self, files: int, scanned: int, elapsed: float):
+        rate = scanned / elapsed / 1024 / 1024 if elapsed > 0 else 0
+        self.status_label.setText(f"正在搜索：已扫描 {files:,} 个文件、{format_size_cached(scanned)}（{rate:,.1f} MB/s），"
+                                  f"找到 {self.content_model.rowCount():,} 处")
+
+    def _on_content_finished(self, files: int, scanned: int, hits: int, elapsed: float, cancelled: bool,
+                             budget_exhausted: bool):
+        self.stop_btn.setEnabled(False)
+        rate = scanned / elapsed / 1024 / 1024 if elapsed > 0 else 0
+        if cancelled:
+            state = "已停止"
+        elif budget_exhausted:
+            state = f"已达到扫描量上限 {format_size_cached(self.content_budget)}"
+        elif hits >= self.result_limit:
+            state = "已达到结果上限"
+        else:
+            state = "搜索完成"
+        self.status_label.setText(f"{state}：找到 {hits:,} 处，扫描 {files:,} 个文件、{format_size_cached(scanned)}，"
+                                  f"用时 {elapsed:.2f} 秒（{rate:,.1f} MB/s）")
+
+    def _on_search_progress(self, dirs: int, entries: int, elapsed: float):
+        rate = entries / elapsed if elapsed > 0 else 0
+        self.status_label.setText(f"正在搜索：已遍历 {dirs:,} 个文件夹、{entries:,} 个条目（{rate:,.0f} 条目/秒），"
+                                  f"找到 {self.result_model.rowCount():,} 个结果")
+
+    def _on_search_finished(self, dirs: int, entries: int, matches: int, elapsed: float, cancelled: bool):
+        self.stop_btn.setEnabled(False)
+        rate = entries / elapsed if elapsed > 0 else 0
+        state = "已停止" if cancelled else ("已达到结果上限" if matches >= self.result_limit else "搜索完成")
+        self.status_label.setText(f"{state}：找到 {matches:,} 个结果，遍历 {dirs:,} 个文件夹、{entries:,} 个条目，"
+                                  f"用时 {elapsed:.2f} 秒（{rate:,.0f} 条目/秒）")
+
+    def _open_result(self, index):
+        """在主窗口中打开结果所在目录并选中该条目"""
+        result = self.result_view.model().result_at(index.row())
+        if result is not None:
+            self.main_window.reveal_path(result[0])
+
+    def closeEvent(self, event):
+        """关闭对话框时停止递归搜索与内容搜索（索引构建在后台继续）"""
+        self._stop_search()
+        super().closeEvent(event)
+
+    def shutdown(self):
+        """程序退出时停止搜索与索引构建并关闭数据库"""
+        self.index_query.shutdown()
+        self.recursive_search.shutdown()
+        self.content_search.shutdown()
+        if self.build_thread is not None:
+            self.build_thread.stop()
+            self.build_thread.wait()
+        if self.index is not None:
+            self.index.close()
+
+
+def _discard_file(path: str):
+    """删除不再使用的临时索引文件（删除失败时保留，下次构建开始时会先删除）"""
+    try:
+        os.remove(path)
+    except OSError:
+        pass
@@ -134,10 +134,10 @@ def setup_splitter(main_window, config):
     # """)
     # 保存文件列表的初始样式（关键修改）
     initial_style = f"""
-        QTreeWidget {{
+        QTreeView {{
             background-color: rgba(0,0,0, {bg_alpha2});
         }}
-        QTreeWidget::item {{ 
+        QTreeView::item {{ 
             height: {file_list_icon_size}px;
             margin: 1px 0;
             padding: 0 2px;